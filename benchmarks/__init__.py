@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+SRC_DIRECTORY = Path(__file__).resolve().parent.parent / "src"
+
+# The interpreter modules import each other as top-level modules, like when running src/fitch_cli.py
+if str(SRC_DIRECTORY) not in sys.path:
+    sys.path.insert(0, str(SRC_DIRECTORY))
@@ -0,0 +1,70 @@
+"""Measures the proof search on the goals of the examples, and compares the proofs found with those of the examples.
+
+Usage: python -m benchmarks.bench_prover [--file PATH] [--time-limit SECONDS] [--node-limit N]
+
+For each goal, the status of the search, the subgoals expanded, the depth reached, the lines of the proof found and
+of the example, and the time taken are printed. The proofs found are then verified by the interpreter. The benchmark
+fails (exit code 1) if a goal isn't proved or if a proof found is rejected.
+"""
+
+from benchmarks import SRC_DIRECTORY
+from fitch_api import *
+from fitch_prover import *
+import argparse
+import sys
+import time
+
+DEFAULT_FILE = SRC_DIRECTORY.parent / "examples" / "proof_examples.ftc"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the proof search on the goals of a proof file")
+    parser.add_argument("--file", default=str(DEFAULT_FILE), help="the proof file whose goals are proved")
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=DEFAULT_TIME_LIMIT,
+        help=f"maximum time for each goal, in seconds (default {DEFAULT_TIME_LIMIT:g})",
+    )
+    parser.add_argument(
+        "--node-limit",
+        type=int,
+        default=DEFAULT_NODE_LIMIT,
+        help=f"maximum subgoals expanded for each goal (default {DEFAULT_NODE_LIMIT})",
+    )
+    args = parser.parse_args()
+
+    examples = verify_file(args.file)
+    if not examples.success:
+        print(f"error in {args.file}: {examples.error}")
+        sys.exit(1)
+
+    sources = []
+    failures = 0
+    total_time = 0.0
+    print(f"{'goal':<48} {'status':<20} {'nodes':>7} {'depth':>5} {'lines':>5} {'example':>7} {'time':>10}")
+    for example in examples.proofs:
+        search = ProofSearch(time_limit=args.time_limit, node_limit=args.node_limit)
+        start = time.perf_counter()
+        proof = search.prove(example.goal)
+        elapsed = time.perf_counter() - start  # includes writing the proof
+        total_time += elapsed
+        if proof is None:
+            failures += 1
+        else:
+            sources.append(proof_source(proof))
+        lines = len(proof.steps) if proof is not None else "-"
+        print(
+            f"{str(example.goal):<48} {search.status:<20} {search.nodes:7} {search.depth:5} {lines:>5} "
+            f"{len(example.steps):7} {elapsed * 1000:7.2f} ms"
+        )
+
+    result = verify_source("\n".join(sources))
+    print(f"\n{len(sources)}/{len(examples.proofs)} goals proved in {total_time * 1000:.2f} ms")
+    print(f"proofs found verified by the interpreter: {'yes' if result.success else f'no ({result.error})'}")
+    if failures != 0 or not result.success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Measures the time taken by a new Python process to import the interpreter, parsers included.
+
+Usage: python -m benchmarks.bench_startup [--runs N] [--target SECONDS]
+
+The first run fills the on-disk parser caches, it is not counted. The benchmark fails (exit code 1) if the median
+startup time is above the target.
+"""
+
+from benchmarks import SRC_DIRECTORY
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_TARGET = 0.2  # seconds
+
+
+def time_import(module_name: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module_name}"], cwd=SRC_DIRECTORY, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the startup time of the Fitch interpreter")
+    parser.add_argument("--runs", type=int, default=10, help="number of timed runs (default 10)")
+    parser.add_argument(
+        "--target", type=float, default=DEFAULT_TARGET, help=f"maximum median time in seconds (default {DEFAULT_TARGET})"
+    )
+    args = parser.parse_args()
+
+    time_import("fitch_interpreter")  # warm up the parser caches
+    interpreter_times = [time_import("fitch_interpreter") for _ in range(args.runs)]
+    bare_times = [time_import("sys") for _ in range(args.runs)]
+
+    median_time = statistics.median(interpreter_times)
+    print(f"bare Python startup:        {statistics.median(bare_times) * 1000:.1f} ms")
+    print(f"interpreter import startup: {median_time * 1000:.1f} ms (target {args.target * 1000:.0f} ms)")
+
+    if median_time > args.target:
+        print("FAILED: startup time above target")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""Micro-benchmarks of the interpreter, and end-to-end benchmarks on the examples and on synthetic proof files.
+
+Usage: python -m benchmarks.bench_suite [--repeat N] [--filter TEXT] [--save NAME] [--compare NAME] [--threshold R]
+
+Each benchmark is run N times, in the same process, and its median time is reported. The results can be saved as a
+baseline (in benchmarks/baselines, or at the path given if NAME ends with .json), and compared with a baseline saved
+by another revision: the benchmark fails (exit code 1) if a median time is above the baseline by more than the
+threshold ratio. The verification cache is never used.
+"""
+
+from benchmarks import SRC_DIRECTORY
+from benchmarks.generators import *
+from fitch_interpreter import *
+from fitch_prover import *
+from fitch_truth_tables import *
+from pathlib import Path
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+EXAMPLES_DIRECTORY = SRC_DIRECTORY.parent / "examples"
+BASELINES_DIRECTORY = Path(__file__).resolve().parent / "baselines"
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.25  # a median time more than 25% above the baseline is a regression
+
+
+def example_sources() -> list[str]:
+    return [path.read_text(encoding="utf-8") for path in sorted(EXAMPLES_DIRECTORY.glob("*.ftc"))]
+
+
+def example_goals() -> list[Inference]:
+    scanner = ProofScanner(source_lines(EXAMPLES_DIRECTORY / "proof_examples.ftc"))
+    return [proof_goal_from_str(proof_block.text) for proof_block in scanner.proof_blocks()]
+
+
+def proof_parts(sources: list[str]) -> tuple[list[str], list[str]]:
+    """Returns the formulas and the justifications written in the sources"""
+    formulas, justifications = [], []
+    for source in sources:
+        for line in source.splitlines():
+            line = remove_comment(line).strip()
+            if line.startswith(PROOF_KEYWORD):
+                inference = line[len(PROOF_KEYWORD) :].replace("⊢", "|-")
+                formulas += [part.strip() for part in inference.replace("|-", ",").split(",") if part.strip() != ""]
+            elif JUSTIFICATION_KEYWORD in line:
+                formula, justification = remove_line_number(line).split(JUSTIFICATION_KEYWORD, 1)
+                formulas.append(formula.strip())
+                justifications.append(justification.strip())
+    return formulas, justifications
+
+
+def interpret_source(source: str):
+    """Interprets a source as fitch_cli.py does, rendering every proof"""
+    interpreter = FitchInterpreter("<benchmark>", ModuleRegistry(), source=source)
+    for _ in interpreter.interpret_code():
+        pass
+    return interpreter
+
+
+def bench_parse_formulas(formulas: list[str]):
+    def run():
+        for formula in formulas:
+            parse_formula(formula)
+
+    return run
+
+
+def bench_parse_expressions(formulas: list[str]):
+    def run():
+        for formula in formulas:
+            Expression(formula)
+
+    return run
+
+
+def bench_justifications(justifications: list[str]):
+    def run():
+        for justification in justifications:
+            justification_from_str(justification)
+
+    return run
+
+
+def bench_add_lines(length: int):
+    premise = Expression("A & B")
+    conjunction_elimination = Expression("A")
+    disjunction_introduction = Expression("A v C")
+
+    def run():
+        proof = Proof(inference_from_str("A & B |- A v C"))
+        proof.add_premise(premise)
+        while len(proof.steps) < length:
+            proof.add_line(conjunction_elimination, ConjunctionElim(1))
+            proof.add_line(disjunction_introduction, DisjunctionIntro(len(proof.steps)))
+
+    return run
+
+
+def bench_theorem_applications(count: int):
+    theorem = inference_from_str("A -> B, B -> C |- A -> C")
+    applications = []
+    for index in range(count):
+        a, b, c = (large_formula_text(size, index) for size in (index % 7 + 1, index % 5 + 1, index % 3 + 1))
+        lines_cited = [Expression(f"({a}) -> ({b})"), Expression(f"({b}) -> ({c})")]
+        applications.append((lines_cited, Expression(f"({a}) -> ({c})")))
+    application = TheoremApplication(theorem, [1, 2])
+
+    def run():
+        theorem_applies.cache_clear()  # the matching itself is measured, not its memoization
+        for lines_cited, conclusion in applications:
+            application.verify(lines_cited, conclusion)
+
+    return run
+
+
+def bench_truth_tables(formulas: list[str]):
+    expressions = [Expression(formula) for formula in formulas]
+    return lambda: evaluate_formulas(expressions)
+
+
+def bench_render(source: str, latex: bool):
+    interpreter = interpret_source(source)
+
+    def run():
+        for proof in interpreter.proofs_list:
+            proof.latex() if latex else str(proof)
+
+    return run
+
+
+def bench_interpret(source: str):
+    return lambda: interpret_source(source)
+
+
+def bench_prove(goals: list[Inference]):
+    def run():
+        search = ProofSearch()  # without the subgoals memoized by the previous runs
+        for goal in goals:
+            search.prove(goal)
+
+    return run
+
+
+def benchmarks() -> dict:
+    """Returns the functions creating each benchmark, which return the function to time"""
+    examples = "\n\n".join(example_sources())
+    formulas, justifications = proof_parts([examples])
+    return {
+        "parse_formula": lambda: bench_parse_formulas(formulas * 20),
+        "parse_formula_large": lambda: bench_parse_formulas([large_formula_text(2000, offset) for offset in range(5)]),
+        "expression_cached": lambda: bench_parse_expressions(formulas * 20),
+        "justification_from_str": lambda: bench_justifications(justifications * 20),
+        "proof_add_line": lambda: bench_add_lines(20000),
+        "theorem_application_verify": lambda: bench_theorem_applications(5000),
+        "truth_tables_20_propositions": lambda: bench_truth_tables(
+            [large_formula_text(20)] + [theorem_formula_text(20 * index + 19) for index in range(20)]
+        ),
+        "render_text": lambda: bench_render(long_proof(5000), latex=False),
+        "render_latex": lambda: bench_render(long_proof(5000), latex=True),
+        "interpret_examples": lambda: bench_interpret(examples),
+        "interpret_long_proof": lambda: bench_interpret(long_proof(5000)),
+        "interpret_nested_proof": lambda: bench_interpret(nested_proof(200)),
+        "interpret_large_formula": lambda: bench_interpret(large_formula_proofs(2000, 5)),
+        "interpret_many_theorems": lambda: bench_interpret(many_theorems(1000)),
+        "interpret_apply_heavy": lambda: bench_interpret(apply_heavy(1000)),
+        "prove_examples": lambda: bench_prove(example_goals()),
+    }
+
+
+def time_benchmark(run, repeat: int) -> list[float]:
+    run()  # warm up
+    times = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return times
+
+
+def revision() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIRECTORY, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def baseline_path(name: str) -> Path:
+    if name.endswith(".json"):
+        return Path(name)
+    return BASELINES_DIRECTORY / f"{name}.json"
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Prints the ratio of each median time to the baseline, returning the names of the regressions"""
+    regressions = []
+    print(f"\ncompared with the baseline of revision {baseline.get('revision')} ({baseline.get('python')}):")
+    for name, result in results.items():
+        baseline_result = baseline["benchmarks"].get(name)
+        if baseline_result is None:
+            print(f"{name:<28} no baseline")
+            continue
+        ratio = result["median"] / baseline_result["median"]
+        status = ""
+        if ratio > 1 + threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        baseline_time, current_time = baseline_result["median"] * 1000, result["median"] * 1000
+        print(f"{name:<28} {baseline_time:10.2f} ms -> {current_time:10.2f} ms  x{ratio:.2f}  {status}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Fitch interpreter, and compare with a baseline")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help=f"timed runs (default {DEFAULT_REPEAT})")
+    parser.add_argument("--filter", help="only run the benchmarks whose name contains the text given")
+    parser.add_argument("--save", help="save the results as the baseline with the name given", metavar="NAME")
+    parser.add_argument("--compare", help="compare the results with the baseline with the name given", metavar="NAME")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"slowdown ratio above which a benchmark is a regression (default {DEFAULT_THRESHOLD})",
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare is not None:
+        with open(baseline_path(args.compare), "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    results = {}
+    for name, create_benchmark in benchmarks().items():
+        if args.filter is not None and args.filter not in name:
+            continue
+        times = time_benchmark(create_benchmark(), args.repeat)
+        results[name] = {"median": statistics.median(times), "min": min(times)}
+        print(f"{name:<28} median {results[name]['median'] * 1000:10.2f} ms   min {min(times) * 1000:10.2f} ms")
+
+    if args.save is not None:
+        path = baseline_path(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"revision": revision(), "python": platform.python_version(), "benchmarks": results}, file, indent=2
+            )
+        print(f"\nbaseline saved to {path}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if len(regressions) != 0:
+            print(f"FAILED: {len(regressions)} regression(s) above the threshold of {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Generators of synthetic proof files, for the stress cases missing from the examples.
+
+Usage: python -m benchmarks.generators DIRECTORY
+
+Writes one file per generator, with its default size, to the directory given (to try them with src/fitch_cli.py).
+"""
+
+from pathlib import Path
+import argparse
+
+INDENTATION = " " * 4
+PROPOSITIONS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def proof_lines(goal: str, steps: list[tuple[int, str, str]]) -> list[str]:
+    """Returns the lines of a proof, given its goal and its steps as (subproof depth, formula, justification)"""
+    lines = [f"proof {goal}"]
+    for line_number, (depth, formula, justification) in enumerate(steps, start=1):
+        lines.append(f"{INDENTATION * (depth + 1)}{line_number}. {formula} by {justification}")
+    return lines
+
+
+def join_proofs(proofs: list[list[str]], header: list[str] = ()) -> str:
+    lines = list(header)
+    for proof in proofs:
+        if len(lines) != 0:
+            lines += ["", ""]
+        lines += proof
+    return "\n".join(lines) + "\n"
+
+
+def long_proof(length: int = 5000) -> str:
+    """A single proof of about length lines, alternating conjunction introductions and eliminations"""
+    steps = [(0, "A", "Premise")]
+    while len(steps) < length - 1:
+        steps.append((0, "A & A", f"&I {len(steps)}, {len(steps)}"))
+        steps.append((0, "A", f"&E {len(steps)}"))
+    return join_proofs([proof_lines("A |- A", steps)])
+
+
+def nested_proof(depth: int = 200) -> str:
+    """A proof of A -> (A -> ... (A -> A)), with depth nested subproofs"""
+    steps = [(level, "A", "Assumption") for level in range(1, depth + 1)]
+    steps.append((depth, "A", f"R {depth}"))
+    formula = "A"
+    for level in range(depth, 0, -1):
+        formula = f"A -> ({formula})" if formula != "A" else "A -> A"
+        steps.append((level - 1, formula, f"->I {level}-{len(steps)}"))
+    return join_proofs([proof_lines(f"|- {formula}", steps)])
+
+
+def large_formula_text(leaf_count: int, offset: int = 0) -> str:
+    """A balanced formula with leaf_count propositions, using every connective"""
+    if leaf_count == 1:
+        return PROPOSITIONS[offset % len(PROPOSITIONS)]
+    left_count = leaf_count // 2
+    connective = ("&", "v", "->", "<->")[(leaf_count + offset) % 4]
+    left = large_formula_text(left_count, offset)
+    right = large_formula_text(leaf_count - left_count, offset + left_count)
+    negation = "~" if (leaf_count + offset) % 3 == 0 else ""
+    return f"{negation}({left} {connective} {right})"
+
+
+def large_formula_proofs(leaf_count: int = 2000, proof_count: int = 10) -> str:
+    """Short proofs about formulas with leaf_count propositions"""
+    proofs = []
+    for offset in range(proof_count):
+        formula = large_formula_text(leaf_count, offset)
+        steps = [
+            (0, formula, "Premise"),
+            (0, f"({formula}) & ({formula})", "&I 1, 1"),
+            (0, formula, "&E 2"),
+            (0, f"({formula}) v Z", "vI 3"),
+        ]
+        proofs.append(proof_lines(f"{formula} |- ({formula}) v Z", steps))
+    return join_proofs(proofs)
+
+
+def theorem_formula_text(index: int) -> str:
+    """A formula whose shape is different for each index: a chain of conjunctions and disjunctions of 1 to 20
+    distinct propositions"""
+    length = index % 20 + 1
+    connectives = index // 20
+    formula = PROPOSITIONS[0]
+    for position in range(1, length):
+        connective = "&" if (connectives >> (position - 1)) & 1 == 0 else "v"
+        formula = f"({formula} {connective} {PROPOSITIONS[position]})"
+    return formula
+
+
+def many_theorems(count: int = 2000) -> str:
+    """count proofs of different theorems (distinct up to the names of their propositions)"""
+    proofs = []
+    for index in range(count):
+        formula = theorem_formula_text(index)
+        steps = [(0, formula, "Premise"), (0, f"{formula} v Z", "vI 1")]
+        proofs.append(proof_lines(f"{formula} |- {formula} v Z", steps))
+    return join_proofs(proofs)
+
+
+def apply_heavy(count: int = 1000) -> str:
+    """Three theorems, then a proof applying them 3 * count times, with and without the inference given"""
+    theorems = [
+        proof_lines("A |- A v B", [(0, "A", "Premise"), (0, "A v B", "vI 1")]),
+        proof_lines("A & B |- A", [(0, "A & B", "Premise"), (0, "A", "&E 1")]),
+        proof_lines("A, B |- A & B", [(0, "A", "Premise"), (0, "B", "Premise"), (0, "A & B", "&I 1, 2")]),
+    ]
+    steps = [(0, "P", "Premise"), (0, "Q", "Premise")]
+    for _ in range(count):
+        steps.append((0, "P & Q", "apply 1, 2"))
+        steps.append((0, "P", f"apply A & B |- A {len(steps)}"))
+        steps.append((0, "P v Q", f"apply {len(steps)}"))
+    return join_proofs(theorems + [proof_lines("P, Q |- P v Q", steps)])
+
+
+GENERATORS = {
+    "long_proof": long_proof,
+    "nested_proof": nested_proof,
+    "large_formula": large_formula_proofs,
+    "many_theorems": many_theorems,
+    "apply_heavy": apply_heavy,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the synthetic proof files used by the benchmarks")
+    parser.add_argument("directory", help="the directory to write the files to")
+    args = parser.parse_args()
+
+    directory = Path(args.directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, generator in GENERATORS.items():
+        path = directory / f"{name}.ftc"
+        path.write_text(generator(), encoding="utf-8")
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
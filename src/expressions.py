@@ -1,153 +1,362 @@
-from lark import Lark, Tree
+from lark import Lark, Transformer, Tree
+from lark.exceptions import UnexpectedInput
+from collections import OrderedDict
+from weakref import WeakValueDictionary
+import re
+
+
+class Formula:
+    """Base class of the formula nodes.
+
+    Nodes are interned: building a node structurally equal to an existing one returns the existing object, so two
+    formulas are equal exactly when they are the same object. The hash is computed when the node is built, while the
+    string forms and the proposition set are computed on first use and then kept on the node.
+    """
+
+    __slots__ = ("_hash", "_str", "_latex", "_propositions", "__weakref__")
+    _interned = WeakValueDictionary()
+
+    def __new__(cls, *args):
+        key = (cls, *args)
+        node = Formula._interned.get(key)
+        if node is None:
+            node = super().__new__(cls)
+            node._set_children(*args)
+            node._hash = hash(key)
+            node._str = None
+            node._latex = None
+            node._propositions = None
+            Formula._interned[key] = node
+        return node
+
+    def _set_children(self, *args):
+        pass
+
+    def _children_args(self) -> tuple:
+        return ()
+
+    def _make_str(self) -> str:
+        raise NotImplementedError
+
+    def _make_latex(self) -> str:
+        raise NotImplementedError
+
+    def _make_propositions(self) -> frozenset[str]:
+        return frozenset()
+
+    def __reduce__(self):
+        # The nodes are pickled as a flat list rather than nested, so that pickling a deep formula doesn't recurse
+        return formula_from_postorder, (self._postorder(),)
+
+    def _postorder(self) -> list[tuple]:
+        """Returns the distinct nodes of the formula, subformulas first, each as its class and the arguments building
+        it, a subformula being given by its index in the list"""
+        indexes = {}  # node -> index in the list
+        nodes = []
+        stack = [self]
+        while len(stack) != 0:
+            node = stack[-1]
+            if node in indexes:  # a subformula shared by both sides
+                stack.pop()
+                continue
+            subformulas = [
+                child for child in node._children_args() if isinstance(child, Formula) and child not in indexes
+            ]
+            if len(subformulas) != 0:
+                stack += subformulas
+                continue
+            stack.pop()
+            indexes[node] = len(nodes)
+            arguments = (indexes[child] if isinstance(child, Formula) else child for child in node._children_args())
+            nodes.append((node.__class__, *arguments))
+        return nodes
 
+    def __hash__(self) -> int:
+        return self._hash
+
+    def _compute(self, attribute: str, make: str) -> None:
+        """Computes an attribute kept on the nodes (e.g. _str) with their method make, the subformulas first,
+        iteratively so that the depth of the formulas isn't limited by the depth of the Python stack"""
+        stack = [self]
+        while len(stack) != 0:
+            node = stack[-1]
+            subformulas = [
+                child
+                for child in node._children_args()
+                if isinstance(child, Formula) and getattr(child, attribute) is None
+            ]
+            if len(subformulas) != 0:
+                stack += subformulas
+                continue
+            stack.pop()
+            if getattr(node, attribute) is None:  # a subformula shared by both sides may already be computed
+                setattr(node, attribute, getattr(node, make)())
+
+    def __str__(self) -> str:
+        if self._str is None:
+            self._compute("_str", "_make_str")
+        return self._str
+
+    def latex(self) -> str:
+        if self._latex is None:
+            self._compute("_latex", "_make_latex")
+        return self._latex
+
+    def propositions(self) -> frozenset[str]:
+        if self._propositions is None:
+            self._compute("_propositions", "_make_propositions")
+        return self._propositions
 
-class Proposition:
-    def __init__(self, name: str):
+
+class Proposition(Formula):
+    __slots__ = ("name",)
+
+    def _set_children(self, name: str):
         self.name = name
 
-    def __str__(self) -> str:
-        return self.name
+    def _children_args(self) -> tuple:
+        return (self.name,)
 
-    def __eq__(self, other) -> bool:
-        if isinstance(other, Proposition):
-            return self.name == other.name
-        return False
+    def _make_str(self) -> str:
+        return self.name
 
-    def latex(self) -> str:
+    def _make_latex(self) -> str:
         return self.name
 
-    def propositions(self) -> set[str]:
-        return {self.name}
+    def _make_propositions(self) -> frozenset[str]:
+        return frozenset((self.name,))
 
 
-class Top:
-    def __str__(self) -> str:
-        return "⊤"
+class Top(Formula):
+    __slots__ = ()
 
-    def __eq__(self, other):
-        return isinstance(other, Top)
+    def _make_str(self) -> str:
+        return "⊤"
 
-    def latex(self) -> str:
+    def _make_latex(self) -> str:
         return r"\top"
 
-    def propositions(self) -> set[str]:
-        return set()
 
+class Bottom(Formula):
+    __slots__ = ()
 
-class Bottom:
-    def __str__(self) -> str:
+    def _make_str(self) -> str:
         return "⊥"
 
-    def __eq__(self, other):
-        return isinstance(other, Bottom)
-
-    def latex(self) -> str:
+    def _make_latex(self) -> str:
         return r"\bot"
 
-    def propositions(self) -> set[str]:
-        return set()
 
+class Not(Formula):
+    __slots__ = ("a",)
 
-class Not:
-    def __init__(self, a):
+    def _set_children(self, a: Formula):
         self.a = a
 
-    def __str__(self):
-        return f"¬{self.a}"
+    def _children_args(self) -> tuple:
+        return (self.a,)
 
-    def __eq__(self, other) -> bool:
-        if isinstance(other, Not):
-            return self.a == other.a
-        return False
+    def _make_str(self) -> str:
+        return f"¬{self.a}"
 
-    def latex(self) -> str:
+    def _make_latex(self) -> str:
         return r"\neg " + self.a.latex()
 
-    def propositions(self) -> set[str]:
+    def _make_propositions(self) -> frozenset[str]:
         return self.a.propositions()
 
 
-class And:
-    def __init__(self, a, b):
-        self.a = a
-        self.b = b
-
-    def __str__(self) -> str:
-        return f"({self.a} ∧ {self.b})"
-
-    def __eq__(self, other) -> bool:
-        if isinstance(other, And):
-            return self.a == other.a and self.b == other.b
-        return False
+class BinaryConnective(Formula):
+    __slots__ = ("a", "b")
+    SYMBOL: str = None
+    LATEX_SYMBOL: str = None
 
-    def latex(self) -> str:
-        return "(" + self.a.latex() + r" \land " + self.b.latex() + ")"
-
-    def propositions(self) -> set[str]:
-        return self.a.propositions().union(self.b.propositions())
-
-
-class Or:
-    def __init__(self, a, b):
+    def _set_children(self, a: Formula, b: Formula):
         self.a = a
         self.b = b
 
-    def __str__(self) -> str:
-        return f"({self.a} ∨ {self.b})"
+    def _children_args(self) -> tuple:
+        return (self.a, self.b)
 
-    def __eq__(self, other) -> bool:
-        if isinstance(other, Or):
-            return self.a == other.a and self.b == other.b
-        return False
+    def _make_str(self) -> str:
+        return f"({self.a} {self.SYMBOL} {self.b})"
 
-    def latex(self) -> str:
-        return "(" + self.a.latex() + r" \lor " + self.b.latex() + ")"
+    def _make_latex(self) -> str:
+        return "(" + self.a.latex() + f" {self.LATEX_SYMBOL} " + self.b.latex() + ")"
 
-    def propositions(self) -> set[str]:
-        return self.a.propositions().union(self.b.propositions())
+    def _make_propositions(self) -> frozenset[str]:
+        return self.a.propositions() | self.b.propositions()
 
 
-class Conditional:
-    def __init__(self, a, b):
-        self.a = a
-        self.b = b
+class And(BinaryConnective):
+    __slots__ = ()
+    SYMBOL = "∧"
+    LATEX_SYMBOL = r"\land"
 
-    def __str__(self) -> str:
-        return f"({self.a} → {self.b})"
 
-    def __eq__(self, other) -> bool:
-        if isinstance(other, Conditional):
-            return self.a == other.a and self.b == other.b
-        return False
+class Or(BinaryConnective):
+    __slots__ = ()
+    SYMBOL = "∨"
+    LATEX_SYMBOL = r"\lor"
 
-    def latex(self) -> str:
-        return "(" + self.a.latex() + r" \to " + self.b.latex() + ")"
 
-    def propositions(self) -> set[str]:
-        return self.a.propositions().union(self.b.propositions())
+class Conditional(BinaryConnective):
+    __slots__ = ()
+    SYMBOL = "→"
+    LATEX_SYMBOL = r"\to"
 
 
-class BiConditional:
-    def __init__(self, a, b):
-        self.a = a
-        self.b = b
+class BiConditional(BinaryConnective):
+    __slots__ = ()
+    SYMBOL = "↔"
+    LATEX_SYMBOL = r"\leftrightarrow"
 
-    def __str__(self) -> str:
-        return f"({self.a} ↔ {self.b})"
-
-    def __eq__(self, other) -> bool:
-        if isinstance(other, BiConditional):
-            return self.a == other.a and self.b == other.b
-        return False
 
-    def latex(self) -> str:
-        return "(" + self.a.latex() + r" \leftrightarrow " + self.b.latex() + ")"
+def formula_from_postorder(nodes: list[tuple]) -> Formula:
+    # Unpickling goes through __new__ again, so the nodes are interned in the receiving process
+    formulas = []
+    for node_class, *arguments in nodes:
+        formulas.append(node_class(*(formulas[arg] if isinstance(arg, int) else arg for arg in arguments)))
+    return formulas[-1]
 
-    def propositions(self) -> set[str]:
-        return self.a.propositions().union(self.b.propositions())
 
+class FormulaSyntaxError(ValueError):
+    def __init__(self, message: str, line: int, column: int):
+        self.message = message
+        self.line = line
+        self.column = column
 
-def interpret_expr_tree(tree: Tree) -> Proposition | Not | Or | And | Conditional | BiConditional:
+    def __str__(self) -> str:
+        return f"{self.message} at line {self.line}, column {self.column}"
+
+
+# Token kinds, numbered like the groups of the regex below (INVALID marks a character that starts no token)
+INVALID = 0
+IFF, IMPLIES, OR, AND, NOT, LPAR, RPAR, TOP, BOTTOM, PROP = range(1, 11)
+FORMULA_TOKEN_REGEX = re.compile(
+    r"[ \t\f\r\n]*(?:(<->|↔)|(->|→)|(v|∨)|(&|∧)|(~|¬)|(\()|(\))|(⊤|True|true)|(⊥|False|false)|([A-Z]))"
+)
+WHITESPACE_REGEX = re.compile(r"[ \t\f\r\n]*")
+
+# Left and right binding powers of the binary connectives: ↔ and → are right associative, ∨ and ∧ left associative
+BINDING_POWERS = {
+    IFF: (10, 10, BiConditional),
+    IMPLIES: (20, 20, Conditional),
+    OR: (30, 31, Or),
+    AND: (40, 41, And),
+}
+
+
+def formula_syntax_error(text: str, message: str, position: int) -> FormulaSyntaxError:
+    line = text.count("\n", 0, position) + 1
+    column = position - text.rfind("\n", 0, position)  # 1-based, like Lark
+    return FormulaSyntaxError(message, line, column)
+
+
+def tokenize_formula(text: str) -> tuple[list[int], list[int]]:
+    """Returns the kinds and the start positions of the tokens in the text, up to the first invalid character"""
+    kinds = []
+    positions = []
+    position = 0
+    match = FORMULA_TOKEN_REGEX.match
+    while True:
+        token_match = match(text, position)
+        if token_match is None:
+            position = WHITESPACE_REGEX.match(text, position).end()
+            if position != len(text):
+                # The error is only raised if the parser reaches this token, as Lark lexes the input lazily
+                kinds.append(INVALID)
+                positions.append(position)
+            return kinds, positions
+        kind = token_match.lastindex
+        kinds.append(kind)
+        positions.append(token_match.start(kind))
+        position = token_match.end()
+
+
+def parse_formula(text: str) -> Formula:
+    """Parses a formula with a Pratt parser, which reports errors at the same positions as the Lark LALR parser"""
+    kinds, positions = tokenize_formula(text)
+    token_count = len(kinds)
+    index = 0
+
+    def unexpected_token() -> FormulaSyntaxError:
+        if index == token_count:  # like Lark, the end of the input is reported at the last token
+            return formula_syntax_error(text, "unexpected end of input", positions[-1] if positions else 0)
+        token_start = positions[index]
+        if kinds[index] == INVALID:
+            return formula_syntax_error(text, f"unexpected character '{text[token_start]}'", token_start)
+        token_end = FORMULA_TOKEN_REGEX.match(text, token_start).end()
+        return formula_syntax_error(text, f"unexpected token '{text[token_start:token_end]}'", token_start)
+
+    def parse_operand() -> Formula:
+        nonlocal index
+        if index == token_count:
+            raise unexpected_token()
+        kind = kinds[index]
+        if kind == PROP:
+            index += 1
+            return Proposition(text[positions[index - 1]])
+        elif kind == NOT:
+            index += 1
+            return Not(parse_operand())  # negation binds tighter than any binary connective
+        elif kind == LPAR:
+            index += 1
+            inner_formula = parse_expression(0)
+            if index == token_count or kinds[index] != RPAR:
+                raise unexpected_token()
+            index += 1
+            return inner_formula
+        elif kind == TOP:
+            index += 1
+            return Top()
+        elif kind == BOTTOM:
+            index += 1
+            return Bottom()
+        raise unexpected_token()
+
+    def parse_expression(min_binding_power: int) -> Formula:
+        nonlocal index
+        left = parse_operand()
+        while index < token_count:
+            binding_power = BINDING_POWERS.get(kinds[index])
+            if binding_power is None or binding_power[0] < min_binding_power:
+                break
+            index += 1
+            left = binding_power[2](left, parse_expression(binding_power[1]))
+        return left
+
+    formula = parse_expression(0)
+    if index != token_count:
+        raise unexpected_token()
+    return formula
+
+
+def substitute(formula: Formula, bindings: dict[str, Formula]) -> Formula:
+    """Replaces the propositions of the formula by the formulas they are bound to (unbound ones are kept)"""
+    if formula.__class__ is Proposition:
+        return bindings.get(formula.name, formula)
+    if isinstance(formula, BinaryConnective):
+        return formula.__class__(substitute(formula.a, bindings), substitute(formula.b, bindings))
+    if formula.__class__ is Not:
+        return Not(substitute(formula.a, bindings))
+    return formula
+
+
+def propositions_in_order(formula: Formula, found: dict[str, None]):
+    """Adds the propositions of the formula to the dict given (used as an ordered set), from left to right"""
+    stack = [formula]
+    while len(stack) != 0:
+        formula = stack.pop()
+        if formula.__class__ is Proposition:
+            found.setdefault(formula.name)
+        elif isinstance(formula, BinaryConnective):
+            stack += (formula.b, formula.a)
+        elif formula.__class__ is Not:
+            stack.append(formula.a)
+
+
+def interpret_expr_tree(tree: Tree) -> Formula:
     match tree.data:
         case "start":
             return interpret_expr_tree(tree.children[0])
@@ -171,8 +380,118 @@ def interpret_expr_tree(tree: Tree) -> Proposition | Not | Or | And | Conditiona
             return interpret_expr_tree(tree.children[0])
 
 
+class ExpressionTransformer(Transformer):
+    """Builds the formula nodes directly while the LALR parser reduces the input"""
+
+    def proposition(self, children) -> Proposition:
+        return Proposition(str(children[0]))
+
+    def top(self, children) -> Top:
+        return Top()
+
+    def bottom(self, children) -> Bottom:
+        return Bottom()
+
+    def not_(self, children) -> Not:
+        return Not(children[0])
+
+    def and_(self, children) -> And:
+        return And(children[0], children[1])
+
+    def or_(self, children) -> Or:
+        return Or(children[0], children[1])
+
+    def implies(self, children) -> Conditional:
+        return Conditional(children[0], children[1])
+
+    def iff(self, children) -> BiConditional:
+        return BiConditional(children[0], children[1])
+
+
+class ParseCache:
+    """Least recently used cache mapping formula source text to its parsed node, shared by the whole process"""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.enabled = True
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str, parse) -> Formula:
+        """Returns the node for the text given, calling parse(text) only if it isn't cached"""
+        if not self.enabled or self.maxsize <= 0:
+            return parse(text)
+
+        node = self.entries.get(text)
+        if node is None:
+            self.misses += 1
+            node = parse(text)
+            self.entries[text] = node
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)  # evict the least recently used entry
+        else:
+            self.hits += 1
+            self.entries.move_to_end(text)
+        return node
+
+    def resize(self, maxsize: int):
+        self.maxsize = maxsize
+        while len(self.entries) > max(maxsize, 0):
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups != 0 else 0.0,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+        }
+
+
 class Expression:
+    # Operators by increasing precedence: ↔, →, ∨, ∧, ¬ (↔ and → are right associative, ∨ and ∧ left associative)
     grammar = r"""
+?start: iff
+
+?iff: implies
+    | implies ("↔" | "<->") iff          -> iff
+
+?implies: or_
+        | or_ ("→" | "->") implies       -> implies
+
+?or_: and_
+    | or_ ("∨" | "v") and_               -> or_
+
+?and_: not_
+     | and_ ("&" | "∧") not_             -> and_
+
+?not_: atom
+     | ("~" | "¬") not_                  -> not_
+
+?atom: PROP                              -> proposition
+     | TOP                               -> top
+     | BOTTOM                            -> bottom
+     | "(" iff ")"
+
+PROP: UCASE_LETTER
+TOP: "⊤" | "true" | "True"
+BOTTOM: "⊥" | "false" | "False"
+
+%import common.UCASE_LETTER
+%import common.WS
+%ignore WS
+"""
+
+    # Original ambiguous grammar, kept as a reference for the Earley parser
+    earley_grammar = r"""
 start: formula
 PROP: UCASE_LETTER
 TOP: "⊤" | "true" | "True"
@@ -192,10 +511,33 @@ formula: PROP                              -> proposition
 %import common.WS
 %ignore WS
 """
-    parser = Lark(grammar)
+    backend = "pratt"  # "pratt" (default), or one of the Lark reference parsers: "lalr" or "earley"
+    lalr_parser = None  # the Lark parsers are only built when first needed
+    earley_parser = None
+    parse_cache = ParseCache()  # only used by the default parser
+
+    __slots__ = ("expr",)
 
     def __init__(self, expr: str):
-        self.expr = interpret_expr_tree(self.parser.parse(expr))
+        if self.backend == "pratt":
+            self.expr = self.parse_cache.get(expr, parse_formula)
+        else:
+            self.expr = self.parse_with_lark(expr, self.backend)
+
+    @classmethod
+    def parse_with_lark(cls, expr: str, backend: str) -> Formula:
+        try:
+            if backend == "lalr":
+                if cls.lalr_parser is None:
+                    cls.lalr_parser = Lark(cls.grammar, parser="lalr", transformer=ExpressionTransformer(), cache=True)
+                return cls.lalr_parser.parse(expr)
+            elif backend == "earley":
+                if cls.earley_parser is None:
+                    cls.earley_parser = Lark(cls.earley_grammar)
+                return interpret_expr_tree(cls.earley_parser.parse(expr))
+        except UnexpectedInput as e:
+            raise FormulaSyntaxError(f"unexpected input for the {backend} parser", e.line, e.column) from e
+        raise ValueError(f"unknown parser backend '{backend}'")
 
     def __str__(self) -> str:
         string_representation = str(self.expr)
@@ -205,10 +547,10 @@ formula: PROP                              -> proposition
             return string_representation
 
     def __eq__(self, other) -> bool:
-        return self.expr == other.expr
+        return self.expr is other.expr
 
     def __hash__(self) -> int:
-        return hash(str(self))
+        return hash(self.expr)
 
     def latex(self) -> str:
         latex_expr = self.expr.latex()
@@ -232,7 +574,7 @@ formula: PROP                              -> proposition
     def is_biconditional(self):
         return isinstance(self.expr, BiConditional)
 
-    def propositions(self) -> set[str]:
+    def propositions(self) -> frozenset[str]:
         return self.expr.propositions()
 
 
@@ -253,11 +595,48 @@ class Inference:
     def latex(self) -> str:
         return ", ".join([premise.latex() for premise in self.premises]) + r" \vdash " + self.conclusion.latex()
 
+    def formulas(self) -> tuple[Formula, ...]:
+        return tuple(premise.expr for premise in self.premises) + (self.conclusion.expr,)
+
+    def canonical_key(self) -> tuple[Formula, ...]:
+        """Premises and conclusion with the propositions renamed in order of first occurrence (A, B, C...),
+        so that two inferences equal up to the names of their propositions have the same key"""
+        formulas = self.formulas()
+        found = {}
+        for formula in formulas:
+            propositions_in_order(formula, found)
+        renaming = {name: Proposition(chr(ord("A") + index)) for index, name in enumerate(found)}
+        return tuple(substitute(formula, renaming) for formula in formulas)
+
+
+class InferenceSyntaxError(ValueError):
+    pass
+
 
+TURNSTILE_REGEX = re.compile(r"\|-|⊢")
+
+
+def inference_from_str(inference_str: str) -> Inference:
+    """Splits the inference on its turnstile and on the commas between premises, in linear time"""
+    inference_parts = TURNSTILE_REGEX.split(inference_str)
+    if len(inference_parts) != 2:
+        raise InferenceSyntaxError(f"expected exactly one turnstile in inference '{inference_str}'")
+    premises_part, conclusion_part = inference_parts
+    if "," in conclusion_part:
+        raise InferenceSyntaxError(f"expected a single conclusion in inference '{inference_str}'")
+
+    if premises_part.strip() == "":
+        premises_found = []
+    else:
+        premises_found = [Expression(premise) for premise in premises_part.split(",")]
+    return Inference(premises=premises_found, conclusion=Expression(conclusion_part))
+
+
+# Lark grammar of inferences, kept as a reference for inference_from_str
 inference_grammar = r"""
 start: inference
 
-FORMULA: /[^","]+/
+FORMULA: /[^,|⊢]+/
 
 premise: FORMULA
 conclusion: FORMULA
@@ -268,10 +647,14 @@ inference: ("|-" | "⊢") conclusion
 %ignore WS
 """
 
-inference_parser = Lark(inference_grammar, lexer="dynamic_complete")
+inference_parser = None  # only built when first needed
 
 
-def inference_from_str(inference_str: str) -> Inference:
+def lark_inference_from_str(inference_str: str) -> Inference:
+    global inference_parser
+    if inference_parser is None:
+        inference_parser = Lark(inference_grammar, parser="lalr", cache=True)
+
     parsed_tree = inference_parser.parse(inference_str)
     working_tree = parsed_tree
     premises_found = []
@@ -0,0 +1,60 @@
+from fitch_interpreter import *
+
+SOURCE_FILE_NAME = "<string>"  # name of a source verified without a file name, in the errors
+
+
+class VerificationResult:
+    def __init__(self, interpreter: FitchInterpreter, error: FitchError | None):
+        self.file_name = interpreter.file_name
+        self.proofs = interpreter.proofs_list  # the proofs verified, in order (all of them if there is no error)
+        self.imported_proofs = interpreter.imported_proofs_list
+        self.error = error  # the first error found
+        self.success = error is None
+        self.interpreter = interpreter
+
+    def goals(self) -> list[Inference]:
+        return [proof.goal for proof in self.proofs]
+
+    def latex(self) -> str:
+        """Returns a LaTeX document with all the proofs verified"""
+        return self.interpreter.generate_latex_document()
+
+
+def verify_source(
+    source: str | Iterable[str],
+    file_name=SOURCE_FILE_NAME,
+    import_resolver=None,
+    module_registry: ModuleRegistry = None,
+    verification_cache: VerificationCache = None,
+) -> VerificationResult:
+    """Verifies the proofs of a source (a string, or an iterable of lines), without reading it from a file.
+
+    The imports are found by the import resolver given, by default relative to the directory of file_name (the working
+    directory if it is not given). A module registry shared between calls only interprets each imported file once."""
+    interpreter = FitchInterpreter(
+        file_name,
+        module_registry,
+        verification_cache,
+        source=source,
+        import_resolver=import_resolver,
+    )
+    return verify(interpreter)
+
+
+def verify_file(
+    file_name,
+    import_resolver=None,
+    module_registry: ModuleRegistry = None,
+    verification_cache: VerificationCache = None,
+) -> VerificationResult:
+    interpreter = FitchInterpreter(file_name, module_registry, verification_cache, import_resolver=import_resolver)
+    return verify(interpreter)
+
+
+def verify(interpreter: FitchInterpreter) -> VerificationResult:
+    try:
+        for _ in interpreter.interpret_code(output=False):
+            pass
+    except FitchError as e:
+        return VerificationResult(interpreter, e)
+    return VerificationResult(interpreter, None)
@@ -0,0 +1,180 @@
+from fitch_proof import *
+from fitch_theorems import *
+from pathlib import Path
+import hashlib
+import os
+import pickle
+import tempfile
+
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024  # bytes
+CACHE_FILE_SUFFIX = ".proof"
+
+
+def default_cache_directory() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "fitch"
+
+
+class VerificationCache:
+    """On-disk cache of verified proofs, content-addressed by the proof text, the rules version and the theorems the
+    proof may apply. The least recently used entries are evicted once the cache is larger than its size cap.
+
+    The entries are pickled, and unpickling runs code: a directory which other users can write to (not owned by the
+    user, or writable by its group or by everyone) is never read nor written."""
+
+    def __init__(self, directory: Path = None, max_size: int = DEFAULT_CACHE_SIZE):
+        self.directory = Path(directory) if directory is not None else default_cache_directory()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.stored_size = 0  # bytes written since the last prune
+        self.safe = None  # whether the directory can only be written by the user, checked on first use
+
+    def is_safe(self) -> bool:
+        if self.safe is None:
+            try:
+                self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+                stat = self.directory.stat()
+            except OSError:
+                self.safe = False
+                return False
+            owned = not hasattr(os, "getuid") or stat.st_uid == os.getuid()
+            self.safe = owned and stat.st_mode & 0o022 == 0
+        return self.safe
+
+    def key(self, proof_str: str, theorems_digest: int) -> str:
+        """Returns the key of a proof verified with the theorems of the digest given (see TheoremIndex.digest)"""
+        key_source = f"{RULES_VERSION}\n{theorems_digest:032x}\n{proof_str}"
+        return hashlib.sha256(key_source.encode()).hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / (key + CACHE_FILE_SUFFIX)
+
+    def load(self, key: str) -> Proof | None:
+        if not self.is_safe():
+            self.misses += 1
+            return None
+        path = self.entry_path(key)
+        try:
+            with open(path, "rb") as file:
+                proof = pickle.load(file)
+            os.utime(path)  # the modification time records the last use, for the eviction
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:  # corrupted entry, or written by an incompatible version
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return proof
+
+    def store(self, key: str, proof: Proof):
+        if not self.is_safe():
+            return
+        path = self.entry_path(key)
+        temporary_name = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Written to a temporary file first, so that concurrent runs never read a partial entry
+            file_descriptor, temporary_name = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(file_descriptor, "wb") as file:
+                pickle.dump(proof, file, protocol=pickle.HIGHEST_PROTOCOL)
+                self.stored_size += file.tell()
+            os.replace(temporary_name, path)
+        except (OSError, pickle.PicklingError, RecursionError):  # the cache is only an optimisation
+            if temporary_name is not None:
+                Path(temporary_name).unlink(missing_ok=True)
+
+    def entries(self) -> list[Path]:
+        return list(self.directory.glob("*/*" + CACHE_FILE_SUFFIX))
+
+    def prune(self, max_size: int = None):
+        """Removes the least recently used entries until the cache takes at most max_size bytes"""
+        max_size = self.max_size if max_size is None else max_size
+        self.stored_size = 0
+        entries = []
+        total_size = 0
+        for path in self.entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+
+    def prune_after_stores(self):
+        """Prunes the cache if entries were stored since the last prune, as it can only have grown then. Pruning reads
+        the size of every entry, which is not worth it on each run."""
+        if self.stored_size != 0:
+            self.prune()
+
+    def clear(self):
+        self.prune(max_size=0)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups != 0 else 0.0}
+
+
+class ProofMemo:
+    """In-memory results of the verified proofs, kept between the runs of a watch session. A proof is reused while its
+    text is unchanged and the theorems it applies are still proved. A proof leaving out the inference it applies may
+    match any theorem, so it is only reused if the theorems available are all unchanged."""
+
+    def __init__(self):
+        self.entries = {}  # (file, proof text) -> (proof, theorems applied or None, digest of the theorems available)
+        self.rendered_proofs = {}  # id of a proof -> proof (keeping the id in use) and its text rendering
+        self.used_keys = set()  # keys of the entries used since the last prune
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, file_name, proof_str: str, proved_inferences: TheoremIndex) -> Proof | None:
+        key = (str(file_name), proof_str)
+        entry = self.entries.get(key)
+        if entry is not None:
+            proof, theorems_applied, digest = entry
+            if theorems_applied is None:
+                is_valid = digest == proved_inferences.digest
+            else:
+                is_valid = all(theorem in proved_inferences for theorem in theorems_applied)
+            if is_valid:
+                self.used_keys.add(key)
+                self.hits += 1
+                return proof
+        self.misses += 1
+        return None
+
+    def store(self, file_name, proof_str: str, proof: Proof, theorems_digest: int):
+        """Stores a proof verified with the theorems of the digest given"""
+        theorems_applied = []
+        for step in proof.steps:
+            if isinstance(step.justification, TheoremApplication):
+                if step.justification.inferred:
+                    theorems_applied = None
+                    break
+                theorems_applied.append(step.justification.theorem)
+        key = (str(file_name), proof_str)
+        self.entries[key] = (proof, theorems_applied, theorems_digest)
+        self.used_keys.add(key)
+
+    def render(self, proof: Proof) -> str:
+        if id(proof) not in self.rendered_proofs:
+            self.rendered_proofs[id(proof)] = (proof, str(proof))
+        return self.rendered_proofs[id(proof)][1]
+
+    def prune(self):
+        """Removes the entries not used since the last prune, e.g. the previous versions of edited proofs"""
+        self.entries = {key: entry for key, entry in self.entries.items() if key in self.used_keys}
+        proof_ids = {id(proof) for proof, _, _ in self.entries.values()}
+        self.rendered_proofs = {
+            proof_id: rendering for proof_id, rendering in self.rendered_proofs.items() if proof_id in proof_ids
+        }
+        self.used_keys = set()
@@ -1,11 +1,15 @@
 from fitch_interpreter import *
+from fitch_watch import *
 import argparse
+import json
 
 parser = argparse.ArgumentParser(
     description="A small language to write, verify and format Fitch-style proofs in propositional logic"
 )
 
-parser.add_argument("filename", help="the path to the file containing the proofs to interpret")
+parser.add_argument(
+    "filename", help="the path to the file containing the proofs to interpret, or - to read the standard input"
+)
 
 parser.add_argument(
     "-l",
@@ -21,19 +25,163 @@ parser.add_argument(
     help="if used, the output is printed only in case of error in the proof file given",
 )
 
-args = parser.parse_args()
+parser.add_argument(
+    "-j",
+    "--jobs",
+    type=int,
+    default=1,
+    help="the number of processes verifying the proofs of the file in parallel (default 1)",
+    metavar="number",
+)
+
+parser.add_argument(
+    "--no-cache",
+    action="store_true",
+    help="verify every proof again instead of reusing the results cached by previous runs",
+)
+
+parser.add_argument(
+    "--cache-dir",
+    help=f"the directory of the verification cache (default {default_cache_directory()})",
+    metavar="directory",
+)
+
+parser.add_argument(
+    "--cache-size",
+    type=int,
+    default=DEFAULT_CACHE_SIZE // (1024 * 1024),
+    help="the maximum size of the verification cache in megabytes, the least recently used results being evicted "
+    f"first (default {DEFAULT_CACHE_SIZE // (1024 * 1024)})",
+    metavar="megabytes",
+)
+
+parser.add_argument(
+    "--prune-cache",
+    action="store_true",
+    help="remove all the results from the verification cache before interpreting the file",
+)
+
+parser.add_argument(
+    "-w",
+    "--watch",
+    action="store_true",
+    help="interpret the file again each time it, or a file it imports, changes, only verifying the proofs affected",
+)
+
+parser.add_argument(
+    "--interval",
+    type=float,
+    default=DEFAULT_POLL_INTERVAL,
+    help=f"the time between two checks for changes in watch mode, in seconds (default {DEFAULT_POLL_INTERVAL:g})",
+    metavar="seconds",
+)
+
+parser.add_argument(
+    "--profile",
+    help="write a JSON report of the time spent in each phase, rule and proof, and of the cache hit rates, to the "
+    "file path given",
+    metavar="filename",
+)
+
+
+LATEX_PARTIAL_SUFFIX = ".part"  # the LaTeX document is written to this file while verifying the proofs
+
+
+def run_interpreter(interpreter: FitchInterpreter, args) -> bool:
+    """Prints the output of the interpreter, returning whether the file is correct"""
+    latex_file = None
+    succeeded = False
+    try:
+        if args.latex is not None:
+            # The LaTeX document only replaces the file given once all the proofs are verified
+            latex_file = open(args.latex + LATEX_PARTIAL_SUFFIX, "w")
+            latex_writer = LatexWriter(latex_file)
+            latex_writer.begin()
+            interpreter.proof_writers.append(latex_writer)
+
+        # The output is written line by line as each proof is verified, instead of being built first
+        text_writer = TextWriter(sys.stdout, interpreter.proof_memo)
+        interpreter.proof_writers.append(text_writer)
+        for _ in interpreter.interpret_code(output=False):
+            pass
+
+        text_writer.end()
+        if latex_file is not None:
+            latex_writer.end()
+        succeeded = True
+
+    except FitchError as e:
+        print("Error:", str(e))
+
+    except FileNotFoundError as e:
+        if latex_file is None and args.latex is not None and e.filename == args.latex + LATEX_PARTIAL_SUFFIX:
+            print(f'Error: the directory of "{args.latex}" does not exist')
+        else:
+            print(f'Error: file "{args.filename}" does not exist')
+
+    finally:
+        if latex_file is not None:
+            latex_file.close()
+            if succeeded:
+                os.replace(latex_file.name, args.latex)
+            else:
+                os.unlink(latex_file.name)
+
+    return succeeded
+
+
+def write_profile_report(interpreter: FitchInterpreter, file_name):
+    report = interpreter.profiler.report(interpreter.verification_cache, interpreter.proof_memo)
+    with open(file_name, "w") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+
 
-try:
-    interpreter = FitchInterpreter(args.filename)
-    for i in interpreter.interpret_code():
-        print(i)
+# The processes verifying proofs in parallel may import this module again
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.watch and args.filename == STDIN_FILE_NAME:
+        parser.error("the standard input can't be watched")
 
-    if args.latex is not None:
-        with open(args.latex, "w") as file:
-            file.write(interpreter.generate_latex_document())
+    verification_cache = VerificationCache(args.cache_dir, max_size=args.cache_size * 1024 * 1024)
+    if args.prune_cache:
+        verification_cache.clear()
 
-except FitchError as e:
-    print("Error:", str(e))
+    try:
+        if args.watch:
+            watch_session = WatchSession(
+                args.filename,
+                verification_cache=None if args.no_cache else verification_cache,
+                jobs=args.jobs,
+                interval=args.interval,
+            )
+            try:
+                while True:
+                    start_time = time.perf_counter()
+                    interpreter = watch_session.interpreter(Profiler() if args.profile is not None else None)
+                    succeeded = run_interpreter(interpreter, args)
+                    if args.profile is not None:  # the report of the last run
+                        write_profile_report(interpreter, args.profile)
+                    watch_session.end_run(succeeded)
+                    proof_memo = watch_session.proof_memo
+                    print(
+                        f"[{time.strftime('%H:%M:%S')}] {proof_memo.hits} proofs reused, {proof_memo.misses} verified "
+                        f"in {time.perf_counter() - start_time:.2f}s, watching for changes (Ctrl+C to stop)\n"
+                    )
+                    watch_session.wait_for_changes()
+            except KeyboardInterrupt:
+                pass
+        else:
+            interpreter = FitchInterpreter(
+                args.filename,
+                verification_cache=None if args.no_cache else verification_cache,
+                jobs=args.jobs,
+                profiler=Profiler() if args.profile is not None else None,
+                keep_proofs=False,  # the proofs are printed, and written to the LaTeX document, once verified
+            )
+            run_interpreter(interpreter, args)
+            if args.profile is not None:
+                write_profile_report(interpreter, args.profile)
 
-except FileNotFoundError:
-    print(f'Error: file "{args.filename}" does not exist')
+    finally:
+        if not args.no_cache:
+            verification_cache.prune_after_stores()
@@ -0,0 +1,110 @@
+from fitch_interpreter import *
+
+FORMAT_INDENTATION = " " * 4  # indentation of each subproof level
+LEADING_LINE_NUMBER_REGEX = re.compile(r"^(\s*)[0-9]+\.")
+
+
+def split_comment(line: str) -> tuple[str, str]:
+    """Returns the code of a line and its comment (including the comment symbol), without the line ending"""
+    line = line.rstrip("\r\n")
+    comment_start = line.find(COMMENT_SYMBOL)
+    if comment_start == -1:
+        return line, ""
+    return line[:comment_start], line[comment_start:].rstrip()
+
+
+def indentation_actions(lines: list[tuple[int, bool]]) -> list[tuple[bool, int]]:
+    """Returns what the interpreter does with the indentation of each proof line, given as (indentation value, is an
+    assumption): whether an assumption is discharged before the line, and whether an assumption line starts a
+    subproof (1), follows a discharged assumption at the same level (0) or is invalid (-1)"""
+    actions = []
+    previous_indentation_level = 0
+    for index, (indentation_level, is_assumption) in enumerate(lines):
+        discharged = indentation_level < previous_indentation_level and index != 0
+        if is_assumption:
+            if indentation_level > previous_indentation_level:
+                actions.append((discharged, 1))
+            elif indentation_level == previous_indentation_level:
+                actions.append((discharged, 0))
+            else:
+                actions.append((discharged, -1))
+        else:
+            actions.append((discharged, None))
+        previous_indentation_level = indentation_level
+    return actions
+
+
+def format_proof(proof_lines: list[str]) -> list[str]:
+    """Formats the lines of a proof (starting with the proof keyword), renumbering its lines and indenting each of
+    them by its subproof level. The lines are returned unchanged if the proof can't be formatted without changing its
+    meaning."""
+    unchanged_lines = [line.rstrip() for line in proof_lines]
+    header_code, header_comment = split_comment(proof_lines[0])
+    goal = header_code.strip()[len(PROOF_KEYWORD) :].strip()
+    formatted_lines = [" ".join(part for part in (PROOF_KEYWORD, goal, header_comment) if part != "")]
+
+    steps = []  # (index in formatted_lines, indentation value, is an assumption, text)
+    for line in proof_lines[1:]:
+        code, comment = split_comment(line)
+        if code.strip() == "":  # blank line, or comment only
+            formatted_lines.append(line.rstrip())
+            continue
+
+        # The interpreter removes every line number, which must only be the one at the start of the line
+        code_read = remove_line_number(code)
+        if code_read != LEADING_LINE_NUMBER_REGEX.sub(r"\1", code, count=1):
+            return unchanged_lines
+        line_parts = code_read.split(JUSTIFICATION_KEYWORD)
+        if len(line_parts) != 2:
+            return unchanged_lines
+        formula_part, justification_part = line_parts[0].strip(), line_parts[1].strip()
+        try:
+            is_assumption = isinstance(justification_from_str(justification_part), Assumption)
+        except Exception:
+            return unchanged_lines
+
+        text = f"{len(steps) + 1}. {formula_part} {JUSTIFICATION_KEYWORD} {justification_part}"
+        if comment != "":
+            text += "  " + comment
+        steps.append((len(formatted_lines), indentation_value(code_read), is_assumption, text))
+        formatted_lines.append(None)
+
+    # The subproof level of each line, as the interpreter computes it
+    actions = indentation_actions([(indentation_level, assumption) for _, indentation_level, assumption, _ in steps])
+    depth = 0
+    formatted_steps = []
+    for (discharged, assumption_action), (line_index, _, is_assumption, text) in zip(actions, steps):
+        if discharged:
+            depth -= 1
+        if assumption_action == 1:
+            depth += 1
+        if depth < 0 or assumption_action == -1:  # invalid proof, kept as written
+            return unchanged_lines
+        formatted_lines[line_index] = FORMAT_INDENTATION * (depth + 1) + text
+        formatted_steps.append((len(FORMAT_INDENTATION) * (depth + 1), is_assumption))
+
+    if indentation_actions(formatted_steps) != actions:
+        return unchanged_lines
+    return formatted_lines
+
+
+def format_source(source: str) -> str:
+    """Formats the proofs of a source, keeping the import statements, the comments and the blank lines"""
+    formatted_lines = []
+    proof_lines = None  # lines of the proof being read
+    for line in source.splitlines():
+        if split_comment(line)[0].lstrip().startswith(PROOF_KEYWORD):
+            if proof_lines is not None:
+                formatted_lines += format_proof(proof_lines)
+            proof_lines = [line]
+        elif proof_lines is not None:
+            proof_lines.append(line)
+        else:
+            formatted_lines.append(line.rstrip())
+    if proof_lines is not None:
+        formatted_lines += format_proof(proof_lines)
+
+    # Blank lines at the end of the proofs are kept between them, but not at the end of the source
+    while len(formatted_lines) != 0 and formatted_lines[-1] == "":
+        formatted_lines.pop()
+    return "\n".join(formatted_lines) + "\n"
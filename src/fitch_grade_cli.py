@@ -0,0 +1,69 @@
+from fitch_grading import *
+import argparse
+import sys
+
+parser = argparse.ArgumentParser(
+    description="Verify many proof files (e.g. student submissions) at once, and write a table of the results"
+)
+
+parser.add_argument(
+    "submissions",
+    help="a directory containing the files to verify (searched recursively), or a manifest file listing their paths",
+)
+
+parser.add_argument(
+    "-o",
+    "--output",
+    help="write the results to the file path given instead of the standard output",
+    metavar="filename",
+)
+
+parser.add_argument(
+    "-f",
+    "--format",
+    choices=["csv", "json"],
+    help="the format of the results (by default, given by the extension of the output file, or csv)",
+)
+
+parser.add_argument(
+    "-j",
+    "--jobs",
+    type=int,
+    default=None,
+    help="the number of processes verifying submissions (default: the number of processors)",
+    metavar="number",
+)
+
+parser.add_argument(
+    "-t",
+    "--timeout",
+    type=float,
+    default=DEFAULT_TIMEOUT,
+    help=f"the maximum time spent verifying a submission, in seconds (default {DEFAULT_TIMEOUT:g})",
+    metavar="seconds",
+)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    output_format = args.format
+    if output_format is None:
+        output_format = "json" if args.output is not None and args.output.endswith(".json") else "csv"
+    write_results = write_results_json if output_format == "json" else write_results_csv
+
+    try:
+        submissions = submissions_from(args.submissions)
+    except FileNotFoundError:
+        print(f'Error: "{args.submissions}" does not exist', file=sys.stderr)
+        sys.exit(1)
+
+    results = grade_submissions(submissions, jobs=args.jobs, timeout=args.timeout)
+
+    if args.output is not None:
+        with open(args.output, "w", newline="") as file:
+            write_results(results, file)
+    else:
+        write_results(results, sys.stdout)
+
+    passed_count = sum(result.passed() for result in results)
+    print(f"{passed_count}/{len(results)} submissions passed", file=sys.stderr)
@@ -0,0 +1,274 @@
+from fitch_interpreter import *
+from collections import Counter, deque
+from multiprocessing.connection import wait
+import csv
+import json
+import multiprocessing
+import os
+import time
+
+SUBMISSION_SUFFIX = ".ftc"
+DEFAULT_TIMEOUT = 10.0  # seconds
+
+PASSED = "passed"
+FAILED = "failed"
+TIMED_OUT = "timed out"
+NOT_VERIFIED = "not verified"
+
+
+class SubmissionResult:
+    def __init__(
+        self,
+        path: Path,
+        status: str,
+        error: str | None = None,
+        proofs: list[tuple[str, str]] = None,
+        duration: float = 0.0,
+    ):
+        self.path = path
+        self.status = status  # PASSED, FAILED or TIMED_OUT
+        self.error = error  # the first error found
+        self.proofs = proofs if proofs is not None else []  # (goal, status) for each proof of the submission
+        self.duration = duration  # seconds
+
+    def passed(self) -> bool:
+        return self.status == PASSED
+
+
+def submissions_from(source: Path) -> list[Path]:
+    """Returns the submissions in a directory (all the .ftc files in it, recursively), or listed in a manifest file
+    (one path per line, relative to the manifest)"""
+    source = Path(source)
+    if source.is_dir():
+        return sorted(path for path in source.rglob("*" + SUBMISSION_SUFFIX) if path.is_file())
+
+    with open(source, "r") as file:
+        lines = [line.strip() for line in file]
+    return [source.parent / line for line in lines if line != "" and not line.startswith("#")]
+
+
+def read_submission(path: Path) -> tuple[list[str], list[ProofBlock]]:
+    """Returns the lines before the first proof (the import statements) and the proofs of a submission, without
+    interpreting it"""
+    try:
+        scanner = ProofScanner(source_lines(path))
+        header_lines = [line for _, line in scanner.header_lines()]
+        return header_lines, list(scanner.proof_blocks())
+    except (OSError, UnicodeDecodeError):
+        return [], []
+
+
+def imported_paths(path: Path) -> list[Path]:
+    header_lines, _ = read_submission(path)
+    return [
+        (Path(path).parent / line.strip()[len(IMPORT_KEYWORD) :].strip()).resolve()
+        for line in header_lines
+        if line.strip().startswith(IMPORT_KEYWORD)
+    ]
+
+
+def proof_goals(proof_blocks: list[ProofBlock]) -> list[str]:
+    return [proof_block.text.splitlines()[0][len(PROOF_KEYWORD) :].strip() for proof_block in proof_blocks]
+
+
+def preload_shared_imports(submissions: list[Path]) -> ModuleRegistry:
+    """Interprets once the files imported by several submissions, so that the workers start with them"""
+    import_counts = Counter(imported for path in submissions for imported in set(imported_paths(path)))
+    module_registry = ModuleRegistry()
+    importer = FitchInterpreter("<preload>", module_registry)
+    for imported_path, count in import_counts.items():
+        if count < 2 or not imported_path.is_file():
+            continue
+        try:
+            importer.import_file(imported_path)
+        except Exception:  # reported by each submission importing the file
+            pass
+    return module_registry
+
+
+def grade_submission(path: Path, module_registry: ModuleRegistry) -> SubmissionResult:
+    start_time = time.perf_counter()
+    header_lines, proof_blocks = read_submission(path)
+    interpreter = FitchInterpreter(path, module_registry)
+    error = None
+    failed_proof_index = None  # index of the proof where the error was found, if any
+    try:
+        for _ in interpreter.interpret_code(output=False):
+            pass
+    except FitchError as e:
+        error = str(e)
+        if str(e.file) == str(path) and e.line_number > len(header_lines):  # not an import error
+            failed_proof_index = len(interpreter.proofs_list)
+    except FileNotFoundError:
+        error = f'file "{path}" does not exist'
+    except Exception as e:  # a submission must never stop the grading of the others
+        error = f'File "{path}": internal error while verifying the submission ({type(e).__name__}: {e})'
+
+    proofs = []
+    for index, goal in enumerate(proof_goals(proof_blocks)):
+        if index < len(interpreter.proofs_list):
+            proofs.append((goal, PASSED))
+        elif index == failed_proof_index:
+            proofs.append((goal, FAILED))
+        else:
+            proofs.append((goal, NOT_VERIFIED))
+
+    return SubmissionResult(
+        path,
+        PASSED if error is None else FAILED,
+        error=error,
+        proofs=proofs,
+        duration=time.perf_counter() - start_time,
+    )
+
+
+def grading_worker(connection, module_registry: ModuleRegistry):
+    """Grades the submissions received from the connection until None is received"""
+    while True:
+        path = connection.recv()
+        if path is None:
+            break
+        connection.send(grade_submission(path, module_registry))
+
+
+class GradingWorker:
+    def __init__(self, module_registry: ModuleRegistry):
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=grading_worker, args=(worker_connection, module_registry), daemon=True
+        )
+        self.process.start()
+        worker_connection.close()  # so that the death of the worker is seen as the end of the connection
+        self.submission_index = None
+        self.deadline = None
+
+    def submit(self, submission_index: int, path: Path, timeout: float):
+        self.submission_index = submission_index
+        self.deadline = time.monotonic() + timeout
+        self.connection.send(path)
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.kill()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class GradingPool:
+    """Worker processes grading submissions, started with the shared imports already interpreted.
+
+    Each submission is graded in isolation from the others: a worker exceeding the timeout, or dying, is replaced
+    by a new one and the submission it was grading fails."""
+
+    def __init__(self, module_registry: ModuleRegistry, jobs: int = None, timeout: float = DEFAULT_TIMEOUT):
+        self.module_registry = module_registry
+        self.jobs = jobs if jobs is not None else os.cpu_count() or 1
+        self.timeout = timeout
+
+    def grade(self, submissions: list[Path]) -> Generator[tuple[int, SubmissionResult], None, None]:
+        """Yields the index and the result of each submission, in the order they are graded"""
+        pending = deque(enumerate(submissions))
+        idle_workers = [GradingWorker(self.module_registry) for _ in range(min(self.jobs, len(submissions)))]
+        busy_workers = {}  # connection -> worker
+        try:
+            while pending or busy_workers:
+                while idle_workers and pending:
+                    worker = idle_workers.pop()
+                    worker.submit(*pending.popleft(), self.timeout)
+                    busy_workers[worker.connection] = worker
+
+                next_deadline = min(worker.deadline for worker in busy_workers.values())
+                for connection in wait(list(busy_workers), timeout=max(0.0, next_deadline - time.monotonic())):
+                    worker = busy_workers.pop(connection)
+                    submission_index = worker.submission_index
+                    try:
+                        result = connection.recv()
+                    except (EOFError, OSError):
+                        exit_code = worker.process.exitcode
+                        result = self.unfinished_result(
+                            submissions[submission_index], f"the verification crashed (exit code {exit_code})"
+                        )
+                        worker.kill()
+                        worker = GradingWorker(self.module_registry)
+                    idle_workers.append(worker)
+                    yield submission_index, result
+
+                now = time.monotonic()
+                for connection, worker in list(busy_workers.items()):
+                    if worker.deadline <= now:
+                        del busy_workers[connection]
+                        worker.kill()
+                        idle_workers.append(GradingWorker(self.module_registry))
+                        result = self.unfinished_result(
+                            submissions[worker.submission_index],
+                            f"the verification took more than {self.timeout:g} seconds",
+                            status=TIMED_OUT,
+                        )
+                        result.duration = self.timeout
+                        yield worker.submission_index, result
+        finally:
+            for worker in idle_workers:
+                worker.stop()
+            for worker in busy_workers.values():
+                worker.kill()
+
+    def unfinished_result(self, path: Path, message: str, status: str = FAILED) -> SubmissionResult:
+        _, proof_blocks = read_submission(path)
+        proofs = [(goal, NOT_VERIFIED) for goal in proof_goals(proof_blocks)]
+        return SubmissionResult(path, status, error=f'File "{path}": {message}', proofs=proofs)
+
+
+def grade_submissions(
+    submissions: list[Path], jobs: int = None, timeout: float = DEFAULT_TIMEOUT
+) -> list[SubmissionResult]:
+    """Grades the submissions given, returning their results in the same order"""
+    module_registry = preload_shared_imports(submissions)
+    results = [None] * len(submissions)
+    for submission_index, result in GradingPool(module_registry, jobs, timeout).grade(submissions):
+        results[submission_index] = result
+    return results
+
+
+def results_goals(results: list[SubmissionResult]) -> list[str]:
+    """Returns the goals proved in the submissions, in the order they are first found"""
+    goals = {}
+    for result in results:
+        for goal, _ in result.proofs:
+            goals[goal] = None
+    return list(goals)
+
+
+def write_results_csv(results: list[SubmissionResult], file):
+    """Writes a row by submission, with a column giving the status of each goal"""
+    goals = results_goals(results)
+    writer = csv.writer(file)
+    writer.writerow(["submission", "status", "error", "duration"] + goals)
+    for result in results:
+        proof_statuses = dict(result.proofs)
+        writer.writerow(
+            [str(result.path), result.status, result.error or "", f"{result.duration:.3f}"]
+            + [proof_statuses.get(goal, "") for goal in goals]
+        )
+
+
+def write_results_json(results: list[SubmissionResult], file):
+    results_json = [
+        {
+            "submission": str(result.path),
+            "status": result.status,
+            "error": result.error,
+            "duration": round(result.duration, 3),
+            "proofs": [{"goal": goal, "status": status} for goal, status in result.proofs],
+        }
+        for result in results
+    ]
+    json.dump(results_json, file, indent=2)
+    file.write("\n")
@@ -1,9 +1,21 @@
 from fitch_proof import *
 from expressions import *
 from fitch_rules import *
+from fitch_theorems import *
+from fitch_cache import *
+from fitch_profile import *
+from fitch_sat import *
+from fitch_writers import *
 from typing import Generator
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
 from pathlib import Path
+from typing import Iterable, Iterator
+import mmap
+import os
+import posixpath
 import re
+import sys
 
 
 PROOF_KEYWORD = "proof"
@@ -11,6 +23,8 @@ JUSTIFICATION_KEYWORD = "by"
 IMPORT_KEYWORD = "#import"
 COMMENT_SYMBOL = "%"
 TAB_INDENTATION_VALUE = 4
+STDIN_FILE_NAME = "-"
+MMAP_THRESHOLD = 64 * 1024 * 1024  # bytes, larger files are memory-mapped instead of read through a buffer
 
 
 class FitchError(Exception):
@@ -27,8 +41,19 @@ def remove_comments(code: str) -> str:
     return re.sub(f"{COMMENT_SYMBOL}.*", "", code)
 
 
+def remove_comment(line: str) -> str:
+    """Removes the comment of a single line, keeping its line ending"""
+    comment_start = line.find(COMMENT_SYMBOL)
+    if comment_start == -1:
+        return line
+    return line[:comment_start] + ("\n" if line.endswith("\n") else "")
+
+
+LINE_NUMBER_REGEX = re.compile(r"[0-9]+\.\s*?")
+
+
 def remove_line_number(line: str) -> str:
-    return re.sub(r"[0-9]+\.\s*?", "", line, count=0)
+    return LINE_NUMBER_REGEX.sub("", line)
 
 
 def indentation_value(line: str) -> int:
@@ -43,77 +68,454 @@ def indentation_value(line: str) -> int:
     return value
 
 
-class FitchInterpreter:
-    def __init__(self, file_name):
-        self.file_name = file_name
-        self.current_line_number = 0
-        self.imported_proofs_list = []
-        self.proofs_list = []
-        self.all_proved_inferences = []
+def source_lines(file_name) -> Generator[str, None, None]:
+    """Reads the lines of a file lazily, the file name "-" standing for the standard input"""
+    if str(file_name) == STDIN_FILE_NAME:
+        yield from sys.stdin
+        return
 
-    def interpret_code(self) -> Generator[str, None, None]:
-        with open(self.file_name, "r") as file:
-            file_content = file.read()
+    with open(file_name, "r") as file:
+        if os.fstat(file.fileno()).st_size < MMAP_THRESHOLD:
+            yield from file
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            for line in iter(mapped_file.readline, b""):
+                yield line.decode().replace("\r\n", "\n")
 
-        file_directory = Path(self.file_name).parent
-        print(file_directory)
 
-        file_content = remove_comments(file_content)
-        proof_split = re.split(f"({PROOF_KEYWORD}.*?)", file_content, flags=re.DOTALL)
-        import_statements_found = False
+class DirectoryImportResolver:
+    """Imports files from the file system, relative to the directory of the importing file. The files not imported are
+    relative to the directory given (by default, the working directory)."""
 
-        if proof_split[0] != "":  # file might contain import statements
-            import_statements = proof_split[0].splitlines()
-            for line in import_statements:
-                self.current_line_number += 1
-                line = line.rstrip()
+    def __init__(self, directory: Path = None):
+        self.directory = Path(directory) if directory is not None else Path()
 
-                if line == "":  # ignore blank lines
-                    continue
+    def module_key(self, file_name) -> Path:
+        return (self.directory / file_name).resolve()
 
-                if not line.startswith(IMPORT_KEYWORD):
-                    raise FitchError("expected import statement", self.file_name, self.current_line_number)
+    def resolve(self, importer_key: Path, imported_file_name: str) -> Path:
+        return (importer_key.parent / imported_file_name).resolve()
 
-                imported_file_name = line[len(IMPORT_KEYWORD) :].strip()
-                try:
-                    open(Path((file_directory / imported_file_name).resolve()), "r")
+    def exists(self, key: Path) -> bool:
+        return key.is_file()
 
-                except FileNotFoundError:
-                    raise FitchError("imported file doesn't exist", self.file_name, self.current_line_number)
+    def read(self, key: Path) -> Iterable[str]:
+        return source_lines(key)
 
-                file_interpreter = FitchInterpreter((file_directory / imported_file_name).resolve())
-                for _ in file_interpreter.interpret_code():  # we don't display the imported proofs
-                    pass
 
-                yield f'Imported file "{imported_file_name}"\n'
+class MappingImportResolver:
+    """Imports files from a mapping of file names to their source (a string or a list of lines), e.g. the files sent
+    with a request. File names are relative to the importing file, as in directories."""
 
-                self.imported_proofs_list.extend(file_interpreter.imported_proofs_list + file_interpreter.proofs_list)
-                self.all_proved_inferences.extend(
-                    [proof.goal for proof in (file_interpreter.imported_proofs_list + file_interpreter.proofs_list)]
-                )
-                import_statements_found = True
+    def __init__(self, sources: dict):
+        self.sources = {self.module_key(file_name): source for file_name, source in sources.items()}
+
+    def module_key(self, file_name) -> str:
+        return posixpath.normpath(str(file_name))
+
+    def resolve(self, importer_key: str, imported_file_name: str) -> str:
+        return posixpath.normpath(posixpath.join(posixpath.dirname(importer_key), imported_file_name))
+
+    def exists(self, key: str) -> bool:
+        return key in self.sources
+
+    def read(self, key: str) -> Iterable[str]:
+        source = self.sources[key]
+        return source.splitlines(keepends=True) if isinstance(source, str) else source
+
+
+class CachingImportResolver:
+    """Keeps the lines of the files read through another resolver, for services importing the same files again and
+    again. The files read are assumed not to change."""
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+        self.lines = {}  # key -> lines of the file
+
+    def module_key(self, file_name):
+        return self.resolver.module_key(file_name)
+
+    def resolve(self, importer_key, imported_file_name: str):
+        return self.resolver.resolve(importer_key, imported_file_name)
+
+    def exists(self, key) -> bool:
+        return key in self.lines or self.resolver.exists(key)
+
+    def read(self, key) -> Iterable[str]:
+        if key not in self.lines:
+            self.lines[key] = list(self.resolver.read(key))
+        return self.lines[key]
+
+
+class ProofBlock:
+    def __init__(self, text: str, line_number: int):
+        self.text = text  # the lines of the proof, without comments, starting with the proof keyword
+        self.line_number = line_number  # line of the proof keyword in the source
+
+
+class ProofScanner:
+    """Splits the lines of a proof file into the lines before the first proof (the import statements) and the proofs,
+    in a single pass. Lines are read lazily, so each proof can be verified before the rest of the file is read."""
+
+    def __init__(self, lines: Iterable[str]):
+        self.lines = iter(lines)
+        self.line_number = 0  # number of lines read
+        self.header_read = False
+        self.next_proof_line = None  # first line of the next proof, once read
+
+    def read_line(self) -> str | None:
+        """Returns the next line without its comment, or None at the end of the source"""
+        line = next(self.lines, None)
+        if line is None:
+            return None
+        self.line_number += 1
+        return remove_comment(line)
+
+    def header_lines(self) -> Generator[tuple[int, str], None, None]:
+        """Yields the number and the content of each line before the first proof"""
+        if self.header_read:
+            return
+        self.header_read = True
+        while (line := self.read_line()) is not None:
+            if line.lstrip().startswith(PROOF_KEYWORD):
+                self.next_proof_line = line.lstrip()
+                return
+            yield self.line_number, line
+
+    def proof_blocks(self) -> Generator[ProofBlock, None, None]:
+        for _ in self.header_lines():  # skipped if they were not read
+            pass
 
-        if import_statements_found:
-            yield "\n"
+        while self.next_proof_line is not None:
+            block_line_number = self.line_number
+            block_lines = [self.next_proof_line]
+            self.next_proof_line = None
+            while (line := self.read_line()) is not None:
+                if line.lstrip().startswith(PROOF_KEYWORD):
+                    self.next_proof_line = line.lstrip()
+                    break
+                block_lines.append(line)
+            yield ProofBlock("".join(block_lines), block_line_number)
 
-        for index, proof_part in enumerate(proof_split):
-            if proof_part == "":
+
+def proof_goal_from_str(proof_str: str) -> Inference:
+    first_line = proof_str.splitlines()[0]
+    return inference_from_str(first_line[len(PROOF_KEYWORD) :].strip())
+
+
+def counterexample_note(premises: list[Expression], conclusion: Expression, description: str) -> str:
+    """Returns a note giving an assignment of the propositions which makes the premises true and the conclusion false,
+    or an empty string if the premises entail the conclusion"""
+    assignment = entailment_counterexample(tuple(premise.expr for premise in premises), conclusion.expr)
+    if assignment is None:
+        return ""
+    return f" ({description}, counterexample: {assignment_str(assignment)})"
+
+
+class ModuleRegistry:
+    """Files imported during a run, keyed by their resolved path, so that each of them is interpreted only once"""
+
+    def __init__(self):
+        self.modules = {}  # resolved path -> interpreter of the file
+        self.import_stack = []  # resolved paths of the files being interpreted, to detect import cycles
+        self.referenced_paths = set()  # keys (resolved paths) of all the files read or imported, even if missing
+
+
+class FitchInterpreter:
+    def __init__(
+        self,
+        file_name,
+        module_registry: ModuleRegistry = None,
+        verification_cache: VerificationCache = None,
+        proof_memo: ProofMemo = None,
+        jobs: int = 1,
+        source: str | Iterable[str] = None,
+        import_resolver=None,
+        profiler: Profiler = None,
+        proof_writers: list = None,
+        keep_proofs: bool = True,
+    ):
+        """Interprets the file given, or the source given (a string or an iterable of lines) named file_name in the
+        errors. Imports are found by the import resolver, by default relative to the directory of the file.
+
+        Each proof of the file is given to the proof writers (e.g. a LatexWriter) as soon as it is verified. Without
+        keeping the proofs, they are not added to proofs_list, so that only one of them is kept in memory at a time."""
+        self.file_name = file_name
+        self.source = source.splitlines(keepends=True) if isinstance(source, str) else source
+        self.import_resolver = import_resolver if import_resolver is not None else DirectoryImportResolver()
+        self.module_key = self.import_resolver.module_key(file_name)
+        self.module_registry = module_registry if module_registry is not None else ModuleRegistry()
+        self.verification_cache = verification_cache
+        self.proof_memo = proof_memo  # results kept in memory between runs, in watch mode
+        self.jobs = jobs  # number of processes verifying the proofs of the file (imported files are verified in order)
+        self.profiler = profiler  # measures of the interpretation, shared with the imported files, if profiling
+        self.proof_writers = proof_writers if proof_writers is not None else []
+        self.keep_proofs = keep_proofs
+        self.current_line_number = 0
+        self.imported_keys = []  # keys of the files imported by this one
+        self.imported_proofs_list = []
+        self.proofs_list = []
+        self.all_proved_inferences = TheoremIndex()
+
+    def interpret_code(self, output: bool = True) -> Generator[str, None, None]:
+        """Interprets the file, yielding its text output. Without output, the proofs are only verified."""
+        self.module_registry.import_stack.append(self.module_key)
+        self.module_registry.referenced_paths.add(self.module_key)
+        try:
+            yield from self.interpret_file(output)
+        finally:
+            self.module_registry.import_stack.pop()
+            if isinstance(self.source, Iterator):
+                # The lines read (e.g. a generator of source_lines) can't be read again, and would prevent the
+                # interpreters kept by the module registry from being sent to worker processes
+                self.source = None
+
+    def import_file(self, imported_key) -> "FitchInterpreter":
+        """Returns the interpreter of the imported file, interpreting the file if it wasn't imported before"""
+        file_interpreter = self.module_registry.modules.get(imported_key)
+        if file_interpreter is None:
+            if imported_key in self.module_registry.import_stack:
+                raise FitchError(f'circular import of "{imported_key}"', self.file_name, self.current_line_number)
+            if self.profiler is not None:
+                start_time = perf_counter()
+            file_interpreter = FitchInterpreter(
+                imported_key,
+                self.module_registry,
+                self.verification_cache,
+                self.proof_memo,
+                source=self.import_resolver.read(imported_key),
+                import_resolver=self.import_resolver,
+                profiler=self.profiler,
+            )
+            for _ in file_interpreter.interpret_code(output=False):  # we don't display the imported proofs
+                pass
+            self.module_registry.modules[imported_key] = file_interpreter
+            if self.profiler is not None:
+                self.profiler.add_phase(IMPORTS, perf_counter() - start_time)
+        return file_interpreter
+
+    def interpret_file(self, output: bool = True) -> Generator[str, None, None]:
+        scanner = ProofScanner(self.source if self.source is not None else source_lines(self.file_name))
+        if output:  # the output is written by a TextWriter, and yielded after each import and proof
+            output_buffer = StringIO()
+            text_writer = TextWriter(output_buffer, self.proof_memo)
+
+            def take_output() -> str:
+                text = output_buffer.getvalue()
+                output_buffer.seek(0)
+                output_buffer.truncate()
+                return text
+
+        for line_number, line in scanner.header_lines():  # file might contain import statements
+            self.current_line_number = line_number
+            line = line.rstrip()
+
+            if line == "":  # ignore blank lines
                 continue
 
-            if proof_part == PROOF_KEYWORD:
-                for str_output in self.interpret_proof(PROOF_KEYWORD + proof_split[index + 1]):
-                    yield str_output
-                if index < len(proof_split) - 2:  # we do not display blank lines at the end of the output
-                    yield "\n\n"
+            if not line.startswith(IMPORT_KEYWORD):
+                raise FitchError("expected import statement", self.file_name, self.current_line_number)
+
+            imported_file_name = line[len(IMPORT_KEYWORD) :].strip()
+            imported_key = self.import_resolver.resolve(self.module_key, imported_file_name)
+            self.module_registry.referenced_paths.add(imported_key)
+            if not self.import_resolver.exists(imported_key):
+                raise FitchError("imported file doesn't exist", self.file_name, self.current_line_number)
+
+            file_interpreter = self.import_file(imported_key)
+            self.imported_keys.append(imported_key)
+
+            for proof_writer in self.proof_writers:
+                proof_writer.write_import(imported_file_name)
+            if output:
+                text_writer.write_import(imported_file_name)
+                yield take_output()
+
+            # A file reached through several imports (e.g. a diamond) only adds its proofs once
+            already_imported = {id(proof) for proof in self.imported_proofs_list}
+            for imported_proof in file_interpreter.imported_proofs_list + file_interpreter.proofs_list:
+                if id(imported_proof) not in already_imported:
+                    already_imported.add(id(imported_proof))
+                    self.imported_proofs_list.append(imported_proof)
+                    self.all_proved_inferences.add(imported_proof.goal)
+
+        for proof in self.interpret_proofs(scanner.proof_blocks()):
+            if not output:
+                continue
+            if self.profiler is not None:
+                start_time = perf_counter()
+            text_writer.write_proof(proof)
+            if self.profiler is not None:
+                self.profiler.add_phase(RENDERING, perf_counter() - start_time)
+            yield take_output()
+
+        if output:
+            text_writer.end()
+            if output_buffer.tell() != 0:
+                yield take_output()
+
+    def interpret_proofs(self, proof_blocks: Iterable[ProofBlock]) -> Generator[Proof, None, None]:
+        """Verifies the proofs given in order, yielding each of them once verified"""
+        if self.jobs > 1:  # the proofs are all read before verifying them in parallel
+            verified_proofs = self.verify_proofs_in_parallel(list(proof_blocks))
+        else:
+            verified_proofs = (self.load_or_verify_proof(proof_block) for proof_block in proof_blocks)
+
+        for proof in verified_proofs:
+            if self.keep_proofs:
+                self.proofs_list.append(proof)
+            self.all_proved_inferences.add(proof.goal)
+            if len(self.proof_writers) != 0:
+                if self.profiler is not None:
+                    start_time = perf_counter()
+                for proof_writer in self.proof_writers:
+                    proof_writer.write_proof(proof)
+                if self.profiler is not None:
+                    self.profiler.add_phase(WRITING, perf_counter() - start_time)
+            yield proof
+
+    def load_or_verify_proof(self, proof_block: ProofBlock) -> Proof:
+        if self.profiler is not None:
+            start_time = perf_counter()
+        self.current_line_number = proof_block.line_number - 1
+        proof = self.load_proof(proof_block.text, self.all_proved_inferences)
+        reused = proof is not None
+        if proof is None:
+            proof = self.verify_proof(proof_block.text)
+            self.store_proof(proof_block.text, proof, self.all_proved_inferences.digest)
+        else:
+            self.current_line_number += len(proof_block.text.splitlines())
+        if self.profiler is not None:
+            self.profiler.add_proof(self.file_name, proof_block.line_number, proof, perf_counter() - start_time, reused)
+        return proof
+
+    def load_proof(self, proof_str: str, proved_inferences: TheoremIndex) -> Proof | None:
+        """Returns the result of a previous verification of the proof, if it can be reused"""
+        if self.profiler is not None:
+            start_time = perf_counter()
+        proof = None
+        if self.proof_memo is not None:
+            proof = self.proof_memo.load(self.file_name, proof_str, proved_inferences)
+        if proof is None and self.verification_cache is not None:
+            # A proof is only reused if its text and the theorems it may apply are unchanged
+            proof = self.verification_cache.load(self.verification_cache.key(proof_str, proved_inferences.digest))
+            if proof is not None and self.proof_memo is not None:
+                self.proof_memo.store(self.file_name, proof_str, proof, proved_inferences.digest)
+        if self.profiler is not None:
+            self.profiler.add_phase(CACHE_LOOKUP, perf_counter() - start_time)
+        return proof
+
+    def store_proof(self, proof_str: str, proof: Proof, theorems_digest: int):
+        if self.profiler is not None:
+            start_time = perf_counter()
+        if self.proof_memo is not None:
+            self.proof_memo.store(self.file_name, proof_str, proof, theorems_digest)
+        if self.verification_cache is not None:
+            self.verification_cache.store(self.verification_cache.key(proof_str, theorems_digest), proof)
+        if self.profiler is not None:
+            self.profiler.add_phase(CACHE_STORE, perf_counter() - start_time)
+
+    def verify_proofs_in_parallel(self, proof_blocks: list[ProofBlock]) -> Generator[Proof, None, None]:
+        """Verifies the proofs on a process pool, yielding them in order. The first error (by line number) is raised.
+
+        A proof only depends on the statements of the theorems it applies, and the statements proved in the file are
+        the goals of its proofs, known before verifying anything. Each proof is therefore verified independently,
+        with the imported theorems and the goals of the proofs before it. If one of these proofs fails, its error is
+        raised before the result of any later proof is used, as when verifying in order."""
+        goals = []
+        for proof_block in proof_blocks:
+            try:
+                goals.append(proof_goal_from_str(proof_block.text))
+            except:  # the error is reported when the proof is reached
+                goals.append(None)
+
+        # Theorems available to each proof, to reuse the results of previous verifications
+        cached_proofs = []
+        theorems_digests = []
+        available_theorems = TheoremIndex(self.all_proved_inferences)
+        for proof_block, goal in zip(proof_blocks, goals):
+            if self.profiler is not None:
+                start_time = perf_counter()
+            cached_proof = self.load_proof(proof_block.text, available_theorems)
+            if self.profiler is not None and cached_proof is not None:
+                elapsed = perf_counter() - start_time
+                self.profiler.add_proof(self.file_name, proof_block.line_number, cached_proof, elapsed, reused=True)
+            cached_proofs.append(cached_proof)
+            theorems_digests.append(available_theorems.digest)
+            if goal is not None:
+                available_theorems.add(goal)
+
+        # Consecutive proofs are sent in chunks, to amortize the cost of each task
+        uncached_indexes = [index for index, proof in enumerate(cached_proofs) if proof is None]
+        chunk_size = max(1, len(uncached_indexes) // (self.jobs * 4))
+        chunks = [uncached_indexes[start : start + chunk_size] for start in range(0, len(uncached_indexes), chunk_size)]
+
+        executor = ProcessPoolExecutor(
+            max_workers=self.jobs,
+            initializer=init_proof_worker,
+            initargs=(self.file_name, list(self.all_proved_inferences), goals, self.profiler is not None),
+        )
+        try:
+            chunk_futures = {}  # first proof index of the chunk -> future
+            for chunk in chunks:
+                chunk_proofs = [
+                    (index, proof_blocks[index].line_number - 1, proof_blocks[index].text) for index in chunk
+                ]
+                chunk_futures[chunk[0]] = executor.submit(verify_proofs_in_worker, chunk_proofs)
+
+            verified_proofs = {}
+            for index, proof_block in enumerate(proof_blocks):
+                proof = cached_proofs[index]
+                if proof is None:
+                    if index in chunk_futures:
+                        if self.profiler is not None:
+                            start_time = perf_counter()
+                        try:
+                            chunk_results, worker_profiler = chunk_futures.pop(index).result()
+                        except Exception:  # e.g. a worker crashed, or its results couldn't be sent back
+                            chunk_results, worker_profiler = [], None
+                        if self.profiler is not None:
+                            self.profiler.add_phase(PARALLEL_VERIFICATION, perf_counter() - start_time)
+                            if worker_profiler is not None:
+                                self.profiler.merge(worker_profiler)
+                        for proof_index, proof_found, error in chunk_results:
+                            if error is not None:
+                                verified_proofs[proof_index] = error
+                                break
+                            verified_proofs[proof_index] = proof_found
+                    proof = verified_proofs.pop(index, None)
+                    if proof is None:
+                        # The proofs whose results weren't received are verified here, the theorems available being
+                        # those of the proofs yielded before
+                        proof = self.load_or_verify_proof(proof_block)
+                    elif isinstance(proof, FitchError):
+                        self.current_line_number = proof.line_number
+                        raise proof
+                    else:
+                        self.store_proof(proof_block.text, proof, theorems_digests[index])
+                self.current_line_number = proof_block.line_number - 1 + len(proof_block.text.splitlines())
+                yield proof
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def verify_proof(self, proof_str: str) -> Proof:
+        try:
+            return self.verify_proof_lines(proof_str)
+        except RecursionError:  # e.g. in a rule matching a formula nested thousands of times
+            raise FitchError("formula nested too deeply", self.file_name, self.current_line_number)
 
-    def interpret_proof(self, proof_str: str) -> Generator[str, None, None]:
+    def verify_proof_lines(self, proof_str: str) -> Proof:
         proof_lines = proof_str.splitlines()
-        first_line = proof_lines[0]
+        profiler = self.profiler
 
+        if profiler is not None:
+            start_time = perf_counter()
         try:
-            proof_goal = inference_from_str(first_line[len(PROOF_KEYWORD) :].strip())
+            proof_goal = proof_goal_from_str(proof_str)
         except:
-            raise FitchError("could not parse proof goal", self.file_name, self.current_line_number)
+            raise FitchError("could not parse proof goal", self.file_name, self.current_line_number + 1)
+        if profiler is not None:
+            profiler.add_phase(GOAL_PARSING, perf_counter() - start_time)
 
         proof = Proof(goal=proof_goal)
         previous_indentation_level = 0  # initialise previous indentation level
@@ -131,12 +533,15 @@ class FitchInterpreter:
             current_indentation_level = indentation_value(proof_line_str)
             proof_line_str = proof_line_str.strip()  # we can now remove indentation
 
-            if proof_line_str.count(JUSTIFICATION_KEYWORD) == 0:
+            line_parts = proof_line_str.split(JUSTIFICATION_KEYWORD, 2)
+            if len(line_parts) == 1:
                 raise FitchError("expected justification keyword", self.file_name, self.current_line_number)
 
-            formula_part = proof_line_str.split(JUSTIFICATION_KEYWORD)[0].strip()
-            justification_part = proof_line_str.split(JUSTIFICATION_KEYWORD)[1].strip()
+            formula_part = line_parts[0].strip()
+            justification_part = line_parts[1].strip()
 
+            if profiler is not None:
+                start_time = perf_counter()
             try:
                 line_formula = Expression(formula_part)
             except:
@@ -144,12 +549,18 @@ class FitchInterpreter:
                     f"invalid syntax for line main formula '{formula_part}'", self.file_name, self.current_line_number
                 )
 
+            if profiler is not None:
+                formula_parsed_time = perf_counter()
+                profiler.add_phase(FORMULA_PARSING, formula_parsed_time - start_time)
             try:
                 line_justification = justification_from_str(justification_part)
             except:
                 raise FitchError(
                     f"invalid syntax for justification '{justification_part}'", self.file_name, self.current_line_number
                 )
+            if profiler is not None:
+                start_time = perf_counter()
+                profiler.add_phase(JUSTIFICATION_PARSING, start_time - formula_parsed_time)
 
             if current_indentation_level < previous_indentation_level and not is_first_line:  # assumption discharged
                 try:
@@ -179,7 +590,9 @@ class FitchInterpreter:
 
             else:  # normal line added
                 if isinstance(line_justification, TheoremApplication):
-                    if not line_justification.theorem in self.all_proved_inferences:
+                    if line_justification.theorem is None:
+                        line_justification.theorem = self.find_applied_theorem(proof, line_justification, line_formula)
+                    elif not line_justification.theorem in self.all_proved_inferences:
                         raise FitchError(
                             f"inference '{line_justification.theorem}' was never proved",
                             self.file_name,
@@ -187,34 +600,101 @@ class FitchInterpreter:
                         )
                 try:
                     proof.add_line(line_formula, line_justification)
+                except IncorrectJustificationError as e:
+                    note = counterexample_note(
+                        proof.sentences_in_scope(), line_formula, "the sentence doesn't follow from the lines in scope"
+                    )
+                    raise FitchError(str(e) + note, self.file_name, self.current_line_number)
                 except ProofError as e:
                     raise FitchError(str(e), self.file_name, self.current_line_number)
                 except IndexError:
                     raise FitchError("line number cited does not exist", self.file_name, self.current_line_number)
 
+            if profiler is not None:
+                elapsed = perf_counter() - start_time
+                profiler.add_phase(RULE_VERIFICATION, elapsed)
+                profiler.add_rule(line_justification, elapsed)
             previous_indentation_level = current_indentation_level
             is_first_line = False
 
+        if len(proof.steps) == 0:
+            raise FitchError("proof has no lines", self.file_name, self.current_line_number)
         if not proof.goal_accomplished():
-            raise FitchError("proof did not reach goal", self.file_name, self.current_line_number)
+            note = counterexample_note(proof.goal.premises, proof.goal.conclusion, "the goal is not valid")
+            raise FitchError("proof did not reach goal" + note, self.file_name, self.current_line_number)
 
-        self.proofs_list.append(proof)
-        self.all_proved_inferences.append(proof.goal)
+        return proof
 
-        yield f"Proof of {proof.goal} successful\n"
-        yield str(proof)
+    def find_applied_theorem(self, proof: Proof, justification: TheoremApplication, line_formula: Expression):
+        """Finds the proved theorem of which the lines cited and the line formula are an instance"""
+        try:
+            lines_cited_content = [proof.steps[line_cited - 1].sentence for line_cited in justification.lines_cited]
+        except IndexError:
+            raise FitchError("line number cited does not exist", self.file_name, self.current_line_number)
+
+        matching_theorems = self.all_proved_inferences.find_matches(lines_cited_content, line_formula)
+        if len(matching_theorems) == 0:
+            raise FitchError(
+                f"no proved inference justifies '{line_formula}' from the lines cited",
+                self.file_name,
+                self.current_line_number,
+            )
+        # Any of them justifies the line, the one applied is shown when the proof is rendered
+        return most_specific_theorem(matching_theorems)
 
     def generate_latex_document(self) -> str:
-        latex_document = r"""\documentclass{article}
-\usepackage{fitch}
-\renewcommand*\contentsname{Proof list}
-
-\begin{document}
-\tableofcontents
-"""
-        for proof_made in self.proofs_list:
-            latex_document += rf"\section{{${proof_made.goal.latex()}$}}" + "\n"
-            latex_document += "$" + proof_made.latex() + "$\n"
-
-        latex_document += r"\end{document}"
-        return latex_document
+        latex_document = StringIO()
+        LatexWriter(latex_document).write_document(self.proofs_list)
+        return latex_document.getvalue()
+
+
+worker_context = None  # set in each worker process of FitchInterpreter.verify_proofs_in_parallel
+
+
+class ProofWorkerContext:
+    def __init__(self, file_name, imported_theorems: list[Inference], goals: list[Inference | None], profile: bool):
+        self.file_name = file_name
+        self.profile = profile
+        self.imported_theorems = imported_theorems
+        self.goals = goals
+        # The proofs are mostly received in order, so the theorems available are extended from one proof to the next
+        self.available_theorems = TheoremIndex(imported_theorems)
+        self.goals_added = 0
+
+    def theorems_available_to(self, proof_index: int) -> TheoremIndex:
+        if proof_index < self.goals_added:
+            self.available_theorems = TheoremIndex(self.imported_theorems)
+            self.goals_added = 0
+        self.available_theorems.extend(goal for goal in self.goals[self.goals_added : proof_index] if goal is not None)
+        self.goals_added = proof_index
+        return self.available_theorems
+
+
+def init_proof_worker(file_name, imported_theorems: list[Inference], goals: list[Inference | None], profile: bool):
+    global worker_context
+    worker_context = ProofWorkerContext(file_name, imported_theorems, goals, profile)
+
+
+def verify_proofs_in_worker(
+    proofs: list[tuple[int, int, str]]
+) -> tuple[list[tuple[int, Proof | None, FitchError | None]], Profiler | None]:
+    """Verifies the proofs given as (index, start line number, text), stopping at the first error. The measures of
+    the verifications are also returned, if profiling."""
+    results = []
+    profiler = Profiler() if worker_context.profile else None
+    for proof_index, start_line_number, proof_str in proofs:
+        interpreter = FitchInterpreter(worker_context.file_name, profiler=profiler)
+        interpreter.current_line_number = start_line_number
+        interpreter.all_proved_inferences = worker_context.theorems_available_to(proof_index)
+        if profiler is not None:
+            start_time = perf_counter()
+        try:
+            proof = interpreter.verify_proof(proof_str)
+        except FitchError as e:
+            results.append((proof_index, None, e))
+            break
+        results.append((proof_index, proof, None))
+        if profiler is not None:
+            elapsed = perf_counter() - start_time
+            profiler.add_proof(worker_context.file_name, start_line_number + 1, proof, elapsed, reused=False)
+    return results, profiler
@@ -0,0 +1,113 @@
+from fitch_cache import *
+from time import perf_counter
+
+# Phases timed by the interpreter. They may contain each other: the imports contain the phases of the imported files.
+IMPORTS = "imports"
+CACHE_LOOKUP = "cache_lookup"
+CACHE_STORE = "cache_store"
+GOAL_PARSING = "goal_parsing"
+FORMULA_PARSING = "formula_parsing"
+JUSTIFICATION_PARSING = "justification_parsing"
+RULE_VERIFICATION = "rule_verification"  # each rule class is also timed separately
+PARALLEL_VERIFICATION = "parallel_verification"  # waiting for the worker processes
+RENDERING = "rendering"
+WRITING = "writing"  # the proof writers, e.g. writing the text output or the LaTeX document while verifying
+
+
+def lru_cache_counts(function) -> tuple[int, int]:
+    cache_info = function.cache_info()
+    return cache_info.hits, cache_info.misses
+
+
+def add_timing(table: dict, name: str, elapsed: float, calls: int = 1):
+    entry = table.get(name)
+    if entry is None:
+        table[name] = [elapsed, calls]
+    else:
+        entry[0] += elapsed
+        entry[1] += calls
+
+
+def hit_rate_stats(hits: int, misses: int) -> dict:
+    lookups = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": hits / lookups if lookups != 0 else 0.0}
+
+
+class Profiler:
+    """Wall time and number of calls of the phases of an interpretation, of each rule class and of each proof.
+
+    The interpreter only measures anything if it has a profiler, so profiling costs nothing when it is disabled."""
+
+    def __init__(self):
+        self.start_time = perf_counter()
+        self.phases = {}  # phase -> [time, calls]
+        self.rules = {}  # rule class name -> [time, calls]
+        self.proofs = []  # one dictionary per proof interpreted
+        # Counters of the process-wide caches when profiling started, to only report the hits of this run
+        self.parse_cache_counts = (Expression.parse_cache.hits, Expression.parse_cache.misses)
+        self.theorem_applies_counts = lru_cache_counts(theorem_applies)
+        self.theorem_pattern_counts = lru_cache_counts(compile_theorem_pattern)
+
+    def add_phase(self, phase: str, elapsed: float):
+        add_timing(self.phases, phase, elapsed)
+
+    def add_rule(self, justification: Rule, elapsed: float):
+        rule_name = justification.__class__.__name__
+        if isinstance(justification, TheoremApplication) and justification.inferred:
+            rule_name += " (inferred)"  # includes looking up the theorem applied
+        add_timing(self.rules, rule_name, elapsed)
+
+    def add_proof(self, file_name, line_number: int, proof: Proof, elapsed: float, reused: bool):
+        self.proofs.append(
+            {
+                "file": str(file_name),
+                "line": line_number,
+                "goal": str(proof.goal),
+                "lines": len(proof.steps),
+                "time": elapsed,
+                "result": "reused" if reused else "verified",
+            }
+        )
+
+    def merge(self, other: "Profiler"):
+        """Adds the measures of another profiler, e.g. of a worker process"""
+        for phase, (elapsed, calls) in other.phases.items():
+            add_timing(self.phases, phase, elapsed, calls)
+        for rule_name, (elapsed, calls) in other.rules.items():
+            add_timing(self.rules, rule_name, elapsed, calls)
+        self.proofs += other.proofs
+
+    def report(self, verification_cache: VerificationCache = None, proof_memo: ProofMemo = None) -> dict:
+        """Returns the report of the measures, the slowest phases, rules and proofs first. The times are in seconds."""
+
+        def timings(table: dict) -> dict:
+            sorted_entries = sorted(table.items(), key=lambda item: item[1][0], reverse=True)
+            return {name: {"time": elapsed, "calls": calls} for name, (elapsed, calls) in sorted_entries}
+
+        parse_cache_hits = Expression.parse_cache.hits - self.parse_cache_counts[0]
+        parse_cache_misses = Expression.parse_cache.misses - self.parse_cache_counts[1]
+        theorem_applies_counts = lru_cache_counts(theorem_applies)
+        theorem_pattern_counts = lru_cache_counts(compile_theorem_pattern)
+        caches = {
+            "formula_parse_cache": hit_rate_stats(parse_cache_hits, parse_cache_misses),
+            "theorem_applications": hit_rate_stats(
+                theorem_applies_counts[0] - self.theorem_applies_counts[0],
+                theorem_applies_counts[1] - self.theorem_applies_counts[1],
+            ),
+            "theorem_patterns": hit_rate_stats(
+                theorem_pattern_counts[0] - self.theorem_pattern_counts[0],
+                theorem_pattern_counts[1] - self.theorem_pattern_counts[1],
+            ),
+        }
+        if verification_cache is not None:
+            caches["verification_cache"] = verification_cache.stats()
+        if proof_memo is not None:
+            caches["proof_memo"] = hit_rate_stats(proof_memo.hits, proof_memo.misses)
+
+        return {
+            "total_time": perf_counter() - self.start_time,
+            "phases": timings(self.phases),
+            "rules": timings(self.rules),
+            "proofs": sorted(self.proofs, key=lambda proof: proof["time"], reverse=True),
+            "caches": caches,
+        }
@@ -1,15 +1,36 @@
 from fitch_rules import *
+from collections import defaultdict
+from typing import Generator, Iterable
 
 
 class ProofError(Exception):
     pass
 
 
+class IncorrectJustificationError(ProofError):
+    pass
+
+
+class Subproof:
+    """Node of the subproof tree of a proof: the whole proof is the root, and every assumption starts a child node"""
+
+    def __init__(self, start: int, depth: int, parent: "Subproof | None"):
+        self.start = start
+        self.end = None  # line number of the last line, set when the subproof is closed
+        self.depth = depth
+        self.parent = parent
+        self.children = []
+
+    def is_closed(self) -> bool:
+        return self.end is not None
+
+
 class ProofLine:
-    def __init__(self, sentence: Expression, justification, subproof_depth):
+    def __init__(self, sentence: Expression, justification, subproof_depth, subproof: Subproof = None):
         self.sentence = sentence
         self.justification = justification
         self.subproof_depth = subproof_depth
+        self.subproof = subproof  # innermost subproof containing the line
 
 
 class Proof:
@@ -17,85 +38,69 @@ class Proof:
         self.goal = goal
         self.steps = []
         self.current_proof_depth = 0
+        self.main_proof = Subproof(start=1, depth=0, parent=None)  # root of the subproof tree, never closed
+        self.current_subproof = self.main_proof
+        self.subproofs = {}  # subproofs indexed by their start line, the intervals they cover being nested
 
     def add_premise(self, premise: Expression):
         if not len(self.steps) == 0:
             if not isinstance(self.steps[-1].justification, Premise):  # the last line wasn't a premise
                 raise ProofError("all premises must be at the start of the proof")
 
-        self.steps.append(ProofLine(sentence=premise, justification=Premise(), subproof_depth=0))
+        self.steps.append(
+            ProofLine(sentence=premise, justification=Premise(), subproof_depth=0, subproof=self.main_proof)
+        )
 
     def add_assumption(self, assumption: Expression):
         self.current_proof_depth += 1
+        new_subproof = Subproof(start=len(self.steps) + 1, depth=self.current_proof_depth, parent=self.current_subproof)
+        self.current_subproof.children.append(new_subproof)
+        self.subproofs[new_subproof.start] = new_subproof
+        self.current_subproof = new_subproof
         self.steps.append(
-            ProofLine(sentence=assumption, justification=Assumption(), subproof_depth=self.current_proof_depth)
+            ProofLine(
+                sentence=assumption,
+                justification=Assumption(),
+                subproof_depth=self.current_proof_depth,
+                subproof=new_subproof,
+            )
         )
 
     def discharge_assumption(self):
         if self.current_proof_depth != 0:
             self.current_proof_depth -= 1
+            self.current_subproof.end = len(self.steps)
+            self.current_subproof = self.current_subproof.parent
         else:
             raise ProofError("no assumption is active")
 
     def verify_subproof(self, subproof_start: int, subproof_end: int) -> bool:
         """Verifies that the 'subproof' delimited by the two line numbers given is a valid one (returns True in this case and False otherwise)"""
-        # First line must be an assumption
-        try:
-            if not isinstance(self.steps[subproof_start - 1].justification, Assumption):
-                return False
-            subproof_start_depth = self.steps[subproof_start - 1].subproof_depth
-            subproof_end_depth = self.steps[subproof_end - 1].subproof_depth
-        except IndexError:  # one of the two lines doesn't exist
-            return False
-        # The two lines must be at the same subproof level
-        if subproof_start_depth != subproof_end_depth:
-            return False
-        # The assumption must not have been discharged between the two lines
-        for line_index in range(subproof_start, subproof_end):
-            proof_line = self.steps[line_index]
-            if proof_line.subproof_depth < subproof_start_depth:
-                return False
-        # The assumption must have been discharged just after the end line
-        try:
-            if subproof_end_depth == self.steps[subproof_end].subproof_depth:
-                if not isinstance(self.steps[subproof_end].justification, Assumption):
-                    return False
-        except IndexError:  # the second line is the end of the proof
-            pass
-
-        if self.current_proof_depth + 1 != subproof_end_depth:  # the subproof must be the last discharged one
+        # The subproof must have been closed exactly at the end line, and must be directly under the current subproof
+        subproof = self.subproofs.get(subproof_start)
+        if subproof is None or subproof.end != subproof_end:
             return False
-
-        if self.current_proof_depth != 0:
-            for index in range(subproof_end, len(self.steps) - 1):
-                proof_line = self.steps[index]
-                if proof_line.subproof_depth < subproof_start_depth - 1:
-                    return False
-                elif proof_line.subproof_depth == subproof_start_depth - 1:
-                    if isinstance(proof_line.justification, Assumption):
-                        return False
-
-        return True
+        return subproof.parent is self.current_subproof
 
     def valid_justification_line(self, line_number: int) -> bool:
-        try:
-            line_cited_content = self.steps[line_number - 1]
-        except IndexError:  # the line index doesn't exist
+        if not 1 <= line_number <= len(self.steps):  # the line index doesn't exist
             return False
-        corresponding_subproof_depth = line_cited_content.subproof_depth
-        if corresponding_subproof_depth > self.current_proof_depth:
-            return False
-
-        if corresponding_subproof_depth != 0:
-            for line_index in range(line_number, len(self.steps) - 1):
-                proof_line = self.steps[line_index]
-                if proof_line.subproof_depth < corresponding_subproof_depth:
-                    return False
-                elif proof_line.subproof_depth == corresponding_subproof_depth:
-                    if isinstance(proof_line.justification, Assumption):
-                        return False
-
-        return True
+        # The line is in scope if the subproof containing it is still open (its parents are then open too)
+        return not self.steps[line_number - 1].subproof.is_closed()
+
+    def sentences_in_scope(self) -> list[Expression]:
+        """Returns the sentences of the lines which can be cited by the next line"""
+        return [proof_line.sentence for proof_line in self.steps if not proof_line.subproof.is_closed()]
+
+    def subproofs_closed_after(self) -> dict[int, list[Subproof]]:
+        """Returns the closed subproofs grouped by their last line number, innermost first"""
+        closed_subproofs = defaultdict(list)
+        for subproof in self.subproofs.values():
+            if subproof.is_closed():
+                closed_subproofs[subproof.end].append(subproof)
+        for subproof_list in closed_subproofs.values():
+            subproof_list.sort(key=lambda subproof: subproof.depth, reverse=True)
+        return closed_subproofs
 
     def add_line(self, line_content: Expression, justification: Rule):
         if isinstance(justification, RuleCitingOneLine):
@@ -176,12 +181,12 @@ class Proof:
             )
 
         if not new_line_correct:
-            raise ProofError(f"incorrect justification '{justification}' for sentence '{line_content}'")
+            raise IncorrectJustificationError(f"incorrect justification '{justification}' for sentence '{line_content}'")
 
-        self.steps.append(ProofLine(line_content, justification, self.current_proof_depth))
+        self.steps.append(ProofLine(line_content, justification, self.current_proof_depth, self.current_subproof))
 
     def goal_accomplished(self) -> bool:
-        if self.steps[-1].sentence == self.goal.conclusion:
+        if len(self.steps) != 0 and self.steps[-1].sentence == self.goal.conclusion:
             premises_used = []
             for line in self.steps:
                 if isinstance(line.justification, Premise):
@@ -192,9 +197,10 @@ class Proof:
                 return True  # TODO: add premises
         return False
 
-    def __str__(self) -> str:
-        result = ""
+    def text_lines(self) -> Generator[str, None, None]:
+        """Yields the lines of the text rendering of the proof, with their line endings"""
         max_number_of_digits = len(str(len(self.steps)))
+        closed_subproofs = self.subproofs_closed_after()
 
         for index, proof_line in enumerate(self.steps):
             justification_str = str(proof_line.justification)
@@ -206,54 +212,51 @@ class Proof:
             line_to_add = line_to_add.ljust(30)
             line_to_add += justification_str
 
-            result += line_to_add + "\n"
+            yield line_to_add + "\n"
 
             try:
                 next_line = self.steps[index + 1]
                 is_last_premise = isinstance(proof_line.justification, Premise) and (
                     not isinstance(next_line.justification, Premise)
                 )
-                add_space_between_subproofs = (
-                    isinstance(next_line.justification, Assumption)
-                    and next_line.subproof_depth == corresponding_proof_depth
-                )
             except IndexError:  # the current line is the last line
                 is_last_premise = False
-                add_space_between_subproofs = False
             if isinstance(proof_line.justification, Assumption) or is_last_premise:
                 # Add a 'bar' after the end of the premises or after an assumption
-                result += " " * (max_number_of_digits + 1) + ("│  " * corresponding_proof_depth) + "├─────────" + "\n"
+                yield " " * (max_number_of_digits + 1) + ("│  " * corresponding_proof_depth) + "├─────────" + "\n"
 
-            if add_space_between_subproofs:
-                result += " " * (max_number_of_digits + 1) + ("│  " * (corresponding_proof_depth - 1)) + "│" + "\n"
+            # Add a space between a subproof ending on this line and a sibling subproof starting on the next one
+            next_subproof = self.subproofs.get(index + 2)
+            if next_subproof is not None and any(
+                subproof.parent is next_subproof.parent for subproof in closed_subproofs.get(index + 1, [])
+            ):
+                yield " " * (max_number_of_digits + 1) + ("│  " * (next_subproof.depth - 1)) + "│" + "\n"
 
-        return result
+    def __str__(self) -> str:
+        return "".join(self.text_lines())
 
-    def latex(self) -> str:
-        result = r"\begin{nd}" + "\n"
+    def latex_lines(self) -> Generator[str, None, None]:
+        """Yields the lines of the LaTeX rendering of the proof, the last one without line ending"""
+        yield r"\begin{nd}" + "\n"
+        closed_subproofs = self.subproofs_closed_after()
         for index, proof_line in enumerate(self.steps):
             line_number = index + 1
-            current_proof_depth = proof_line.subproof_depth
 
             if isinstance(proof_line.justification, Premise):
                 line_to_add = r"\hypo {" + str(line_number) + "} {" + proof_line.sentence.latex() + "} "
             elif isinstance(proof_line.justification, Assumption):
-                result += r"\open" + "\n"
+                yield r"\open" + "\n"
                 line_to_add = r"\hypo {" + str(line_number) + "} {" + proof_line.sentence.latex() + "} "
             else:
                 line_to_add = r"\have {" + str(line_number) + "} {" + proof_line.sentence.latex() + "} "
 
             line_to_add += proof_line.justification.latex()
-            result += line_to_add + "\n"
+            yield line_to_add + "\n"
 
-            if index != len(self.steps) - 1:  # the current line is not the last one
-                if self.steps[index + 1].subproof_depth < current_proof_depth:
-                    result += r"\close" + "\n"
-                elif self.steps[index + 1].subproof_depth == current_proof_depth and isinstance(
-                    self.steps[index + 1].justification, Assumption
-                ):
-                    result += r"\close" + "\n"
+            for _ in closed_subproofs.get(line_number, []):  # one box boundary per subproof ending on this line
+                yield r"\close" + "\n"
 
-        result += r"\end{nd}"
+        yield r"\end{nd}"
 
-        return result
+    def latex(self) -> str:
+        return "".join(self.latex_lines())
@@ -0,0 +1,137 @@
+from fitch_api import *
+from fitch_prover import *
+from pathlib import Path
+import argparse
+import os
+import sys
+
+parser = argparse.ArgumentParser(
+    description="Search for Fitch-style proofs of inferences, and write them as a proof file which can be verified"
+)
+
+parser.add_argument(
+    "inferences",
+    nargs="*",
+    help='the inferences to prove, e.g. "A -> B, B -> C |- A -> C"',
+)
+
+parser.add_argument(
+    "-f",
+    "--goals",
+    help="also prove the goals of the proofs of the file given",
+    metavar="filename",
+)
+
+parser.add_argument(
+    "-i",
+    "--import",
+    dest="import_file",
+    help="apply the theorems proved in the file given (and in its imports), which the output imports",
+    metavar="filename",
+)
+
+parser.add_argument(
+    "-p",
+    "--use-proved",
+    action="store_true",
+    help="also apply the inferences proved before each goal, as the interpreter allows",
+)
+
+parser.add_argument(
+    "-o",
+    "--output",
+    help="write the proofs to the file path given instead of the standard output",
+    metavar="filename",
+)
+
+parser.add_argument(
+    "-t",
+    "--time-limit",
+    type=float,
+    default=DEFAULT_TIME_LIMIT,
+    help=f"the maximum time spent searching for each proof, in seconds (default {DEFAULT_TIME_LIMIT:g})",
+    metavar="seconds",
+)
+
+parser.add_argument(
+    "-n",
+    "--node-limit",
+    type=int,
+    default=DEFAULT_NODE_LIMIT,
+    help=f"the maximum number of subgoals expanded for each proof (default {DEFAULT_NODE_LIMIT})",
+    metavar="number",
+)
+
+parser.add_argument(
+    "--max-depth",
+    type=int,
+    default=DEFAULT_MAX_DEPTH,
+    help=f"the maximum depth of the derivations, in rules applied (default {DEFAULT_MAX_DEPTH})",
+    metavar="number",
+)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    try:
+        goals = [inference_from_str(inference) for inference in args.inferences]
+        if args.goals is not None:
+            scanner = ProofScanner(source_lines(args.goals))
+            goals += [proof_goal_from_str(proof_block.text) for proof_block in scanner.proof_blocks()]
+    except FileNotFoundError:
+        print(f'Error: file "{args.goals}" does not exist', file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print("Error:", str(e), file=sys.stderr)
+        sys.exit(1)
+
+    header = ""  # the import of the theorems applied
+    theorems = []
+    if args.import_file is not None:
+        imported = verify_file(args.import_file)
+        if not imported.success:
+            print(f'Error in "{args.import_file}":', str(imported.error), file=sys.stderr)
+            sys.exit(1)
+        theorems = list(imported.interpreter.all_proved_inferences)
+        # The imports of the output are relative to its directory
+        output_directory = Path(args.output).resolve().parent if args.output is not None else Path.cwd()
+        import_path = os.path.relpath(Path(args.import_file).resolve(), output_directory)
+        header = f"{IMPORT_KEYWORD} {Path(import_path).as_posix()}\n\n"
+
+    search = ProofSearch(theorems, args.time_limit, args.node_limit, args.max_depth)
+    sources = []
+    failed_count = 0
+    for goal in goals:
+        proof = search.prove(goal)
+        message = f"{goal}: {search.status} ({search.nodes} nodes, {search.elapsed * 1000:.1f} ms)"
+        if search.counterexample is not None:
+            message += f", counterexample: {assignment_str(search.counterexample)}"
+        print(message, file=sys.stderr)
+        if proof is None:
+            failed_count += 1
+            continue
+        sources.append(proof_source(proof))
+        if args.use_proved:
+            search.add_theorem(goal)
+
+    source = header + "\n".join(sources)
+
+    # The proofs are checked again by the interpreter, as if the output file was verified
+    result = verify_source(source, args.output if args.output is not None else SOURCE_FILE_NAME)
+    if not result.success:
+        print("Error: the proofs found were rejected by the interpreter:", str(result.error), file=sys.stderr)
+        sys.exit(2)
+
+    if args.output is not None:
+        try:
+            with open(args.output, "w", encoding="utf-8") as file:
+                file.write(source)
+        except FileNotFoundError:
+            print(f'Error: the directory of "{args.output}" does not exist', file=sys.stderr)
+            sys.exit(1)
+    else:
+        sys.stdout.write(source)
+
+    print(f"{len(goals) - failed_count}/{len(goals)} inferences proved", file=sys.stderr)
+    if failed_count != 0:
+        sys.exit(1)
@@ -0,0 +1,553 @@
+from fitch_interpreter import *
+from fitch_truth_tables import *
+from functools import lru_cache
+from time import perf_counter
+
+DEFAULT_TIME_LIMIT = 10.0  # seconds, for each goal
+DEFAULT_NODE_LIMIT = 1000000  # subgoals expanded, for each goal
+DEFAULT_MAX_DEPTH = 40  # of the derivations, in rules applied
+TRUTH_TABLE_LIMIT = 14  # propositions, above which the subgoals are checked with the SAT solver
+SOURCE_INDENTATION = " " * 4  # indentation of each subproof level in the proofs written
+
+PROVED = "proved"
+INVALID = "invalid"
+NOT_FOUND = "no proof found"
+DEPTH_LIMIT_REACHED = "depth limit reached"
+NODE_LIMIT_REACHED = "node limit reached"
+TIME_LIMIT_REACHED = "time limit reached"
+
+UNPROVABLE = float("inf")  # failure depth, in the transposition table, of the subgoals which can't be proved at all
+BOTTOM = Bottom()
+
+
+class SearchLimitReached(Exception):
+    def __init__(self, status: str):
+        super().__init__(status)
+        self.status = status
+
+
+class Derivation:
+    """Derivation of a formula found by the search: the rule concluding it, the derivations of the lines it cites and
+    the subproofs it cites (each given by its assumption and the derivation of its conclusion). The premises and
+    assumptions in scope are the leaves."""
+
+    __slots__ = ("formula", "rule", "lines_cited", "subproofs", "theorem")
+
+    def __init__(
+        self,
+        formula: Formula,
+        rule: type,
+        lines_cited: tuple["Derivation", ...] = (),
+        subproofs: tuple[tuple[Formula, "Derivation"], ...] = (),
+        theorem: Inference = None,
+    ):
+        self.formula = formula
+        self.rule = rule
+        self.lines_cited = lines_cited
+        self.subproofs = subproofs
+        self.theorem = theorem  # of a TheoremApplication
+
+
+class SearchContext:
+    """Hypotheses in scope (the premises and the assumptions of the open subproofs), and the sentences which follow
+    from them by elimination rules alone, with their derivations"""
+
+    def __init__(self, hypotheses: frozenset[Formula], facts: dict = None, antecedents: dict = None):
+        self.hypotheses = hypotheses
+        self.facts = facts if facts is not None else {}  # formula -> derivation
+        # Formula -> conditionals and biconditionals in the facts which can be eliminated once the formula is a fact
+        self.antecedents = antecedents if antecedents is not None else {}
+        self.entailed = {}  # goal -> whether the goal follows from the hypotheses
+        self.consistent = None
+        self.parts = None
+
+    def positive_parts(self) -> list[Formula]:
+        """Returns the formulas which can be obtained from the facts by elimination rules, the facts first"""
+        if self.parts is None:
+            found = dict.fromkeys(self.facts)
+            for formula in self.facts:
+                positive_parts(formula, found)
+            self.parts = list(found)
+        return self.parts
+
+    def extended(self, hypothesis: Derivation) -> "SearchContext":
+        context = SearchContext(self.hypotheses | {hypothesis.formula}, dict(self.facts), dict(self.antecedents))
+        context.add_fact(hypothesis)
+        return context
+
+    def wait_for(self, antecedent: Formula, formula: Formula):
+        self.antecedents[antecedent] = self.antecedents.get(antecedent, ()) + (formula,)
+
+    def add_fact(self, derivation: Derivation):
+        """Adds the formula derived, and everything it gives by elimination rules"""
+        facts = self.facts
+        pending = [derivation]
+        while len(pending) != 0:
+            derivation = pending.pop()
+            formula = derivation.formula
+            if formula in facts:
+                continue
+            facts[formula] = derivation
+
+            if formula.__class__ is And:
+                pending.append(Derivation(formula.a, ConjunctionElim, (derivation,)))
+                pending.append(Derivation(formula.b, ConjunctionElim, (derivation,)))
+            elif formula.__class__ is Not:
+                if formula.a.__class__ is Not:
+                    pending.append(Derivation(formula.a.a, DoubleNegationElim, (derivation,)))
+                if formula.a in facts:
+                    pending.append(Derivation(BOTTOM, NegationElim, (facts[formula.a], derivation)))
+            elif formula.__class__ is Conditional:
+                if formula.a in facts:
+                    pending.append(Derivation(formula.b, ConditionalElim, (facts[formula.a], derivation)))
+                else:
+                    self.wait_for(formula.a, formula)
+            elif formula.__class__ is BiConditional:
+                for side, other_side in ((formula.a, formula.b), (formula.b, formula.a)):
+                    if side in facts:
+                        pending.append(Derivation(other_side, BiConditionalElim, (facts[side], derivation)))
+                    else:
+                        self.wait_for(side, formula)
+
+            # The eliminations which were waiting for this formula
+            negation = Not(formula)
+            if negation in facts:
+                pending.append(Derivation(BOTTOM, NegationElim, (derivation, facts[negation])))
+            for waiting_formula in self.antecedents.get(formula, ()):
+                if waiting_formula.__class__ is Conditional:
+                    rule, conclusion = ConditionalElim, waiting_formula.b
+                else:
+                    rule = BiConditionalElim
+                    conclusion = waiting_formula.b if waiting_formula.a is formula else waiting_formula.a
+                pending.append(Derivation(conclusion, rule, (derivation, facts[waiting_formula])))
+
+
+@lru_cache(maxsize=65536)
+def elimination_chains(formula: Formula, goal: Formula) -> tuple[tuple[tuple, ...], ...]:
+    """Returns the chains of elimination rules leading from the formula to the goal, each step being given as (rule,
+    formula obtained, side premise to prove or None)"""
+    if formula is goal:
+        return ((),)
+    if not goal.propositions() <= formula.propositions():
+        return ()
+
+    if formula.__class__ is And:
+        steps = [(ConjunctionElim, formula.a, None), (ConjunctionElim, formula.b, None)]
+    elif formula.__class__ is Conditional:
+        steps = [(ConditionalElim, formula.b, formula.a)]
+    elif formula.__class__ is BiConditional:
+        steps = [(BiConditionalElim, formula.b, formula.a), (BiConditionalElim, formula.a, formula.b)]
+    elif formula.__class__ is Not and formula.a.__class__ is Not:
+        steps = [(DoubleNegationElim, formula.a.a, None)]
+    else:
+        return ()
+    return tuple((step,) + chain for step in steps for chain in elimination_chains(step[1], goal))
+
+
+def positive_parts(formula: Formula, found: dict[Formula, None]):
+    """Finds the formulas which can be obtained from the formula by elimination rules, given their side premises"""
+    if formula.__class__ is And or formula.__class__ is BiConditional:
+        parts = (formula.a, formula.b)
+    elif formula.__class__ is Conditional:
+        parts = (formula.b,)
+    elif formula.__class__ is Not and formula.a.__class__ is Not:
+        parts = (formula.a.a,)
+    else:
+        return
+    for part in parts:
+        if part not in found:
+            found[part] = None
+            positive_parts(part, found)
+
+
+class ProofSearch:
+    """Goal-directed proof search, with the rules of fitch_rules.py and optionally the theorems given.
+
+    The introduction rules are applied backwards from the goal, and the elimination rules forwards from the hypotheses
+    (or backwards from the goal, when it is part of a hypothesis), an indirect proof being the last resort. The subgoals
+    which don't follow from their hypotheses are pruned, the others being memoized in a transposition table keyed by
+    the hypotheses in scope and the subgoal. The depth of the derivations is increased until a proof is found, within
+    the time and node limits."""
+
+    def __init__(
+        self,
+        theorems: Iterable[Inference] = (),
+        time_limit: float = DEFAULT_TIME_LIMIT,
+        node_limit: int = DEFAULT_NODE_LIMIT,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+    ):
+        # Each theorem with its premises and conclusion, their propositions being metavariables
+        self.theorems = [(theorem, theorem.formulas()[:-1], theorem.conclusion.expr) for theorem in theorems]
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_depth = max_depth
+        # (hypotheses, goal) -> derivation, or the greatest depth at which the goal wasn't proved. The entries stay
+        # valid from one inference to another, so that a search proving many inferences reuses them.
+        self.table = {}
+        self.contexts = {}  # hypotheses -> search context
+        self.in_progress = set()  # (hypotheses, goal) of the subgoals being searched, to cut cycles
+        self.deadline = None
+        self.formula_values = None
+        self.hypotheses_values = {}
+        self.cycle_cuts = 0
+        self.depth_cuts = 0
+        # Results of the last search
+        self.status = None
+        self.nodes = 0
+        self.depth = 0
+        self.counterexample = None
+        self.elapsed = 0.0
+
+    def prove(self, inference: Inference) -> Proof | None:
+        """Returns a proof of the inference, or None if it isn't valid or no proof was found (see status)"""
+        start_time = perf_counter()
+        self.deadline = start_time + self.time_limit
+        self.nodes = 0
+        self.depth = 0
+        self.counterexample = inference_counterexample(inference)
+        # The subgoals are checked with a truth table of the propositions of the inference, if there are few of them
+        propositions = sorted(frozenset().union(*(formula.propositions() for formula in inference.formulas())))
+        self.formula_values = FormulaValues(propositions) if len(propositions) <= TRUTH_TABLE_LIMIT else None
+        self.hypotheses_values = {}  # hypotheses -> bitset of the rows where they are all true
+        derivation = None
+        if self.counterexample is not None:
+            self.status = INVALID
+        else:
+            premises = [Derivation(premise.expr, Premise) for premise in inference.premises]
+            context = self.context(frozenset(premise.formula for premise in premises), premises)
+            self.status = DEPTH_LIMIT_REACHED
+            try:
+                while self.depth < self.max_depth:  # iterative deepening
+                    self.depth += 1
+                    depth_cuts = self.depth_cuts
+                    derivation = self.prove_goal(context, inference.conclusion.expr, self.depth)
+                    if derivation is not None:
+                        self.status = PROVED
+                        break
+                    if self.depth_cuts == depth_cuts:  # the whole search space was explored
+                        self.status = NOT_FOUND
+                        break
+            except SearchLimitReached as e:
+                self.status = e.status
+        self.elapsed = perf_counter() - start_time
+
+        if derivation is None:
+            return None
+        proof_builder = ProofBuilder(inference)
+        proof_builder.conclude(proof_builder.write(derivation), inference.conclusion.expr)
+        return proof_builder.proof
+
+    def add_theorem(self, theorem: Inference):
+        self.theorems.append((theorem, theorem.formulas()[:-1], theorem.conclusion.expr))
+        # The subgoals which weren't proved may be proved with the new theorem
+        self.table = {key: entry for key, entry in self.table.items() if entry.__class__ is Derivation}
+
+    def context(self, hypotheses: frozenset[Formula], new_hypotheses: list[Derivation], parent=None) -> SearchContext:
+        context = self.contexts.get(hypotheses)
+        if context is None:
+            if parent is None:
+                context = SearchContext(frozenset())
+                for hypothesis in new_hypotheses:
+                    context = context.extended(hypothesis)
+            else:
+                context = parent.extended(new_hypotheses[0])
+            self.contexts[hypotheses] = context
+        return context
+
+    def assume(self, context: SearchContext, assumption: Formula) -> SearchContext:
+        return self.context(context.hypotheses | {assumption}, [Derivation(assumption, Assumption)], context)
+
+    def follows(self, context: SearchContext, goal: Formula) -> bool:
+        entailed = context.entailed.get(goal)
+        if entailed is None:
+            if self.formula_values is not None:
+                # Rows where the hypotheses are true, in the truth table of the propositions of the inference
+                hypotheses_values = self.hypotheses_values.get(context.hypotheses)
+                if hypotheses_values is None:
+                    hypotheses_values = self.formula_values.mask
+                    for hypothesis in context.hypotheses:
+                        hypotheses_values &= self.formula_values.value(hypothesis)
+                    self.hypotheses_values[context.hypotheses] = hypotheses_values
+                entailed = hypotheses_values & ~self.formula_values.value(goal) == 0
+            else:
+                hypotheses = tuple(context.hypotheses)
+                if context.consistent is None:
+                    context.consistent = entailment_counterexample(hypotheses, BOTTOM) is not None
+                entailed = not context.consistent or entailment_counterexample(hypotheses, goal) is None
+            context.entailed[goal] = entailed
+        return entailed
+
+    def prove_goal(self, context: SearchContext, goal: Formula, depth: int) -> Derivation | None:
+        fact = context.facts.get(goal)
+        if fact is not None:
+            return fact
+        key = (context.hypotheses, goal)
+        # Checked first: the subgoal may have failed at a lower depth in the previous iteration, but going through it
+        # again is a cycle, not a cut of the depth, or the search wouldn't be seen to finish
+        if key in self.in_progress:
+            self.cycle_cuts += 1  # a proof going through the same subgoal again can be shortened
+            return None
+        entry = self.table.get(key)
+        if entry is not None:
+            if entry.__class__ is Derivation:
+                return entry
+            if entry >= depth:
+                if entry != UNPROVABLE:
+                    self.depth_cuts += 1
+                return None
+        if not self.follows(context, goal):
+            self.table[key] = UNPROVABLE
+            return None
+        if depth == 0:
+            self.depth_cuts += 1
+            return None
+
+        self.nodes += 1
+        if self.nodes > self.node_limit:
+            raise SearchLimitReached(NODE_LIMIT_REACHED)
+        if perf_counter() > self.deadline:
+            raise SearchLimitReached(TIME_LIMIT_REACHED)
+
+        cycle_cuts, depth_cuts = self.cycle_cuts, self.depth_cuts
+        self.in_progress.add(key)
+        try:
+            derivation = self.search(context, goal, depth - 1)
+        finally:
+            self.in_progress.discard(key)
+
+        if derivation is not None:
+            self.table[key] = derivation
+        elif self.depth_cuts == depth_cuts:
+            if self.cycle_cuts == cycle_cuts:  # the failure doesn't depend on the depth, nor on the path
+                self.table[key] = UNPROVABLE
+        else:
+            self.table[key] = depth
+        return derivation
+
+    def search(self, context: SearchContext, goal: Formula, depth: int) -> Derivation | None:
+        """Tries the rules concluding the goal, with the depth given for its subgoals"""
+        derivation = self.prove_by_elimination(context, goal, depth)
+        if derivation is None and len(self.theorems) != 0:
+            derivation = self.prove_by_theorem(context, goal, depth)
+        if derivation is not None:
+            return derivation
+
+        # The introduction rules of these connectives are invertible: their subgoals are valid if the goal is
+        if goal.__class__ is And:
+            derivation_a = self.prove_goal(context, goal.a, depth)
+            derivation_b = derivation_a and self.prove_goal(context, goal.b, depth)
+            return derivation_b and Derivation(goal, ConjunctionIntro, (derivation_a, derivation_b))
+        if goal.__class__ is Conditional:
+            subproof = self.prove_goal(self.assume(context, goal.a), goal.b, depth)
+            return subproof and Derivation(goal, ConditionalIntro, subproofs=((goal.a, subproof),))
+        if goal.__class__ is BiConditional:
+            subproof_1 = self.prove_goal(self.assume(context, goal.a), goal.b, depth)
+            subproof_2 = subproof_1 and self.prove_goal(self.assume(context, goal.b), goal.a, depth)
+            return subproof_2 and Derivation(
+                goal, BiConditionalIntro, subproofs=((goal.a, subproof_1), (goal.b, subproof_2))
+            )
+        if goal.__class__ is Not:
+            subproof = self.prove_goal(self.assume(context, goal.a), BOTTOM, depth)
+            return subproof and Derivation(goal, NegationIntro, subproofs=((goal.a, subproof),))
+
+        if goal.__class__ is Or:
+            for disjunct in (goal.a, goal.b):
+                if self.follows(context, disjunct):
+                    derivation = self.prove_goal(context, disjunct, depth)
+                    if derivation is not None:
+                        return Derivation(goal, DisjunctionIntro, (derivation,))
+        elif goal.__class__ is Bottom:
+            derivation = self.prove_contradiction(context, depth)
+            if derivation is not None:
+                return derivation
+
+        derivation = self.prove_by_cases(context, goal, depth)
+        if derivation is None and goal.__class__ is not Bottom:
+            # Indirect proof: ¬goal leads to a contradiction, hence ¬¬goal, then goal
+            negation = Not(goal)
+            if negation in context.facts:  # the contradiction doesn't depend on the assumption
+                subproof = self.prove_goal(context, BOTTOM, depth)
+            else:
+                subproof = self.prove_goal(self.assume(context, negation), BOTTOM, depth)
+            if subproof is not None:
+                double_negation = Derivation(Not(negation), NegationIntro, subproofs=((negation, subproof),))
+                derivation = Derivation(goal, DoubleNegationElim, (double_negation,))
+        return derivation
+
+    def prove_by_elimination(self, context: SearchContext, goal: Formula, depth: int) -> Derivation | None:
+        """Derives the goal from a fact of which it is a part, proving the side premises of the eliminations"""
+        candidates = []
+        for fact in context.facts.values():
+            for chain in elimination_chains(fact.formula, goal):
+                side_premises = [side_premise for _, _, side_premise in chain if side_premise is not None]
+                if goal not in side_premises:
+                    candidates.append((len(side_premises), fact, chain))
+        candidates.sort(key=lambda candidate: candidate[0])
+
+        for _, fact, chain in candidates:
+            derivation = fact
+            for rule, formula, side_premise in chain:
+                if side_premise is None:
+                    derivation = Derivation(formula, rule, (derivation,))
+                else:
+                    side_derivation = self.prove_goal(context, side_premise, depth)
+                    if side_derivation is None:
+                        break
+                    derivation = Derivation(formula, rule, (side_derivation, derivation))
+            else:
+                return derivation
+        return None
+
+    def prove_contradiction(self, context: SearchContext, depth: int) -> Derivation | None:
+        """Proves ⊥ from a sentence and its negation, the negation being a fact or a part of one"""
+        negations = [formula for formula in context.positive_parts() if formula.__class__ is Not]
+        # The negations which are facts, or negate a fact, first: only one side of the contradiction has to be proved
+        for negation in sorted(
+            negations, key=lambda negation: negation not in context.facts and negation.a not in context.facts
+        ):
+            negation_derivation = self.prove_goal(context, negation, depth)
+            derivation = negation_derivation and self.prove_goal(context, negation.a, depth)
+            if derivation is not None:
+                return Derivation(BOTTOM, NegationElim, (derivation, negation_derivation))
+        return None
+
+    def prove_by_cases(self, context: SearchContext, goal: Formula, depth: int) -> Derivation | None:
+        """Proves the goal in each case of a disjunction which is a fact, or a part of one"""
+        for disjunction in context.positive_parts():
+            if disjunction.__class__ is not Or or disjunction is goal:
+                continue
+            if disjunction.a in context.facts or disjunction.b in context.facts:
+                continue  # the cases would give nothing new
+            subproof_1 = self.prove_goal(self.assume(context, disjunction.a), goal, depth)
+            subproof_2 = subproof_1 and self.prove_goal(self.assume(context, disjunction.b), goal, depth)
+            derivation = subproof_2 and self.prove_goal(context, disjunction, depth)
+            if derivation is not None:
+                return Derivation(
+                    goal, DisjunctionElim, (derivation,), ((disjunction.a, subproof_1), (disjunction.b, subproof_2))
+                )
+        return None
+
+    def prove_by_theorem(self, context: SearchContext, goal: Formula, depth: int) -> Derivation | None:
+        """Applies a theorem concluding the goal, its metavariables which only appear in its premises being bound by
+        matching the premises against the facts"""
+        for theorem, premise_patterns, conclusion_pattern in self.theorems:
+            bindings = {}
+            if not match_formula(conclusion_pattern, goal, bindings):
+                continue
+            for premise_bindings in self.premise_bindings(context, premise_patterns, 0, bindings):
+                premises = [substitute(pattern, premise_bindings) for pattern in premise_patterns]
+                if goal in premises:
+                    continue
+                premise_derivations = []
+                for premise in premises:
+                    derivation = self.prove_goal(context, premise, depth)
+                    if derivation is None:
+                        break
+                    premise_derivations.append(derivation)
+                else:
+                    return Derivation(goal, TheoremApplication, tuple(premise_derivations), theorem=theorem)
+        return None
+
+    def premise_bindings(
+        self, context: SearchContext, premise_patterns: tuple[Formula, ...], index: int, bindings: dict
+    ) -> Generator[dict, None, None]:
+        if index == len(premise_patterns):
+            yield bindings
+            return
+        pattern = premise_patterns[index]
+        if all(name in bindings for name in pattern.propositions()):
+            yield from self.premise_bindings(context, premise_patterns, index + 1, bindings)
+            return
+        for fact in list(context.facts):
+            fact_bindings = dict(bindings)
+            if match_formula(pattern, fact, fact_bindings):
+                yield from self.premise_bindings(context, premise_patterns, index + 1, fact_bindings)
+
+
+def expression_of(formula: Formula) -> Expression:
+    expression = Expression.__new__(Expression)
+    expression.expr = formula
+    return expression
+
+
+class ProofBuilder:
+    """Writes a derivation as a Proof, which checks every line: each formula is derived once in each subproof, and
+    then cited wherever it is in scope"""
+
+    def __init__(self, goal: Inference):
+        self.proof = Proof(goal)
+        self.scopes = [{}]  # formula -> line number, for the main proof then each open subproof
+        for premise in goal.premises:
+            self.proof.add_premise(premise)
+            self.scopes[0].setdefault(premise.expr, len(self.proof.steps))
+
+    def line_of(self, formula: Formula) -> int | None:
+        for scope in reversed(self.scopes):
+            line_number = scope.get(formula)
+            if line_number is not None:
+                return line_number
+        return None
+
+    def write(self, derivation: Derivation) -> int:
+        """Writes the lines deriving the formula if it isn't in scope yet, returning the number of its line"""
+        line_number = self.line_of(derivation.formula)
+        if line_number is not None:
+            return line_number
+        if derivation.rule is Premise or derivation.rule is Assumption:
+            raise ProofError(f"hypothesis '{derivation.formula}' is not in scope")
+
+        lines_cited = [self.write(line_derivation) for line_derivation in derivation.lines_cited]
+        subproofs = [self.write_subproof(assumption, conclusion) for assumption, conclusion in derivation.subproofs]
+        if derivation.rule is TheoremApplication:
+            justification = TheoremApplication(derivation.theorem, lines_cited)
+        elif derivation.rule is DisjunctionElim:
+            justification = DisjunctionElim(lines_cited[0], *subproofs[0], *subproofs[1])
+        elif derivation.rule is BiConditionalIntro:
+            justification = BiConditionalIntro(*subproofs[0], *subproofs[1])
+        elif len(subproofs) != 0:
+            justification = derivation.rule(*subproofs[0])
+        else:
+            justification = derivation.rule(*lines_cited)
+
+        self.proof.add_line(expression_of(derivation.formula), justification)
+        self.scopes[-1][derivation.formula] = len(self.proof.steps)
+        return len(self.proof.steps)
+
+    def write_subproof(self, assumption: Formula, conclusion: Derivation) -> tuple[int, int]:
+        """Writes a subproof, returning its first and last line numbers"""
+        self.proof.add_assumption(expression_of(assumption))
+        start = len(self.proof.steps)
+        self.scopes.append({assumption: start})
+        self.conclude(self.write(conclusion), conclusion.formula)
+        end = len(self.proof.steps)
+        self.proof.discharge_assumption()
+        self.scopes.pop()
+        return start, end
+
+    def conclude(self, line_number: int, formula: Formula):
+        """Makes the formula derived at the line given the last line of the current subproof"""
+        if line_number != len(self.proof.steps):
+            self.proof.add_line(expression_of(formula), Reiteration(line_number))
+
+
+def justification_source(justification: Rule) -> str:
+    if isinstance(justification, TheoremApplication):
+        lines_cited = ", ".join(str(line_cited) for line_cited in justification.lines_cited)
+        return f"apply {justification.theorem} {lines_cited}".rstrip()
+    return str(justification)
+
+
+def proof_source(proof: Proof) -> str:
+    """Returns the proof in the syntax of the proof files, each line being indented by its subproof level"""
+    source_lines = [f"{PROOF_KEYWORD} {proof.goal}"]
+    previous_depth = 0
+    for line_number, proof_line in enumerate(proof.steps, start=1):
+        if isinstance(proof_line.justification, Assumption) and proof_line.subproof_depth == previous_depth:
+            source_lines.append("")  # between two sibling subproofs
+        source_lines.append(
+            SOURCE_INDENTATION * (proof_line.subproof_depth + 1)
+            + f"{line_number}. {proof_line.sentence} {JUSTIFICATION_KEYWORD} "
+            + justification_source(proof_line.justification)
+        )
+        previous_depth = proof_line.subproof_depth
+    return "\n".join(source_lines) + "\n"
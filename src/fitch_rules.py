@@ -1,8 +1,12 @@
 from expressions import *
 from lark import Lark, Tree
-from collections import defaultdict
+from functools import lru_cache
 import re
 
+# Version of the rules and of their verification, part of the keys of the verification cache: it must be increased
+# whenever a change makes different proofs valid, or changes the classes stored in the cache
+RULES_VERSION = "2"
+
 
 class Rule:
     pass
@@ -286,22 +290,55 @@ class DoubleNegationElim(RuleCitingOneLine):
         return Not(Not(conclusion.expr)) == line_content.expr
 
 
-def make_regex_from_expr(expr: Expression) -> str:
-    expr_props = expr.propositions()
-    expr_str = str(expr)
-    expr_str = expr_str.replace("(", r"\(").replace(")", r"\)")
-    for prop in expr_props:
-        # For every proposition in the formula, we first replace it by its regex definition
-        expr_str = expr_str.replace(prop, f"(?P<{prop}>.*)", count=1)
-        # We then replace the backreferences
-        expr_str = re.sub(f"([\\s\\(])({prop})", r"\1(?P=\2)", expr_str)
-    return expr_str
+def match_formula(pattern: Formula, formula: Formula, bindings: dict[str, Formula]) -> bool:
+    """Matches the formula against the pattern, whose propositions are metavariables, and extends the bindings"""
+    if pattern.__class__ is Proposition:
+        bound_formula = bindings.get(pattern.name)
+        if bound_formula is None:
+            bindings[pattern.name] = formula
+            return True
+        return bound_formula is formula  # formulas are interned
+    if pattern.__class__ is not formula.__class__:
+        return False
+    if isinstance(pattern, BinaryConnective):
+        return match_formula(pattern.a, formula.a, bindings) and match_formula(pattern.b, formula.b, bindings)
+    if pattern.__class__ is Not:
+        return match_formula(pattern.a, formula.a, bindings)
+    return True  # ⊤ or ⊥
+
+
+class TheoremPattern:
+    """Premises and conclusion of a theorem, matched together against the lines cited and the line concluded"""
+
+    def __init__(self, formulas: tuple[Formula, ...]):
+        self.formulas = formulas  # the premises, then the conclusion
+
+    def match(self, formulas: tuple[Formula, ...]) -> dict[str, Formula] | None:
+        """Returns the bindings of the metavariables if the formulas are an instance of the theorem"""
+        if len(formulas) != len(self.formulas):
+            return None
+        bindings = {}
+        for pattern, formula in zip(self.formulas, formulas):
+            if not match_formula(pattern, formula, bindings):
+                return None
+        return bindings
+
+
+@lru_cache(maxsize=1024)
+def compile_theorem_pattern(theorem_formulas: tuple[Formula, ...]) -> TheoremPattern:
+    return TheoremPattern(theorem_formulas)
+
+
+@lru_cache(maxsize=65536)
+def theorem_applies(theorem_formulas: tuple[Formula, ...], formulas: tuple[Formula, ...]) -> bool:
+    return compile_theorem_pattern(theorem_formulas).match(formulas) is not None
 
 
 class TheoremApplication(Rule):
-    def __init__(self, theorem: Inference, lines_cited: list[int]):
+    def __init__(self, theorem: Inference | None, lines_cited: list[int]):
         self.theorem = theorem
         self.lines_cited = lines_cited
+        self.inferred = theorem is None  # the theorem applied is found by the interpreter
 
     def __str__(self) -> str:
         if len(self.lines_cited) != 0:
@@ -321,45 +358,116 @@ class TheoremApplication(Rule):
     def verify(self, lines_cited_content: list[Expression], conclusion: Expression) -> bool:
         if len(lines_cited_content) != len(self.theorem.premises):
             return False
+        # The results are memoized by theorem, lines cited and conclusion
+        return theorem_applies(
+            self.theorem.formulas(),
+            tuple(line_content.expr for line_content in lines_cited_content) + (conclusion.expr,),
+        )
+
+
+class JustificationSyntaxError(ValueError):
+    pass
 
-        proposition_matches = defaultdict(list)
-        for index, premise in enumerate(self.theorem.premises):
-            corresponding_line = lines_cited_content[index]
-            premise_regex = make_regex_from_expr(premise)
-            match_found = re.fullmatch(premise_regex, str(corresponding_line))
-
-            if match_found is None:  # the premise isn't in the required form
-                return False
-
-            match_dict = match_found.groupdict()
-            for (
-                key,
-                value,
-            ) in match_dict.items():  # the key is a (meta) proposition and the value a match str found for it
-                previous_matches = proposition_matches[key]
-                for previous_match in previous_matches:
-                    if Expression(value) != Expression(previous_match):  # one of the (meta) proposition doesn't match
-                        return False
-                proposition_matches[key].append(value)
-
-        conclusion_regex = make_regex_from_expr(self.theorem.conclusion)
-        match_found = re.fullmatch(conclusion_regex, str(conclusion))
-
-        if match_found is None:
-            return False
 
-        # Same procedure as for the premises
-        match_dict = match_found.groupdict()
-        for key, value in match_dict.items():
-            previous_matches = proposition_matches[key]
-            for previous_match in previous_matches:
-                if Expression(value) != Expression(previous_match):
-                    return False
-            proposition_matches[key].append(value)
+# Argument shapes of the justifications: "n" stands for a line number
+JUSTIFICATION_KEYWORDS = {
+    "R": (Reiteration, "n"),
+    "vI": (DisjunctionIntro, "n"),
+    "∨I": (DisjunctionIntro, "n"),
+    "|I": (DisjunctionIntro, "n"),
+    "vE": (DisjunctionElim, "n,n-n,n-n"),
+    "∨E": (DisjunctionElim, "n,n-n,n-n"),
+    "|E": (DisjunctionElim, "n,n-n,n-n"),
+    "&I": (ConjunctionIntro, "n,n"),
+    "∧I": (ConjunctionIntro, "n,n"),
+    "&E": (ConjunctionElim, "n"),
+    "∧E": (ConjunctionElim, "n"),
+    "->I": (ConditionalIntro, "n-n"),
+    "→I": (ConditionalIntro, "n-n"),
+    "->E": (ConditionalElim, "n,n"),
+    "→E": (ConditionalElim, "n,n"),
+    "~I": (NegationIntro, "n-n"),
+    "¬I": (NegationIntro, "n-n"),
+    "~E": (NegationElim, "n,n"),
+    "¬E": (NegationElim, "n,n"),
+    "<->I": (BiConditionalIntro, "n-n,n-n"),
+    "↔I": (BiConditionalIntro, "n-n,n-n"),
+    "<->E": (BiConditionalElim, "n,n"),
+    "↔E": (BiConditionalElim, "n,n"),
+    "DNE": (DoubleNegationElim, "n"),
+    "~~E": (DoubleNegationElim, "n"),
+    "¬¬E": (DoubleNegationElim, "n"),
+    "PR": (Premise, ""),
+    "Pr": (Premise, ""),
+    "Premise": (Premise, ""),
+    "AS": (Assumption, ""),
+    "As": (Assumption, ""),
+    "Assumption": (Assumption, ""),
+    "apply": (TheoremApplication, None),
+    "Apply": (TheoremApplication, None),
+}
+
+# Longest keywords first, so that the alternation takes the longest keyword matching (e.g. "~~E" rather than "~E")
+JUSTIFICATION_KEYWORD_REGEX = re.compile(
+    r"[ \t\f\r\n]*("
+    + "|".join(re.escape(keyword) for keyword in sorted(JUSTIFICATION_KEYWORDS, key=len, reverse=True))
+    + ")"
+)
+JUSTIFICATION_ARGUMENT_REGEX = re.compile(r"[ \t\f\r\n]*([0-9]+|[,-])")
+WHITESPACE_REGEX = re.compile(r"[ \t\f\r\n]*")
+LINE_NUMBER_LIST_REGEX = re.compile(r"n(,n)*")
+FIRST_DIGIT_REGEX = re.compile(r"[0-9]")
+
+
+def scan_arguments(justification: str, position: int) -> tuple[str, list[int]]:
+    """Returns the shape of the arguments found from the position given, and the line numbers they contain"""
+    shape = ""
+    line_numbers = []
+    match = JUSTIFICATION_ARGUMENT_REGEX.match
+    while True:
+        argument_match = match(justification, position)
+        if argument_match is None:
+            break
+        argument = argument_match.group(1)
+        if argument == "," or argument == "-":
+            shape += argument
+        else:
+            shape += "n"
+            line_numbers.append(int(argument))
+        position = argument_match.end()
 
-        return True
+    if WHITESPACE_REGEX.match(justification, position).end() != len(justification):
+        raise JustificationSyntaxError(f"unexpected character '{justification[position:].lstrip()[0]}'")
+    return shape, line_numbers
 
 
+def justification_from_str(justification: str) -> Rule:
+    """Scans the justification in a single left to right pass"""
+    keyword_match = JUSTIFICATION_KEYWORD_REGEX.match(justification)
+    if keyword_match is None:
+        raise JustificationSyntaxError(f"unknown rule in justification '{justification}'")
+    justification_class, expected_shape = JUSTIFICATION_KEYWORDS[keyword_match.group(1)]
+    position = keyword_match.end()
+
+    if justification_class is TheoremApplication:
+        # The inference goes up to the first line number, as formulas never contain digits
+        digit_match = FIRST_DIGIT_REGEX.search(justification, position)
+        inference_end = digit_match.start() if digit_match is not None else len(justification)
+        inference_str = justification[position:inference_end]
+        shape, line_numbers = scan_arguments(justification, inference_end)
+        if shape != "" and LINE_NUMBER_LIST_REGEX.fullmatch(shape) is None:
+            raise JustificationSyntaxError(f"invalid line numbers in justification '{justification}'")
+        if inference_str.strip() == "":  # the theorem is found by the interpreter from the lines cited
+            return TheoremApplication(theorem=None, lines_cited=line_numbers)
+        return TheoremApplication(theorem=inference_from_str(inference_str), lines_cited=line_numbers)
+
+    shape, line_numbers = scan_arguments(justification, position)
+    if shape != expected_shape:
+        raise JustificationSyntaxError(f"invalid line numbers in justification '{justification}'")
+    return justification_class(*line_numbers)
+
+
+# Lark grammar of justifications, kept as a reference for justification_from_str
 justification_grammar = r"""
 start: justification
 LINE_NUM: INT
@@ -389,7 +497,7 @@ justification: "R" LINE_NUM                                      -> reiteration
 %ignore WS
 """
 
-justification_parser = Lark(justification_grammar, lexer="dynamic_complete")
+justification_parser = None  # only built when first needed
 
 
 def parse_justification(tree: Tree) -> Rule:
@@ -425,16 +533,22 @@ def parse_justification(tree: Tree) -> Rule:
         case "assumption":
             justification_class = Assumption
         case "apply_tautology":
-            return TheoremApplication(theorem=inference_from_str(tree.children[0]), lines_cited=[])
+            return TheoremApplication(theorem=lark_inference_from_str(tree.children[0]), lines_cited=[])
         case "apply_with_premise":
-            return TheoremApplication(theorem=inference_from_str(tree.children[0]), lines_cited=[int(tree.children[1])])
+            return TheoremApplication(
+                theorem=lark_inference_from_str(tree.children[0]), lines_cited=[int(tree.children[1])]
+            )
         case "apply_with_premises":
             return TheoremApplication(
-                theorem=inference_from_str(tree.children[0]), lines_cited=[int(child) for child in tree.children[1:]]
+                theorem=lark_inference_from_str(tree.children[0]),
+                lines_cited=[int(child) for child in tree.children[1:]],
             )
 
     return justification_class(*[int(child) for child in tree.children])
 
 
-def justification_from_str(justification: str) -> Rule:
+def lark_justification_from_str(justification: str) -> Rule:
+    global justification_parser
+    if justification_parser is None:
+        justification_parser = Lark(justification_grammar, parser="lalr", cache=True)
     return parse_justification(tree=justification_parser.parse(justification))
@@ -0,0 +1,308 @@
+from expressions import *
+from functools import lru_cache
+import heapq
+
+ACTIVITY_DECAY = 0.95  # of the variable activities, after each conflict
+ACTIVITY_LIMIT = 1e100  # above this activity, all the activities are rescaled
+RESTART_INTERVAL = 100  # conflicts, multiplied by the Luby sequence
+
+
+class TseitinEncoder:
+    """Encodes formulas into an equisatisfiable set of clauses in conjunctive normal form, with a variable for each
+    proposition and each binary connective. Literals are non-zero integers, negative for a negated variable."""
+
+    def __init__(self):
+        self.variable_count = 0
+        self.clauses = []
+        self.proposition_variables = {}  # proposition name -> variable
+        self.literals = {}  # formula node -> literal equivalent to it
+        self.true_literal = None
+
+    def new_variable(self) -> int:
+        self.variable_count += 1
+        return self.variable_count
+
+    def literal(self, formula: Formula) -> int:
+        """Returns a literal equivalent to the formula, adding the clauses defining it. The subformulas are encoded
+        first, iteratively so that the depth of the formulas isn't limited by the depth of the Python stack."""
+        stack = [formula]
+        while len(stack) != 0:
+            node = stack[-1]
+            if node in self.literals:  # a subformula shared by both sides
+                stack.pop()
+                continue
+            subformulas = [
+                child for child in node._children_args() if isinstance(child, Formula) and child not in self.literals
+            ]
+            if len(subformulas) != 0:
+                stack += reversed(subformulas)  # the left side is encoded first
+                continue
+            stack.pop()
+            self.literals[node] = self.node_literal(node)
+        return self.literals[formula]
+
+    def node_literal(self, formula: Formula) -> int:
+        """Returns a literal equivalent to a formula whose subformulas are encoded, adding the clauses defining it"""
+        if formula.__class__ is Proposition:
+            literal = self.new_variable()
+            self.proposition_variables[formula.name] = literal
+        elif formula.__class__ is Top or formula.__class__ is Bottom:
+            if self.true_literal is None:
+                self.true_literal = self.new_variable()
+                self.clauses.append([self.true_literal])
+            literal = self.true_literal if formula.__class__ is Top else -self.true_literal
+        elif formula.__class__ is Not:
+            literal = -self.literals[formula.a]
+        else:
+            a = self.literals[formula.a]
+            b = self.literals[formula.b]
+            literal = self.new_variable()
+            if formula.__class__ is And:
+                self.clauses += [[-literal, a], [-literal, b], [literal, -a, -b]]
+            elif formula.__class__ is Or:
+                self.clauses += [[-literal, a, b], [literal, -a], [literal, -b]]
+            elif formula.__class__ is Conditional:
+                self.clauses += [[-literal, -a, b], [literal, a], [literal, -b]]
+            else:  # biconditional
+                self.clauses += [[-literal, -a, b], [-literal, a, -b], [literal, a, b], [literal, -a, -b]]
+        return literal
+
+    def assert_formula(self, formula: Formula, value: bool = True):
+        literal = self.literal(formula)
+        self.clauses.append([literal if value else -literal])
+
+
+def luby(index: int) -> int:
+    """Returns the index-th term (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1..."""
+    size, power = 1, 0
+    while size < index + 1:
+        size = 2 * size + 1
+        power += 1
+    while size - 1 != index:
+        size = (size - 1) // 2
+        power -= 1
+        index %= size
+    return 2**power
+
+
+class SatSolver:
+    """Conflict-driven clause learning SAT solver: unit propagation with two watched literals, first unique
+    implication point learning with non-chronological backjumping, activity-based decisions with phase saving, and
+    restarts following the Luby sequence"""
+
+    def __init__(self, variable_count: int, clauses: list[list[int]]):
+        self.variable_count = variable_count
+        self.values = [0] * (variable_count + 1)  # variable -> 1 (true), -1 (false) or 0 (unassigned)
+        self.levels = [0] * (variable_count + 1)  # variable -> decision level of its assignment
+        self.reasons = [None] * (variable_count + 1)  # variable -> clause which implied its assignment
+        self.saved_phases = [-1] * (variable_count + 1)  # variable -> its last value
+        self.activities = [0.0] * (variable_count + 1)
+        self.activity_increment = 1.0
+        self.decision_queue = [(0.0, variable) for variable in range(1, variable_count + 1)]
+        self.trail = []  # literals assigned, in order
+        self.trail_limits = []  # length of the trail before each decision
+        self.propagated = 0  # number of literals of the trail propagated
+        self.watches = {}  # literal -> clauses watching it (their first two literals are watched)
+        self.unsatisfiable = False
+
+        for clause in clauses:
+            clause = list(dict.fromkeys(clause))  # without duplicate literals
+            if any(-literal in clause for literal in clause):
+                continue  # always satisfied
+            if len(clause) == 0:
+                self.unsatisfiable = True
+            elif len(clause) == 1:
+                if self.literal_value(clause[0]) == -1:
+                    self.unsatisfiable = True
+                elif self.literal_value(clause[0]) == 0:
+                    self.assign(clause[0], None)
+            else:
+                self.watch(clause)
+
+    def literal_value(self, literal: int) -> int:
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def watch(self, clause: list[int]):
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def assign(self, literal: int, reason: list[int] | None):
+        variable = abs(literal)
+        self.values[variable] = 1 if literal > 0 else -1
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self) -> list[int] | None:
+        """Propagates the literals assigned, returning a conflicting clause if one is found"""
+        values = self.values
+        watches = self.watches
+        while self.propagated < len(self.trail):
+            false_literal = -self.trail[self.propagated]
+            self.propagated += 1
+            watching_clauses = watches.get(false_literal)
+            if not watching_clauses:
+                continue
+            kept_clauses = []
+            conflict = None
+            for position, clause in enumerate(watching_clauses):
+                # The false literal is moved to the second position, the other watched literal being the first
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first_literal = clause[0]
+                first_value = values[abs(first_literal)] if first_literal > 0 else -values[abs(first_literal)]
+                if first_value == 1:
+                    kept_clauses.append(clause)
+                    continue
+                for index in range(2, len(clause)):
+                    literal = clause[index]
+                    if (values[abs(literal)] if literal > 0 else -values[abs(literal)]) != -1:
+                        clause[1], clause[index] = literal, false_literal
+                        watches.setdefault(literal, []).append(clause)
+                        break
+                else:  # no other literal can be watched: the clause is unit or conflicting
+                    kept_clauses.append(clause)
+                    if first_value == -1:
+                        conflict = clause
+                        kept_clauses += watching_clauses[position + 1 :]
+                        break
+                    self.assign(first_literal, clause)
+            watches[false_literal] = kept_clauses
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict: list[int]) -> tuple[list[int], int]:
+        """Returns the clause learnt from a conflict, its first literal being asserted after backjumping, and the
+        decision level to backjump to"""
+        decision_level = len(self.trail_limits)
+        learnt_clause = [0]  # the asserting literal is set at the end
+        seen = set()
+        current_level_count = 0  # literals of the current level left to resolve
+        clause = conflict
+        implied_literal = None
+        trail_index = len(self.trail) - 1
+        while True:
+            for literal in clause if implied_literal is None else clause[1:]:
+                variable = abs(literal)
+                if variable not in seen and self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bump_activity(variable)
+                    if self.levels[variable] == decision_level:
+                        current_level_count += 1
+                    else:
+                        learnt_clause.append(literal)
+            while abs(self.trail[trail_index]) not in seen:
+                trail_index -= 1
+            implied_literal = self.trail[trail_index]
+            trail_index -= 1
+            current_level_count -= 1
+            if current_level_count == 0:
+                break
+            clause = self.reasons[abs(implied_literal)]
+
+        learnt_clause[0] = -implied_literal
+        backjump_level = 0
+        if len(learnt_clause) > 1:
+            # The literal of the highest level is watched with the asserting literal
+            highest_index = max(range(1, len(learnt_clause)), key=lambda index: self.levels[abs(learnt_clause[index])])
+            learnt_clause[1], learnt_clause[highest_index] = learnt_clause[highest_index], learnt_clause[1]
+            backjump_level = self.levels[abs(learnt_clause[1])]
+        return learnt_clause, backjump_level
+
+    def bump_activity(self, variable: int):
+        self.activities[variable] += self.activity_increment
+        if self.activities[variable] > ACTIVITY_LIMIT:
+            self.activities = [activity / ACTIVITY_LIMIT for activity in self.activities]
+            self.activity_increment /= ACTIVITY_LIMIT
+            self.decision_queue = [(-self.activities[variable], variable) for _, variable in self.decision_queue]
+            heapq.heapify(self.decision_queue)
+        if self.values[variable] == 0:
+            heapq.heappush(self.decision_queue, (-self.activities[variable], variable))
+
+    def backtrack(self, level: int):
+        if len(self.trail_limits) <= level:
+            return
+        trail_limit = self.trail_limits[level]
+        for literal in self.trail[trail_limit:]:
+            variable = abs(literal)
+            self.saved_phases[variable] = self.values[variable]
+            self.values[variable] = 0
+            self.reasons[variable] = None
+            heapq.heappush(self.decision_queue, (-self.activities[variable], variable))
+        del self.trail[trail_limit:]
+        del self.trail_limits[level:]
+        self.propagated = len(self.trail)
+
+    def decision_variable(self) -> int | None:
+        """Returns the unassigned variable with the highest activity, or None if all the variables are assigned"""
+        while len(self.decision_queue) != 0:
+            _, variable = heapq.heappop(self.decision_queue)
+            if self.values[variable] == 0:
+                return variable
+        return None
+
+    def solve(self) -> list[int] | None:
+        """Returns a satisfying assignment (the value of each variable, 1 or -1, from index 1), or None if the
+        clauses are unsatisfiable"""
+        if self.unsatisfiable:
+            return None
+        conflict_count = 0
+        restart_count = 1
+        next_restart = RESTART_INTERVAL * luby(restart_count)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if len(self.trail_limits) == 0:
+                    return None
+                learnt_clause, backjump_level = self.analyze(conflict)
+                self.backtrack(backjump_level)
+                if len(learnt_clause) == 1:
+                    self.assign(learnt_clause[0], None)
+                else:
+                    self.watch(learnt_clause)
+                    self.assign(learnt_clause[0], learnt_clause)
+                self.activity_increment /= ACTIVITY_DECAY
+                conflict_count += 1
+                if conflict_count >= next_restart:
+                    self.backtrack(0)
+                    restart_count += 1
+                    next_restart = conflict_count + RESTART_INTERVAL * luby(restart_count)
+            else:
+                variable = self.decision_variable()
+                if variable is None:
+                    return self.values
+                self.trail_limits.append(len(self.trail))
+                self.assign(variable if self.saved_phases[variable] == 1 else -variable, None)
+
+
+@lru_cache(maxsize=4096)
+def entailment_counterexample(premises: tuple[Formula, ...], conclusion: Formula) -> dict[str, bool] | None:
+    """Returns an assignment of the propositions making the premises true and the conclusion false, or None if the
+    premises entail the conclusion"""
+    encoder = TseitinEncoder()
+    for premise in premises:
+        encoder.assert_formula(premise)
+    encoder.assert_formula(conclusion, False)
+    values = SatSolver(encoder.variable_count, encoder.clauses).solve()
+    if values is None:
+        return None
+
+    propositions = {}  # in order of first occurrence
+    for formula in premises + (conclusion,):
+        propositions_in_order(formula, propositions)
+    return {name: values[encoder.proposition_variables[name]] == 1 for name in propositions}
+
+
+def inference_counterexample(inference: Inference) -> dict[str, bool] | None:
+    """Returns an assignment of the propositions falsifying the inference, or None if it is valid"""
+    return entailment_counterexample(tuple(premise.expr for premise in inference.premises), inference.conclusion.expr)
+
+
+def is_valid(inference: Inference) -> bool:
+    return inference_counterexample(inference) is None
+
+
+def assignment_str(assignment: dict[str, bool]) -> str:
+    return ", ".join(f"{name} = {'true' if value else 'false'}" for name, value in assignment.items())
@@ -0,0 +1,360 @@
+from fitch_api import *
+from fitch_format import *
+from fitch_watch import *
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+import argparse
+import json
+import os
+import socket
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+VERIFICATION_FAILED = -32000
+
+MAX_MEMO_ENTRIES = 100_000  # above this number, the proofs not used since the last prune are forgotten
+
+
+class RequestError(Exception):
+    def __init__(self, code: int, message: str, data=None):
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+def read_message(stream) -> dict | None:
+    """Reads a message framed as in the Language Server Protocol (a Content-Length header, a blank line and the JSON
+    content), returning None at the end of the stream"""
+    content_length = None
+    while True:
+        header = stream.readline()
+        if header == b"":
+            return None
+        header = header.strip()
+        if header == b"":
+            if content_length is not None:
+                break
+            continue
+        name, _, value = header.decode("ascii").partition(":")
+        if name.strip().lower() == "content-length":
+            content_length = int(value.strip())
+    content = stream.read(content_length)
+    if len(content) < content_length:
+        return None
+    return json.loads(content)
+
+
+def write_message(stream, message: dict):
+    content = json.dumps(message, ensure_ascii=False).encode()
+    stream.write(f"Content-Length: {len(content)}\r\n\r\n".encode("ascii") + content)
+    stream.flush()
+
+
+def path_from_uri(uri: str) -> Path:
+    parsed_uri = urlparse(uri)
+    if parsed_uri.scheme != "file":
+        raise RequestError(INVALID_PARAMS, f"unsupported URI '{uri}', only file URIs are supported")
+    return Path(url2pathname(unquote(parsed_uri.path)))
+
+
+def diagnostic(error: FitchError) -> dict:
+    return {"file": str(error.file), "line": error.line_number, "message": error.message}
+
+
+def lsp_diagnostic(error: FitchError, path: Path) -> dict:
+    """Returns the diagnostic of the error for the document at the path given (an error in an imported file is shown
+    on the first line of the document)"""
+    in_document = Path(error.file).resolve() == path.resolve()
+    line = max(error.line_number - 1, 0) if in_document else 0
+    return {
+        "range": {"start": {"line": line, "character": 0}, "end": {"line": line + 1, "character": 0}},
+        "severity": 1,
+        "source": "fitch",
+        "message": error.message if in_document else str(error),
+    }
+
+
+class FitchServer:
+    """Long-lived verification server, answering JSON-RPC requests framed as in the Language Server Protocol.
+
+    The parsers, the caches of parsed formulas and the verified proofs stay in memory between the requests. The files
+    verified are read again for each request, and a proof is only verified again if it changed, or if a theorem it
+    applies is no longer proved (see ProofMemo). The imported files are only interpreted again once they change."""
+
+    def __init__(self, verification_cache: VerificationCache = None):
+        self.verification_cache = verification_cache
+        self.proof_memo = ProofMemo()
+        self.module_registry = ModuleRegistry()  # the imported files, kept between the requests
+        self.module_stamps = {}  # key of an imported file -> its stamp (see file_stamp) when it was interpreted
+        self.open_documents = {}  # URI -> text of the documents opened by an LSP client
+        self.shutdown_requested = False
+        self.exit_requested = False
+        self.methods = {
+            "verify": self.verify,
+            "render": self.render,
+            "format": self.format,
+            "shutdown": self.shutdown,
+            "exit": self.exit,
+            # Language Server Protocol
+            "initialize": self.initialize,
+            "initialized": lambda params: None,
+            "textDocument/didOpen": self.did_open,
+            "textDocument/didChange": self.did_change,
+            "textDocument/didSave": self.did_save,
+            "textDocument/didClose": self.did_close,
+            "textDocument/formatting": self.formatting,
+        }
+        self.notifications = []  # notifications to send after the response of the current message
+
+    def interpret(
+        self, path, text: str = None, output: bool = False
+    ) -> tuple[FitchInterpreter, list[str], FitchError | None]:
+        """Interprets a file, or the text given (named path), returning the interpreter, its output and the error
+        found, if any"""
+        self.forget_changed_modules()
+        interpreter = FitchInterpreter(
+            path, self.module_registry, self.verification_cache, self.proof_memo, source=text
+        )
+        output_parts = []
+        error = None
+        try:
+            for output_part in interpreter.interpret_code(output):
+                output_parts.append(output_part)
+        except FitchError as e:
+            error = e
+        except FileNotFoundError:
+            raise RequestError(INVALID_PARAMS, f'file "{path}" does not exist')
+        finally:
+            for key in self.module_registry.modules.keys() - self.module_stamps.keys():
+                self.module_stamps[key] = file_stamp(key)
+
+        if len(self.proof_memo.entries) > MAX_MEMO_ENTRIES:
+            self.proof_memo.prune()
+        return interpreter, output_parts, error
+
+    def forget_changed_modules(self):
+        """Removes from the module registry the imported files which changed since they were interpreted, and the
+        files importing them, directly or not"""
+        changed_keys = {key for key, stamp in self.module_stamps.items() if file_stamp(key) != stamp}
+        while len(changed_keys) != 0:
+            for key in changed_keys:
+                self.module_registry.modules.pop(key, None)
+                self.module_stamps.pop(key, None)
+            changed_keys = {
+                key
+                for key, module in self.module_registry.modules.items()
+                if any(imported_key not in self.module_registry.modules for imported_key in module.imported_keys)
+            }
+
+    def path_param(self, params: dict) -> Path:
+        if "path" in params:
+            return Path(params["path"])
+        if "uri" in params:
+            return path_from_uri(params["uri"])
+        if "text" in params:  # the imports are relative to the working directory of the server
+            return Path(SOURCE_FILE_NAME)
+        raise RequestError(INVALID_PARAMS, "expected a path, a uri or a text parameter")
+
+    def verify(self, params: dict) -> dict:
+        interpreter, _, error = self.interpret(self.path_param(params), params.get("text"))
+        return {
+            "success": error is None,
+            "diagnostics": [] if error is None else [diagnostic(error)],
+            "proofs": [str(proof.goal) for proof in interpreter.proofs_list],
+        }
+
+    def render(self, params: dict) -> dict:
+        output_format = params.get("format", "text")
+        if output_format not in ("text", "latex"):
+            raise RequestError(INVALID_PARAMS, f"unknown format '{output_format}', expected text or latex")
+
+        interpreter, output, error = self.interpret(self.path_param(params), params.get("text"), output=True)
+        if error is not None:
+            raise RequestError(VERIFICATION_FAILED, str(error), {"diagnostics": [diagnostic(error)]})
+        if output_format == "latex":
+            return {"output": interpreter.generate_latex_document()}
+        return {"output": "".join(output)}  # as printed by fitch_cli.py
+
+    def format(self, params: dict) -> dict:
+        if "text" in params:
+            return {"text": format_source(params["text"])}
+        try:
+            with open(self.path_param(params), "r") as file:
+                return {"text": format_source(file.read())}
+        except FileNotFoundError:
+            raise RequestError(INVALID_PARAMS, f'file "{params.get("path", params.get("uri"))}" does not exist')
+
+    def shutdown(self, params: dict):
+        self.shutdown_requested = True
+        return None
+
+    def exit(self, params: dict):
+        self.exit_requested = True
+        return None
+
+    def initialize(self, params: dict) -> dict:
+        return {
+            "capabilities": {
+                "textDocumentSync": {"openClose": True, "change": 1, "save": True},  # the full text is sent
+                "documentFormattingProvider": True,
+            },
+            "serverInfo": {"name": "fitch"},
+        }
+
+    def publish_diagnostics(self, uri: str):
+        path = path_from_uri(uri)
+        _, _, error = self.interpret(path, self.open_documents.get(uri))
+        self.notifications.append(
+            {
+                "jsonrpc": "2.0",
+                "method": "textDocument/publishDiagnostics",
+                "params": {"uri": uri, "diagnostics": [] if error is None else [lsp_diagnostic(error, path)]},
+            }
+        )
+
+    def did_open(self, params: dict):
+        self.open_documents[params["textDocument"]["uri"]] = params["textDocument"]["text"]
+        self.publish_diagnostics(params["textDocument"]["uri"])
+
+    def did_change(self, params: dict):
+        self.open_documents[params["textDocument"]["uri"]] = params["contentChanges"][-1]["text"]
+        self.publish_diagnostics(params["textDocument"]["uri"])
+
+    def did_save(self, params: dict):
+        self.publish_diagnostics(params["textDocument"]["uri"])
+
+    def did_close(self, params: dict):
+        self.open_documents.pop(params["textDocument"]["uri"], None)
+
+    def formatting(self, params: dict) -> list[dict]:
+        uri = params["textDocument"]["uri"]
+        text = self.open_documents.get(uri)
+        if text is None:
+            with open(path_from_uri(uri), "r") as file:
+                text = file.read()
+        formatted_text = format_source(text)
+        if formatted_text == text:
+            return []
+        line_count = len(text.splitlines())
+        whole_document = {"start": {"line": 0, "character": 0}, "end": {"line": line_count + 1, "character": 0}}
+        return [{"range": whole_document, "newText": formatted_text}]
+
+    def handle_message(self, message) -> dict | None:
+        """Returns the response to a message, or None for a notification"""
+        if not isinstance(message, dict) or not isinstance(message.get("method"), str):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": INVALID_REQUEST, "message": "invalid request"}}
+
+        is_notification = "id" not in message
+        try:
+            if self.shutdown_requested and message["method"] != "exit":
+                raise RequestError(INVALID_REQUEST, "the server is shutting down, only exit is accepted")
+            method = self.methods.get(message["method"])
+            if method is None:
+                raise RequestError(METHOD_NOT_FOUND, f"unknown method '{message['method']}'")
+            params = message.get("params") or {}
+            if not isinstance(params, dict):
+                raise RequestError(INVALID_PARAMS, "expected named parameters")
+            result = method(params)
+        except RequestError as e:
+            error = {"code": e.code, "message": e.message}
+            if e.data is not None:
+                error["data"] = e.data
+            return None if is_notification else {"jsonrpc": "2.0", "id": message["id"], "error": error}
+        except (KeyError, TypeError, ValueError, OSError) as e:
+            error = {"code": INVALID_PARAMS, "message": f"invalid parameters ({type(e).__name__}: {e})"}
+            return None if is_notification else {"jsonrpc": "2.0", "id": message["id"], "error": error}
+        except Exception as e:  # a request must never stop the server (e.g. a RecursionError on a deep formula)
+            error = {"code": INTERNAL_ERROR, "message": f"internal error ({type(e).__name__}: {e})"}
+            return None if is_notification else {"jsonrpc": "2.0", "id": message["id"], "error": error}
+
+        return None if is_notification else {"jsonrpc": "2.0", "id": message["id"], "result": result}
+
+    def serve(self, input_stream, output_stream):
+        """Answers the messages of a client until the end of the stream, or an exit notification"""
+        while not self.exit_requested:
+            try:
+                message = read_message(input_stream)
+            except (ValueError, UnicodeDecodeError):
+                error = {"code": PARSE_ERROR, "message": "parse error"}
+                write_message(output_stream, {"jsonrpc": "2.0", "id": None, "error": error})
+                continue
+            if message is None:
+                break
+
+            response = self.handle_message(message)
+            if response is not None:
+                write_message(output_stream, response)
+            for notification in self.notifications:
+                write_message(output_stream, notification)
+            self.notifications = []
+
+
+parser = argparse.ArgumentParser(
+    description="Verification server for Fitch-style proofs, answering JSON-RPC requests (or Language Server Protocol "
+    "messages) on the standard input, or on a local socket"
+)
+
+parser.add_argument("--socket", help="listen on a Unix socket at the path given", metavar="path")
+
+parser.add_argument(
+    "--port",
+    type=int,
+    help="listen on a TCP port of localhost (any local user can then connect, and read the files the server can read)",
+    metavar="number",
+)
+
+parser.add_argument(
+    "--no-cache",
+    action="store_true",
+    help="don't reuse the results cached on disk by previous runs (the results are still kept in memory)",
+)
+
+parser.add_argument(
+    "--cache-dir",
+    help=f"the directory of the verification cache (default {default_cache_directory()})",
+    metavar="directory",
+)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    verification_cache = VerificationCache(args.cache_dir)
+    server = FitchServer(None if args.no_cache else verification_cache)
+
+    if args.socket is None and args.port is None:
+        try:
+            server.serve(sys.stdin.buffer, sys.stdout.buffer)
+        finally:
+            if not args.no_cache:
+                verification_cache.prune_after_stores()
+    else:
+        if args.socket is not None:
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            Path(args.socket).unlink(missing_ok=True)
+            previous_umask = os.umask(0o177)  # only the user running the server can connect to the socket
+            try:
+                listener.bind(args.socket)
+            finally:
+                os.umask(previous_umask)
+        else:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind(("127.0.0.1", args.port))
+        listener.listen()
+        try:
+            # The clients are answered one at a time, sharing the state of the server
+            while not server.exit_requested:
+                connection, _ = listener.accept()
+                with connection, connection.makefile("rb") as input_stream, connection.makefile("wb") as output_stream:
+                    server.serve(input_stream, output_stream)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            listener.close()
+            if args.socket is not None:
+                Path(args.socket).unlink(missing_ok=True)
+            if not args.no_cache:
+                verification_cache.prune_after_stores()
@@ -0,0 +1,131 @@
+from expressions import *
+from fitch_rules import theorem_applies
+import hashlib
+
+WILDCARD = None  # symbol of the metavariables in the discrimination tree
+PROPOSITION = "proposition"  # symbol of the propositions of the formulas looked up, which only match wildcards
+
+
+class DiscriminationTree:
+    """Term index over inference patterns, whose propositions are metavariables.
+
+    Each inference is flattened in prefix order into a path of symbols: its number of premises, then the symbols of
+    its conclusion and premises. Looking up formulas follows the paths matching them, a wildcard edge skipping a
+    whole subformula. The candidates found still have to be checked for consistent metavariable bindings.
+    """
+
+    def __init__(self):
+        self.children = {}
+        self.entries = []  # (insertion number, inference) for the inferences whose path ends here
+
+    def insert(self, path: list, entry: tuple[int, Inference]):
+        node = self
+        for symbol in path:
+            node = node.children.setdefault(symbol, DiscriminationTree())
+        node.entries.append(entry)
+
+    def retrieve(self, symbols: list, subformula_ends: list[int], position: int, found: list):
+        if position == len(symbols):
+            found.extend(self.entries)
+            return
+        child = self.children.get(symbols[position])
+        if child is not None:
+            child.retrieve(symbols, subformula_ends, position + 1, found)
+        wildcard_child = self.children.get(WILDCARD)
+        if wildcard_child is not None:
+            wildcard_child.retrieve(symbols, subformula_ends, subformula_ends[position], found)
+
+
+def pattern_path(formula: Formula, path: list):
+    if formula.__class__ is Proposition:
+        path.append(WILDCARD)
+        return
+    path.append(formula.__class__)
+    if isinstance(formula, BinaryConnective):
+        pattern_path(formula.a, path)
+        pattern_path(formula.b, path)
+    elif formula.__class__ is Not:
+        pattern_path(formula.a, path)
+
+
+def query_symbols(formula: Formula, symbols: list, subformula_ends: list[int]):
+    """Flattens the formula in prefix order, recording for every symbol the position just after its subformula"""
+    position = len(symbols)
+    symbols.append(PROPOSITION if formula.__class__ is Proposition else formula.__class__)
+    subformula_ends.append(None)
+    if isinstance(formula, BinaryConnective):
+        query_symbols(formula.a, symbols, subformula_ends)
+        query_symbols(formula.b, symbols, subformula_ends)
+    elif formula.__class__ is Not:
+        query_symbols(formula.a, symbols, subformula_ends)
+    subformula_ends[position] = len(symbols)
+
+
+def most_specific_theorem(theorems: list[Inference]) -> Inference:
+    """Returns the first of the theorems given of which none of the others is an instance, e.g. 'A ⊢ A ∨ A' rather
+    than 'A ⊢ A ∨ B'"""
+    for theorem in theorems:
+        formulas = theorem.formulas()
+        if not any(
+            other is not theorem
+            and theorem_applies(formulas, other.formulas())
+            and not theorem_applies(other.formulas(), formulas)
+            for other in theorems
+        ):
+            return theorem
+    return theorems[0]
+
+
+class TheoremIndex:
+    """Proved inferences indexed by their canonical key, so that looking up an inference (or any inference equal
+    to it up to the names of its propositions) takes constant time"""
+
+    def __init__(self, inferences=()):
+        self.theorems = {}  # canonical key -> first inference proved with this key
+        self.discrimination_tree = DiscriminationTree()
+        self.digest = 0  # order-independent hash of the canonical keys, updated as theorems are added
+        self.extend(inferences)
+
+    def add(self, inference: Inference):
+        key = inference.canonical_key()
+        if key in self.theorems:
+            return
+        self.theorems[key] = inference
+        key_hash = hashlib.sha256("\n".join(str(formula) for formula in key).encode()).digest()
+        self.digest ^= int.from_bytes(key_hash[:16], "big")
+        path = [len(inference.premises)]
+        pattern_path(inference.conclusion.expr, path)
+        for premise in inference.premises:
+            pattern_path(premise.expr, path)
+        self.discrimination_tree.insert(path, (len(self.theorems), inference))
+
+    def extend(self, inferences):
+        for inference in inferences:
+            self.add(inference)
+
+    def get(self, inference: Inference) -> Inference | None:
+        return self.theorems.get(inference.canonical_key())
+
+    def find_matches(self, premises: list[Expression], conclusion: Expression) -> list[Inference]:
+        """Returns the theorems of which the premises and conclusion given are an instance, in the order they were
+        proved"""
+        symbols = [len(premises)]
+        subformula_ends = [1]
+        for formula in [conclusion] + premises:
+            query_symbols(formula.expr, symbols, subformula_ends)
+
+        candidates = []
+        self.discrimination_tree.retrieve(symbols, subformula_ends, 0, candidates)
+        candidates.sort(key=lambda entry: entry[0])
+
+        formulas = tuple(premise.expr for premise in premises) + (conclusion.expr,)
+        return [inference for _, inference in candidates if theorem_applies(inference.formulas(), formulas)]
+
+    def __contains__(self, inference: Inference) -> bool:
+        return inference.canonical_key() in self.theorems
+
+    def __iter__(self):
+        return iter(self.theorems.values())
+
+    def __len__(self) -> int:
+        return len(self.theorems)
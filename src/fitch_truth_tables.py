@@ -0,0 +1,178 @@
+from expressions import *
+from typing import Generator, Iterable
+
+# Instructions of the compiled programs, each computing a register from previous ones
+LOAD, TRUE, FALSE, NOT, AND, OR, IMPLIES, IFF = range(8)
+
+BINARY_INSTRUCTIONS = {And: AND, Or: OR, Conditional: IMPLIES, BiConditional: IFF}
+
+
+def proposition_column(index: int, proposition_count: int) -> int:
+    """Returns the values of the index-th proposition in each row of a truth table, as a bitset (bit r being the value
+    in row r). The rows go from all the propositions false to all of them true, the first proposition changing the
+    least often."""
+    block_size = 1 << (proposition_count - 1 - index)  # consecutive rows with the same value
+    column = ((1 << block_size) - 1) << block_size  # false, then true
+    width = 2 * block_size
+    while width < 1 << proposition_count:
+        column |= column << width
+        width *= 2
+    return column
+
+
+def as_formula(formula: Expression | Formula) -> Formula:
+    return formula.expr if isinstance(formula, Expression) else formula
+
+
+class TruthTableProgram:
+    """Formulas lowered to a straight-line program over bitsets, which evaluates them in all the rows of a truth table
+    at once. Subformulas shared by the formulas (the nodes are interned) are only computed once."""
+
+    def __init__(self, formulas: Iterable[Expression | Formula], propositions: list[str] = None):
+        self.formulas = [as_formula(formula) for formula in formulas]
+        if propositions is None:  # in alphabetical order
+            propositions = sorted(frozenset().union(*(formula.propositions() for formula in self.formulas)))
+        self.propositions = propositions
+        self.instructions = []  # (instruction, a, b), the result of the i-th instruction going to the i-th register
+        self.registers = {}  # formula node -> register
+        self.outputs = [self.compile(formula) for formula in self.formulas]
+
+    def compile(self, formula: Formula) -> int:
+        register = self.registers.get(formula)
+        if register is not None:
+            return register
+
+        if formula.__class__ is Proposition:
+            instruction = (LOAD, self.propositions.index(formula.name), None)
+        elif formula.__class__ is Top:
+            instruction = (TRUE, None, None)
+        elif formula.__class__ is Bottom:
+            instruction = (FALSE, None, None)
+        elif formula.__class__ is Not:
+            instruction = (NOT, self.compile(formula.a), None)
+        else:
+            instruction = (BINARY_INSTRUCTIONS[formula.__class__], self.compile(formula.a), self.compile(formula.b))
+
+        register = len(self.instructions)
+        self.instructions.append(instruction)
+        self.registers[formula] = register
+        return register
+
+    def run(self, columns: list[int], mask: int) -> list[int]:
+        """Returns the bitset of each formula, given the bitset of each proposition and the mask of the rows"""
+        registers = []
+        for instruction, a, b in self.instructions:
+            if instruction == LOAD:
+                registers.append(columns[a])
+            elif instruction == AND:
+                registers.append(registers[a] & registers[b])
+            elif instruction == OR:
+                registers.append(registers[a] | registers[b])
+            elif instruction == NOT:
+                registers.append(registers[a] ^ mask)
+            elif instruction == IMPLIES:
+                registers.append((registers[a] ^ mask) | registers[b])
+            elif instruction == IFF:
+                registers.append(registers[a] ^ registers[b] ^ mask)
+            elif instruction == TRUE:
+                registers.append(mask)
+            else:
+                registers.append(0)
+        return [registers[output] for output in self.outputs]
+
+    def evaluate(self) -> list[int]:
+        """Returns the bitset of each formula over all the assignments of the propositions (see proposition_column)"""
+        proposition_count = len(self.propositions)
+        columns = [proposition_column(index, proposition_count) for index in range(proposition_count)]
+        return self.run(columns, (1 << (1 << proposition_count)) - 1)
+
+
+class FormulaValues:
+    """Bitsets of formulas over all the assignments of the propositions given (see proposition_column), computed one
+    formula at a time and kept with those of their subformulas, for formulas which aren't all known in advance"""
+
+    def __init__(self, propositions: list[str]):
+        self.propositions = propositions
+        proposition_count = len(propositions)
+        self.mask = (1 << (1 << proposition_count)) - 1
+        self.values = {
+            Proposition(name): proposition_column(index, proposition_count) for index, name in enumerate(propositions)
+        }
+
+    def value(self, formula: Formula) -> int:
+        values = self.values.get(formula)
+        if values is None:
+            if formula.__class__ is Not:
+                values = self.value(formula.a) ^ self.mask
+            elif formula.__class__ is And:
+                values = self.value(formula.a) & self.value(formula.b)
+            elif formula.__class__ is Or:
+                values = self.value(formula.a) | self.value(formula.b)
+            elif formula.__class__ is Conditional:
+                values = (self.value(formula.a) ^ self.mask) | self.value(formula.b)
+            elif formula.__class__ is BiConditional:
+                values = self.value(formula.a) ^ self.value(formula.b) ^ self.mask
+            elif formula.__class__ is Top:
+                values = self.mask
+            elif formula.__class__ is Bottom:
+                values = 0
+            else:
+                raise ValueError(f"proposition '{formula}' is not in the truth table")
+            self.values[formula] = values
+        return values
+
+
+class TruthTable:
+    def __init__(self, formula: Expression | Formula, propositions: list[str] = None):
+        program = TruthTableProgram([formula], propositions)
+        self.formula = program.formulas[0]
+        self.propositions = program.propositions
+        self.row_count = 1 << len(self.propositions)
+        self.values = program.evaluate()[0]  # bitset of the rows where the formula is true
+
+    def value(self, row: int) -> bool:
+        return (self.values >> row) & 1 == 1
+
+    def assignment(self, row: int) -> dict[str, bool]:
+        proposition_count = len(self.propositions)
+        return {
+            name: (row >> (proposition_count - 1 - index)) & 1 == 1 for index, name in enumerate(self.propositions)
+        }
+
+    def rows(self) -> Generator[tuple[dict[str, bool], bool], None, None]:
+        for row in range(self.row_count):
+            yield self.assignment(row), self.value(row)
+
+    def true_count(self) -> int:
+        return self.values.bit_count()
+
+    def __str__(self) -> str:
+        formula_str = str(self.formula)
+        if formula_str[0] == "(" and formula_str[-1] == ")":
+            formula_str = formula_str[1:-1]  # without the outer parenthesis, as in Expression
+        header = " ".join(self.propositions) + " │ " + formula_str
+        lines = [header, "─" * (2 * len(self.propositions)) + "┼" + "─" * (len(header) - 2 * len(self.propositions))]
+        for assignment, value in self.rows():
+            values = " ".join("T" if assignment[name] else "F" for name in self.propositions)
+            lines.append(values + " │ " + ("T" if value else "F"))
+        return "\n".join(lines) + "\n"
+
+
+def evaluate_formulas(formulas: Iterable[Expression | Formula], propositions: list[str] = None) -> list[int]:
+    """Evaluates many formulas over the same assignments (all those of the propositions given, by default of all the
+    propositions of the formulas, in alphabetical order), returning the bitset of each formula"""
+    return TruthTableProgram(formulas, propositions).evaluate()
+
+
+def is_tautology(formula: Expression | Formula) -> bool:
+    table = TruthTable(formula)
+    return table.values == (1 << table.row_count) - 1
+
+
+def is_contradiction(formula: Expression | Formula) -> bool:
+    return TruthTable(formula).values == 0
+
+
+def are_equivalent(formula_a: Expression | Formula, formula_b: Expression | Formula) -> bool:
+    values_a, values_b = evaluate_formulas([formula_a, formula_b])
+    return values_a == values_b
@@ -0,0 +1,83 @@
+from fitch_interpreter import *
+import time
+
+DEFAULT_POLL_INTERVAL = 0.5  # seconds
+
+
+def file_stamp(path: Path) -> tuple[int, int] | None:
+    """Returns the modification time and the size of a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """Detects the changes made to files by polling their modification time and size"""
+
+    def __init__(self, interval: float = DEFAULT_POLL_INTERVAL):
+        self.interval = interval
+        self.stamps = {}  # path -> stamp of the file when it started being watched
+
+    def watch(self, paths, since: int = None):
+        """Starts watching the paths given. Files modified after the time given (in nanoseconds) are changed already."""
+        self.stamps = {path: file_stamp(path) for path in paths}
+        if since is not None:
+            for path, stamp in self.stamps.items():
+                if stamp is not None and stamp[0] >= since:
+                    self.stamps[path] = (-1, -1)
+
+    def changed_files(self) -> list[Path]:
+        return [path for path, stamp in self.stamps.items() if file_stamp(path) != stamp]
+
+    def wait_for_changes(self) -> list[Path]:
+        while len(changed_files := self.changed_files()) == 0:
+            time.sleep(self.interval)
+        return changed_files
+
+
+class WatchSession:
+    """Interprets a file again each time it, or a file it imports, changes.
+
+    The results of the proofs are kept in memory between the runs, so that only the proofs which changed, and the
+    proofs applying a theorem whose statement changed, are verified again."""
+
+    def __init__(
+        self,
+        file_name,
+        verification_cache: VerificationCache = None,
+        jobs: int = 1,
+        interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        self.file_name = file_name
+        self.verification_cache = verification_cache
+        self.jobs = jobs
+        self.proof_memo = ProofMemo()
+        self.watcher = FileWatcher(interval)
+        self.module_registry = None
+        self.run_start_time = None  # in nanoseconds
+
+    def interpreter(self, profiler: Profiler = None) -> FitchInterpreter:
+        """Returns the interpreter of a new run, with all the files read again"""
+        self.module_registry = ModuleRegistry()
+        self.run_start_time = time.time_ns()
+        self.proof_memo.hits = 0
+        self.proof_memo.misses = 0
+        return FitchInterpreter(
+            self.file_name,
+            self.module_registry,
+            self.verification_cache,
+            self.proof_memo,
+            jobs=self.jobs,
+            profiler=profiler,
+        )
+
+    def end_run(self, succeeded: bool):
+        # After an error, the proofs following it were not looked up, but they are likely to be reused
+        if succeeded:
+            self.proof_memo.prune()
+        self.watcher.watch(self.module_registry.referenced_paths, since=self.run_start_time)
+
+    def wait_for_changes(self) -> list[Path]:
+        return self.watcher.wait_for_changes()
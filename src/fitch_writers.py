@@ -0,0 +1,80 @@
+from fitch_proof import *
+
+LATEX_DOCUMENT_START = r"""\documentclass{article}
+\usepackage{fitch}
+\renewcommand*\contentsname{Proof list}
+
+\begin{document}
+\tableofcontents
+"""
+LATEX_DOCUMENT_END = r"\end{document}"
+
+
+class TextWriter:
+    """Writes the text output of fitch_cli.py to a file-like sink: the files imported, then each proof line by line,
+    as soon as it is verified. Proofs already rendered (e.g. in watch mode) are taken from the proof memo given."""
+
+    def __init__(self, sink, proof_memo=None):
+        self.sink = sink
+        self.proof_memo = proof_memo
+        self.imports_written = False
+        self.proofs_written = False
+
+    def begin(self):
+        pass
+
+    def write_import(self, file_name: str):
+        self.sink.write(f'Imported file "{file_name}"\n\n')
+        self.imports_written = True
+
+    def write_proof(self, proof: Proof):
+        if self.proofs_written:
+            self.sink.write("\n\n\n")
+        elif self.imports_written:
+            self.sink.write("\n\n")
+        self.proofs_written = True
+        self.sink.write(f"Proof of {proof.goal} successful\n\n")
+        if self.proof_memo is not None:
+            self.sink.write(self.proof_memo.render(proof))
+        else:
+            self.sink.writelines(proof.text_lines())
+        self.sink.write("\n")
+
+    def end(self):
+        if self.imports_written and not self.proofs_written:
+            self.sink.write("\n\n")
+
+    def write_document(self, proofs: Iterable[Proof]):
+        self.begin()
+        for proof in proofs:
+            self.write_proof(proof)
+        self.end()
+
+
+class LatexWriter:
+    """Writes a LaTeX document with the proofs given to a file-like sink, line by line. The proofs can be written as
+    soon as they are verified, so that only the proof being written needs to be kept in memory."""
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def begin(self):
+        self.sink.write(LATEX_DOCUMENT_START)
+
+    def write_import(self, file_name: str):
+        pass  # the imported proofs aren't in the document
+
+    def write_proof(self, proof: Proof):
+        self.sink.write(rf"\section{{${proof.goal.latex()}$}}" + "\n")
+        self.sink.write("$")
+        self.sink.writelines(proof.latex_lines())
+        self.sink.write("$\n")
+
+    def end(self):
+        self.sink.write(LATEX_DOCUMENT_END)
+
+    def write_document(self, proofs: Iterable[Proof]):
+        self.begin()
+        for proof in proofs:
+            self.write_proof(proof)
+        self.end()
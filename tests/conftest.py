@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+SRC_DIRECTORY = Path(__file__).resolve().parent.parent / "src"
+EXAMPLES_DIRECTORY = SRC_DIRECTORY.parent / "examples"
+
+# The interpreter modules import each other as top-level modules, like when running src/fitch_cli.py
+if str(SRC_DIRECTORY) not in sys.path:
+    sys.path.insert(0, str(SRC_DIRECTORY))
+
+from expressions import And, BiConditional, Bottom, Conditional, Formula, Not, Or, Proposition, Top
+
+
+def random_formula(random, propositions: str, depth: int) -> Formula:
+    """A random formula of at most the depth given over the propositions given, e.g. "ABC" """
+    if depth == 0 or random.random() < 0.2:
+        if random.random() < 0.05:
+            return random.choice((Top, Bottom))()
+        return Proposition(random.choice(propositions))
+    if random.random() < 0.2:
+        return Not(random_formula(random, propositions, depth - 1))
+    connective = random.choice((And, Or, Conditional, BiConditional))
+    return connective(random_formula(random, propositions, depth - 1), random_formula(random, propositions, depth - 1))
+
+
+def brute_force_value(formula: Formula, assignment: dict[str, bool]) -> bool:
+    """The value of the formula under the assignment, evaluated recursively from the definitions of the connectives"""
+    if isinstance(formula, Proposition):
+        return assignment[str(formula)]
+    if isinstance(formula, Not):
+        return not brute_force_value(formula.a, assignment)
+    if formula.__class__ in (And, Or, Conditional, BiConditional):
+        a, b = brute_force_value(formula.a, assignment), brute_force_value(formula.b, assignment)
+        return {And: a and b, Or: a or b, Conditional: not a or b, BiConditional: a == b}[formula.__class__]
+    return isinstance(formula, Top)
@@ -0,0 +1,100 @@
+from fitch_api import *
+import os
+import pickle
+import pytest
+
+PROOF_SOURCE = "proof A |- A v B\n    1. A by Premise\n    2. A v B by vI 1\n"
+
+
+def verified_proof(source: str = PROOF_SOURCE) -> Proof:
+    result = verify_source(source)
+    assert result.success, result.error
+    return result.proofs[0]
+
+
+def test_round_trip(tmp_path):
+    cache = VerificationCache(tmp_path / "cache")
+    proof = verified_proof()
+    key = cache.key(PROOF_SOURCE, TheoremIndex().digest)
+
+    assert cache.load(key) is None
+    cache.store(key, proof)
+    loaded_proof = cache.load(key)
+
+    assert str(loaded_proof) == str(proof)
+    assert loaded_proof.goal.conclusion.expr is proof.goal.conclusion.expr  # interned again when unpickled
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_keys_depend_on_the_theorems():
+    cache = VerificationCache()
+    theorems = TheoremIndex()
+    key = cache.key(PROOF_SOURCE, theorems.digest)
+    theorems.add(inference_from_str("A |- A"))
+    assert cache.key(PROOF_SOURCE, theorems.digest) != key
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = VerificationCache(tmp_path)
+    proof = verified_proof()
+    keys = [cache.key(PROOF_SOURCE, digest) for digest in range(3)]
+    for age, key in enumerate(keys):
+        cache.store(key, proof)
+        os.utime(cache.entry_path(key), (1000 - age, 1000 - age))  # the first entry is the most recently used
+    entry_size = cache.entry_path(keys[0]).stat().st_size
+
+    cache.prune(max_size=2 * entry_size)
+
+    assert [cache.entry_path(key).exists() for key in keys] == [True, True, False]
+    cache.clear()
+    assert cache.entries() == []
+
+
+def test_pruned_only_after_stores(tmp_path, monkeypatch):
+    cache = VerificationCache(tmp_path, max_size=0)
+    cache.prune_after_stores()  # nothing stored, the directory isn't read
+    cache.store(cache.key(PROOF_SOURCE, 0), verified_proof())
+    assert len(cache.entries()) == 1
+
+    cache.prune_after_stores()
+
+    assert cache.entries() == []
+    monkeypatch.setattr(cache, "entries", lambda: pytest.fail("the cache was pruned without any store"))
+    cache.prune_after_stores()
+
+
+def test_deep_formulas_round_trip(tmp_path):
+    formula = "~" * 800 + "A"
+    proof = verified_proof(f"proof {formula} |- {formula}\n    1. {formula} by Premise\n")
+    cache = VerificationCache(tmp_path)
+
+    cache.store(cache.key(formula, 0), proof)  # the formula nodes are pickled as a flat list, not recursively
+
+    assert cache.load(cache.key(formula, 0)).goal.conclusion.expr is proof.goal.conclusion.expr
+
+
+class Unpicklable:
+    def __reduce__(self):
+        raise pickle.PicklingError("not picklable")
+
+
+def test_unpicklable_results_are_not_stored(tmp_path):
+    cache = VerificationCache(tmp_path)
+
+    cache.store(cache.key(PROOF_SOURCE, 0), Unpicklable())
+
+    assert not any(path.is_file() for path in tmp_path.rglob("*"))  # nor the temporary file
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="no file ownership")
+def test_directory_writable_by_others_is_not_used(tmp_path):
+    cache = VerificationCache(tmp_path)
+    key = cache.key(PROOF_SOURCE, 0)
+    cache.store(key, verified_proof())
+    tmp_path.chmod(0o777)
+
+    cache = VerificationCache(tmp_path)
+
+    assert cache.load(key) is None
+    cache.store(cache.key(PROOF_SOURCE, 1), verified_proof())
+    assert len(cache.entries()) == 1
@@ -0,0 +1,78 @@
+from conftest import EXAMPLES_DIRECTORY
+from fitch_api import *
+
+
+def nested_negations(depth: int, formula: Formula) -> Formula:
+    for _ in range(depth):
+        formula = Not(formula)
+    return formula
+
+
+def test_nodes_are_interned():
+    assert Expression("A & (B -> C)").expr is And(Proposition("A"), Conditional(Proposition("B"), Proposition("C")))
+    assert Expression("A & B").expr is not Expression("B & A").expr
+
+
+def test_strings_of_deep_formulas():
+    # Built without the parser, deeper than the Python stack
+    formula = nested_negations(5000, And(Proposition("A"), Proposition("B")))
+    assert str(formula) == "¬" * 5000 + "(A ∧ B)"
+    assert formula.latex() == r"\neg " * 5000 + r"(A \land B)"
+    assert formula.propositions() == frozenset(("A", "B"))
+
+    conjunction = Proposition("A")
+    for index in range(5000):
+        conjunction = And(conjunction, Proposition(f"B{index % 3}"))
+    assert str(conjunction).startswith("(" * 5000 + "A ∧ B0) ∧ B1)")
+    assert conjunction.propositions() == frozenset(("A", "B0", "B1", "B2"))
+
+
+def test_proof_of_a_deep_formula():
+    formula = "~" * 400 + "A"
+    result = verify_source(
+        f"proof {formula} |- {formula} v B\n    1. {formula} by Premise\n    2. {formula} v B by vI 1\n"
+    )
+    assert result.success, result.error
+
+
+def test_too_deep_formula_is_an_error():
+    formula = "~" * 20000 + "A"
+    result = verify_source(f"proof {formula} |- {formula}\n    1. {formula} by Premise\n")
+    assert not result.success
+    assert result.error.line_number == 1
+
+
+def example_formulas() -> list[str]:
+    """Returns the formulas of the goals and of the lines of the examples, as written"""
+    formulas = []
+    for path in sorted(EXAMPLES_DIRECTORY.glob("*.ftc")):
+        for block in ProofScanner(source_lines(str(path))).proof_blocks():
+            goal_line, *proof_lines = block.text.splitlines()
+            premises_part, conclusion_part = TURNSTILE_REGEX.split(goal_line[len(PROOF_KEYWORD) :])
+            formulas += [premise for premise in premises_part.split(",") if premise.strip() != ""] + [conclusion_part]
+            for proof_line in proof_lines:
+                formula = remove_line_number(proof_line).split(JUSTIFICATION_KEYWORD)[0].strip()
+                if formula != "":
+                    formulas.append(formula)
+    return formulas
+
+
+def conditionals_grouped_right(formula: Formula) -> Formula:
+    if formula.__class__ is Not:
+        return Not(conditionals_grouped_right(formula.a))
+    if formula.__class__ not in (And, Or, Conditional, BiConditional):
+        return formula
+    if formula.__class__ is Conditional and formula.a.__class__ is Conditional:
+        return conditionals_grouped_right(Conditional(formula.a.a, Conditional(formula.a.b, formula.b)))
+    return formula.__class__(conditionals_grouped_right(formula.a), conditionals_grouped_right(formula.b))
+
+
+def test_lark_parsers_agree():
+    formulas = example_formulas()
+    assert len(formulas) > 500
+    for formula in formulas + ["A -> B -> C", "~A & B -> C v D -> E"]:
+        lalr_tree = Expression.parse_with_lark(formula, "lalr")
+        earley_tree = Expression.parse_with_lark(formula, "earley")
+        # The only difference: the unbracketed chains of conditionals are grouped to the right by the LALR parser
+        assert lalr_tree is earley_tree or lalr_tree is conditionals_grouped_right(earley_tree), formula
+        assert Expression(formula).expr is lalr_tree, formula
@@ -0,0 +1,53 @@
+from fitch_grading import *
+import fitch_grading
+import multiprocessing
+import pickle
+import pytest
+
+LIBRARY = "proof A |- A v B\n    1. A by Premise\n    2. A v B by vI 1\n"
+SUBMISSION = "#import ../lib.ftc\n\nproof P |- P v Q\n    1. P by Premise\n    2. P v Q by apply 1\n"
+WRONG_SUBMISSION = "#import ../lib.ftc\n\nproof P |- P & Q\n    1. P by Premise\n    2. P & Q by apply 1\n"
+
+
+@pytest.fixture
+def submissions(tmp_path) -> list[Path]:
+    (tmp_path / "lib.ftc").write_text(LIBRARY)
+    (tmp_path / "submissions").mkdir()
+    paths = []
+    for name, source in (("a.ftc", SUBMISSION), ("b.ftc", SUBMISSION), ("c.ftc", WRONG_SUBMISSION)):
+        paths.append(tmp_path / "submissions" / name)
+        paths[-1].write_text(source)
+    return paths
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_grading_with_shared_imports(submissions, start_method, monkeypatch):
+    if start_method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"no {start_method} start method on this platform")
+    # The workers are started with the module registry of the shared imports, which spawn has to pickle
+    monkeypatch.setattr(fitch_grading, "multiprocessing", multiprocessing.get_context(start_method))
+
+    results = grade_submissions(submissions_from(submissions[0].parent), jobs=2)
+
+    assert [result.status for result in results] == [PASSED, PASSED, FAILED]
+    assert results[0].proofs == [("P |- P v Q", PASSED)]
+    assert results[2].proofs == [("P |- P & Q", FAILED)]
+
+
+def test_preloaded_imports_can_be_pickled(submissions):
+    module_registry = preload_shared_imports(submissions)
+    assert len(module_registry.modules) == 1
+    pickle.loads(pickle.dumps(module_registry))
+
+
+def test_submission_read_once_and_not_rendered(submissions, monkeypatch):
+    reads = []
+    read_submission = fitch_grading.read_submission
+    monkeypatch.setattr(fitch_grading, "read_submission", lambda path: reads.append(path) or read_submission(path))
+    monkeypatch.setattr(Proof, "text_lines", lambda proof: pytest.fail("the proof was rendered"))
+
+    for path in submissions:
+        grade_submission(path, ModuleRegistry())
+
+    assert reads == submissions
+    assert grade_submission(submissions[2], ModuleRegistry()).proofs == [("P |- P & Q", FAILED)]
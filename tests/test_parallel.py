@@ -0,0 +1,67 @@
+from conftest import EXAMPLES_DIRECTORY, SRC_DIRECTORY
+from concurrent.futures import Future
+from fitch_api import *
+import fitch_interpreter
+import subprocess
+import sys
+import pytest
+
+DEEP_FORMULA = "~" * 800 + "P"
+DEEP_PROOF = f"proof {DEEP_FORMULA} |- {DEEP_FORMULA} v Q\n    1. {DEEP_FORMULA} by Premise\n"
+DEEP_PROOF += f"    2. {DEEP_FORMULA} v Q by vI 1\n\n"
+EXAMPLES = (EXAMPLES_DIRECTORY / "proof_examples.ftc").read_text()
+WRONG_PROOF = "proof P |- P & Q\n    1. P by Premise\n    2. P & Q by &I 1, 1\n\n"
+
+
+def output_of(source: str, jobs: int) -> tuple[str, FitchError | None]:
+    interpreter = FitchInterpreter("main.ftc", source=source, jobs=jobs)
+    output = []
+    try:
+        for text in interpreter.interpret_code():
+            output.append(text)
+    except FitchError as e:
+        return "".join(output), e
+    return "".join(output), None
+
+
+@pytest.mark.parametrize("source", [EXAMPLES, DEEP_PROOF + EXAMPLES, EXAMPLES + WRONG_PROOF + DEEP_PROOF])
+def test_parallel_output_is_the_sequential_output(source):
+    output, error = output_of(source, 1)
+    parallel_output, parallel_error = output_of(source, 2)
+    assert parallel_output == output
+    assert repr(parallel_error) == repr(error)
+
+
+def test_command_line_with_jobs(tmp_path):
+    (tmp_path / "deep.ftc").write_text(DEEP_PROOF + EXAMPLES)
+    outputs = []
+    for options in ([], ["-j", "2"]):
+        command = [sys.executable, str(SRC_DIRECTORY / "fitch_cli.py"), "--no-cache", *options, "deep.ftc"]
+        process = subprocess.run(command, cwd=tmp_path, capture_output=True, text=True, encoding="utf-8")
+        assert process.returncode == 0, process.stderr
+        outputs.append(process.stdout)
+    assert outputs[0] == outputs[1]
+
+
+class FailingExecutor:
+    """An executor whose tasks all fail, as when the results of a worker can't be sent back"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def submit(self, function, *args) -> Future:
+        future = Future()
+        future.set_exception(RecursionError("maximum recursion depth exceeded"))
+        return future
+
+    def shutdown(self, cancel_futures: bool = False):
+        pass
+
+
+def test_proofs_verified_in_order_when_the_workers_fail(monkeypatch):
+    monkeypatch.setattr(fitch_interpreter, "ProcessPoolExecutor", FailingExecutor)
+    for source in (EXAMPLES, EXAMPLES + WRONG_PROOF + DEEP_PROOF):
+        output, error = output_of(source, 1)
+        parallel_output, parallel_error = output_of(source, 2)
+        assert parallel_output == output
+        assert repr(parallel_error) == repr(error)
@@ -0,0 +1,159 @@
+from fitch_api import *
+from fitch_rules import justification_from_str
+
+SIBLING_SUBPROOFS = """proof A v B |- B -> (B v A)
+    1. A v B by Premise
+        2. B by Assumption
+            3. A by Assumption
+            4. B v A by vI 3
+            5. B by Assumption
+            6. B v A by vI 5
+        7. B v A by vE 1, 3-4, 5-6
+    8. B -> (B v A) by ->I 2-7
+"""
+SIBLING_SUBPROOFS_TEXT = """1 │ A ∨ B                     Premise
+  ├─────────
+2 │  │ B                      Assumption
+  │  ├─────────
+3 │  │  │ A                   Assumption
+  │  │  ├─────────
+4 │  │  │ B ∨ A               ∨I 3
+  │  │
+5 │  │  │ B                   Assumption
+  │  │  ├─────────
+6 │  │  │ B ∨ A               ∨I 5
+7 │  │ B ∨ A                  ∨E 1, 3-4, 5-6
+8 │ B → (B ∨ A)               →I 2-7
+"""
+SIBLING_SUBPROOFS_LATEX = r"""\begin{nd}
+\hypo {1} {A \lor B} \by{Premise}{}
+\open
+\hypo {2} {B} \by{Assumption}{}
+\open
+\hypo {3} {A} \by{Assumption}{}
+\have {4} {B \lor A} \oi{3}
+\close
+\open
+\hypo {5} {B} \by{Assumption}{}
+\have {6} {B \lor A} \oi{5}
+\close
+\have {7} {B \lor A} \oe{1, 3-4, 5-6}
+\close
+\have {8} {B \to (B \lor A)} \by{$\to$I}{2-7}
+\end{nd}"""
+
+
+def test_sibling_subproofs():
+    result = verify_source(SIBLING_SUBPROOFS)
+    assert result.success, result.error
+    assert str(result.proofs[0]) == SIBLING_SUBPROOFS_TEXT
+    assert result.proofs[0].latex() == SIBLING_SUBPROOFS_LATEX
+
+
+def proof_with_nested_subproofs(then_sibling: bool) -> Proof:
+    """Two nested subproofs closed after the same line (which the interpreter never does, but the Proof API allows),
+    followed by a line of the proof or by a new subproof"""
+    proof = Proof(inference_from_str("A |- A"))
+    proof.add_premise(Expression("A"))
+    proof.add_assumption(Expression("B"))
+    proof.add_assumption(Expression("C"))
+    proof.add_line(Expression("A"), justification_from_str("R 1"))
+    proof.discharge_assumption()
+    proof.discharge_assumption()
+    if then_sibling:
+        proof.add_assumption(Expression("D"))
+        proof.discharge_assumption()
+    proof.add_line(Expression("A"), justification_from_str("R 1"))
+    return proof
+
+
+def test_nested_subproofs_closed_together():
+    proof = proof_with_nested_subproofs(then_sibling=False)
+    assert str(proof) == (
+        "1 │ A                         Premise\n"
+        "  ├─────────\n"
+        "2 │  │ B                      Assumption\n"
+        "  │  ├─────────\n"
+        "3 │  │  │ C                   Assumption\n"
+        "  │  │  ├─────────\n"
+        "4 │  │  │ A                   R 1\n"
+        "5 │ A                         R 1\n"
+    )
+    # One box boundary for each subproof (the interpreter used to close only one)
+    assert proof.latex() == (
+        "\\begin{nd}\n"
+        "\\hypo {1} {A} \\by{Premise}{}\n"
+        "\\open\n"
+        "\\hypo {2} {B} \\by{Assumption}{}\n"
+        "\\open\n"
+        "\\hypo {3} {C} \\by{Assumption}{}\n"
+        "\\have {4} {A} \\r{1}\n"
+        "\\close\n"
+        "\\close\n"
+        "\\have {5} {A} \\r{1}\n"
+        "\\end{nd}"
+    )
+
+
+def test_nested_subproofs_closed_together_then_sibling():
+    proof = proof_with_nested_subproofs(then_sibling=True)
+    assert str(proof) == (
+        "1 │ A                         Premise\n"
+        "  ├─────────\n"
+        "2 │  │ B                      Assumption\n"
+        "  │  ├─────────\n"
+        "3 │  │  │ C                   Assumption\n"
+        "  │  │  ├─────────\n"
+        "4 │  │  │ A                   R 1\n"
+        "  │\n"
+        "5 │  │ D                      Assumption\n"
+        "  │  ├─────────\n"
+        "6 │ A                         R 1\n"
+    )
+    assert proof.latex() == (
+        "\\begin{nd}\n"
+        "\\hypo {1} {A} \\by{Premise}{}\n"
+        "\\open\n"
+        "\\hypo {2} {B} \\by{Assumption}{}\n"
+        "\\open\n"
+        "\\hypo {3} {C} \\by{Assumption}{}\n"
+        "\\have {4} {A} \\r{1}\n"
+        "\\close\n"
+        "\\close\n"
+        "\\open\n"
+        "\\hypo {5} {D} \\by{Assumption}{}\n"
+        "\\close\n"
+        "\\have {6} {A} \\r{1}\n"
+        "\\end{nd}"
+    )
+
+
+def error_of(source: str) -> tuple[str, int]:
+    result = verify_source(source)
+    assert not result.success
+    return result.error.message, result.error.line_number
+
+
+def test_line_of_a_subproof_closed_by_a_sibling_assumption():
+    source = "proof A |- A\n    1. A by Premise\n        2. B by Assumption\n        3. C by Assumption\n"
+    assert error_of(source + "        4. B by R 2\n    5. A by R 1\n") == ("invalid line number cited", 5)
+    assert verify_source(source + "        4. C by R 3\n    5. A by R 1\n").success
+
+
+def test_range_of_a_subproof_going_on_past_its_end():
+    source = (
+        "proof A |- A -> (B -> B)\n    1. A by Premise\n        2. A by Assumption\n        3. A by R 2\n"
+        "            4. B by Assumption\n            5. B by R 4\n        6. B -> B by ->I 4-5\n"
+    )
+    assert error_of(source + "    7. A -> A by ->I 2-3\n") == ("subproof cited is not valid", 8)
+    assert verify_source(source + "    7. A -> (B -> B) by ->I 2-6\n").success
+
+
+def test_line_zero():
+    assert error_of("proof A |- A\n    1. A by Premise\n    2. A by R 0\n") == ("invalid line number cited", 3)
+
+
+def test_last_line_of_a_closed_subproof():
+    source = "proof A |- A\n    1. A by Premise\n        2. A by Assumption\n        3. A by R 2\n"
+    assert error_of(source + "    4. A by R 3\n") == ("invalid line number cited", 5)
+    assert error_of(source + "    4. A by R 4\n") == ("line number cited does not exist", 5)
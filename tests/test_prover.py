@@ -0,0 +1,79 @@
+from conftest import EXAMPLES_DIRECTORY
+from fitch_api import *
+from fitch_prover import *
+import pytest
+
+EXAMPLE_GOALS = [proof.goal for proof in verify_file(EXAMPLES_DIRECTORY / "proof_examples.ftc").proofs]
+PEIRCE = inference_from_str("|- ((A -> B) -> A) -> A")
+LIBRARY = """proof A -> B |- ~B -> ~A
+    1. A -> B by Premise
+        2. ~B by Assumption
+            3. A by Assumption
+            4. B by ->E 3, 1
+            5. False by ~E 4, 2
+        6. ~A by ~I 3-5
+    7. ~B -> ~A by ->I 2-6
+"""
+
+
+@pytest.mark.parametrize("goal", EXAMPLE_GOALS, ids=str)
+def test_proofs_found_are_verified(goal):
+    search = ProofSearch()
+    proof = search.prove(goal)
+    assert search.status == PROVED
+    result = verify_source(proof_source(proof))
+    assert result.success, result.error
+    assert [str(proved) for proved in result.goals()] == [str(goal)]
+
+
+def test_invalid_inference():
+    search = ProofSearch()
+    assert search.prove(inference_from_str("A -> B, B |- A")) is None
+    assert search.status == INVALID
+    assert search.counterexample == {"A": False, "B": True}
+
+
+@pytest.mark.parametrize(
+    "limits, status",
+    [
+        ({"node_limit": 5}, NODE_LIMIT_REACHED),
+        ({"max_depth": 2}, DEPTH_LIMIT_REACHED),
+        ({"time_limit": 0}, TIME_LIMIT_REACHED),
+    ],
+)
+def test_limits(limits, status):
+    search = ProofSearch(**limits)
+    assert search.prove(PEIRCE) is None
+    assert search.status == status
+    assert ProofSearch().prove(PEIRCE) is not None
+
+
+@pytest.mark.parametrize("inference", ["|- True", "A |- A & True", "~True |- B"])
+def test_search_finished(inference):
+    # There is no introduction rule of ⊤, so these valid inferences have no proof
+    search = ProofSearch()
+    assert search.prove(inference_from_str(inference)) is None
+    assert search.status == NOT_FOUND
+    assert search.depth < DEFAULT_MAX_DEPTH
+
+
+def test_theorems_applied():
+    library = verify_source(LIBRARY)
+    assert library.success, library.error
+    search = ProofSearch(library.interpreter.all_proved_inferences)
+    proof = search.prove(inference_from_str("P -> Q |- ~Q -> ~P"))
+    source = "#import lib.ftc\n\n" + proof_source(proof)
+    assert "apply" in source
+    result = verify_source(source, import_resolver=MappingImportResolver({"lib.ftc": LIBRARY}))
+    assert result.success, result.error
+
+
+def test_proved_inferences_added():
+    search = ProofSearch()
+    sources = []
+    for inference in ("A -> B |- ~B -> ~A", "P -> Q |- ~Q -> ~P"):
+        sources.append(proof_source(search.prove(inference_from_str(inference))))
+        search.add_theorem(inference_from_str(inference))
+    assert "apply" in sources[1]
+    result = verify_source("\n".join(sources))
+    assert result.success, result.error
@@ -0,0 +1,66 @@
+from conftest import brute_force_value, random_formula
+from fitch_api import *
+from fitch_sat import *
+import itertools
+import random
+import pytest
+
+
+def brute_force_counterexamples(premises: tuple[Formula, ...], conclusion: Formula) -> list[dict[str, bool]]:
+    propositions = sorted(frozenset().union(*(formula.propositions() for formula in premises + (conclusion,))))
+    counterexamples = []
+    for values in itertools.product((False, True), repeat=len(propositions)):
+        assignment = dict(zip(propositions, values))
+        if all(brute_force_value(premise, assignment) for premise in premises):
+            if not brute_force_value(conclusion, assignment):
+                counterexamples.append(assignment)
+    return counterexamples
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_counterexamples_against_brute_force(seed):
+    generator = random.Random(seed)
+    for _ in range(50):
+        premises = tuple(random_formula(generator, "ABCDE", 4) for _ in range(generator.randrange(4)))
+        conclusion = random_formula(generator, "ABCDE", 4)
+        counterexample = entailment_counterexample(premises, conclusion)
+        counterexamples = brute_force_counterexamples(premises, conclusion)
+        if counterexample is None:
+            assert counterexamples == []
+        else:
+            assert all(brute_force_value(premise, counterexample) for premise in premises)
+            assert not brute_force_value(conclusion, counterexample)
+
+
+def test_many_propositions():
+    # Too many for a truth table, the propositions being built directly as the formulas only allow letters
+    propositions = [Proposition(f"P{index}") for index in range(61)]
+    chain = tuple(Conditional(a, b) for a, b in zip(propositions, propositions[1:]))
+    assert entailment_counterexample(chain + (propositions[0],), propositions[60]) is None
+    conclusion = Conditional(propositions[0], And(propositions[59], Not(propositions[60])))
+    counterexample = entailment_counterexample(chain, conclusion)
+    assert all(brute_force_value(formula, counterexample) for formula in chain)
+    assert not brute_force_value(conclusion, counterexample)
+
+
+def test_counterexamples_of_inferences():
+    assert inference_counterexample(inference_from_str("A -> B, B -> C |- A -> C")) is None
+    assert inference_counterexample(inference_from_str("A -> B, B |- A")) == {"A": False, "B": True}
+    assert inference_counterexample(inference_from_str("|- A v ~A")) is None
+    assert inference_counterexample(inference_from_str("A, ~A |- B")) is None
+    assert inference_counterexample(inference_from_str("|- False")) == {}
+    assert assignment_str({"A": False, "B": True}) == "A = false, B = true"
+
+
+def test_deep_formulas():
+    formula = Proposition("A")
+    for _ in range(10000):
+        formula = Not(Not(formula))
+    assert entailment_counterexample((formula,), Proposition("A")) is None
+    assert entailment_counterexample((formula,), Proposition("B")) == {"A": True, "B": False}
+
+    # The counterexample of an incorrect justification is found, instead of the depth of the formula being reported
+    disjunction = " v ".join(["P"] * 3000)
+    source = f"proof {disjunction} |- ({disjunction}) & Q\n    1. {disjunction} by Premise\n"
+    result = verify_source(source + f"    2. ({disjunction}) & Q by &I 1, 1\n")
+    assert result.error.message.endswith("counterexample: P = true, Q = false)")
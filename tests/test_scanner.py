@@ -0,0 +1,72 @@
+from conftest import SRC_DIRECTORY
+from fitch_api import *
+from io import StringIO
+import subprocess
+import sys
+
+LIBRARY = "proof A |- A v B\n    1. A by Premise\n    2. A v B by vI 1\n"
+
+
+def scan(source: str) -> tuple[list[tuple[int, str]], list[tuple[int, str]]]:
+    scanner = ProofScanner(source.splitlines(keepends=True))
+    header_lines = list(scanner.header_lines())
+    return header_lines, [(block.line_number, block.text) for block in scanner.proof_blocks()]
+
+
+def test_proof_keyword_only_starts_a_proof_at_the_start_of_a_line():
+    source = "#import proofs.ftc\n\nproof P |- P v Q\n    1. P by Premise\n    2. P v Q by apply 1\n"
+    header_lines, proof_blocks = scan(source)
+    assert header_lines == [(1, "#import proofs.ftc\n"), (2, "\n")]
+    assert proof_blocks == [(3, "proof P |- P v Q\n    1. P by Premise\n    2. P v Q by apply 1\n")]
+
+    result = verify_source(source, import_resolver=MappingImportResolver({"proofs.ftc": LIBRARY}))
+    assert result.success, result.error
+
+
+def test_indented_proofs():
+    assert scan("  proof A |- A\n    1. A by Premise\n") == ([], [(1, "proof A |- A\n    1. A by Premise\n")])
+
+
+def test_comments_removed_across_blocks():
+    source = (
+        "% the first proof\n"
+        "proof A |- A\n"
+        "    1. A by Premise % proof of A\n"
+        "% proof B |- B\n"
+        "\n"
+        "proof A |- A v B %\n"
+        "    1. A by Premise\n"
+        "    2. A v B by vI 1\n"
+    )
+    header_lines, proof_blocks = scan(source)
+    assert header_lines == [(1, "\n")]
+    assert proof_blocks == [
+        (2, "proof A |- A\n    1. A by Premise \n\n\n"),
+        (6, "proof A |- A v B \n    1. A by Premise\n    2. A v B by vI 1\n"),
+    ]
+    result = verify_source(source + "    3. A by R 4 % cited on line 9\n")
+    assert (result.error.message, result.error.line_number) == ("line number cited does not exist", 9)
+
+
+def test_error_line_of_an_invalid_goal():
+    for source, line_number in (
+        ("\n\nproof A |- \n    1. A by Premise\n", 3),
+        ("proof A |- A\n    1. A by Premise\n\nproof B |- B v\n    1. B by Premise\n", 4),
+    ):
+        result = verify_source(source)
+        assert (result.error.message, result.error.line_number) == ("could not parse proof goal", line_number)
+
+
+def test_standard_input(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "stdin", StringIO(LIBRARY))
+    assert list(source_lines(STDIN_FILE_NAME)) == LIBRARY.splitlines(keepends=True)
+
+    (tmp_path / "lib.ftc").write_text(LIBRARY)
+    outputs = []
+    for file_name, stdin in (("lib.ftc", ""), ("-", LIBRARY)):
+        command = [sys.executable, str(SRC_DIRECTORY / "fitch_cli.py"), "--no-cache", file_name]
+        process = subprocess.run(command, cwd=tmp_path, input=stdin, capture_output=True, text=True, encoding="utf-8")
+        assert process.returncode == 0, process.stderr
+        outputs.append(process.stdout)
+    assert outputs[0] == outputs[1]
+    assert "Proof of A ⊢ A ∨ B successful" in outputs[0]
@@ -0,0 +1,105 @@
+from fitch_server import *
+import io
+import os
+
+
+def request(server: FitchServer, method: str, params: dict, request_id: int = 1) -> dict:
+    return server.handle_message({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+
+
+def test_verify_text():
+    response = request(
+        FitchServer(), "verify", {"text": "proof A |- A v B\n    1. A by Premise\n    2. A v B by vI 1\n"}
+    )
+    assert response["result"] == {"success": True, "diagnostics": [], "proofs": ["A ⊢ A ∨ B"]}
+
+
+def test_verify_reports_errors_as_diagnostics():
+    response = request(FitchServer(), "verify", {"text": "proof A |- B\n    1. A by Premise\n"})
+    result = response["result"]
+    assert not result["success"]
+    assert result["diagnostics"][0]["line"] == 2
+    assert "counterexample" in result["diagnostics"][0]["message"]
+
+
+def test_empty_proof_is_a_diagnostic():
+    # What an editor sends right after a proof header is typed
+    response = request(FitchServer(), "verify", {"text": "proof |- A -> A\n"})
+    assert response["result"]["diagnostics"][0]["message"] == "proof has no lines"
+
+
+def test_invalid_requests():
+    server = FitchServer()
+    assert server.handle_message([])["error"]["code"] == INVALID_REQUEST
+    assert request(server, "unknown", {})["error"]["code"] == METHOD_NOT_FOUND
+    assert request(server, "verify", {})["error"]["code"] == INVALID_PARAMS
+    assert request(server, "verify", {"path": "missing.ftc"})["error"]["code"] == INVALID_PARAMS
+    assert request(server, "render", {"text": "", "format": "html"})["error"]["code"] == INVALID_PARAMS
+
+
+def test_internal_errors_keep_the_server_running(monkeypatch):
+    server = FitchServer()
+
+    def failing_verify(params: dict):
+        raise RecursionError("maximum recursion depth exceeded")
+
+    monkeypatch.setitem(server.methods, "verify", failing_verify)
+    input_stream = io.BytesIO()
+    for request_id, method in enumerate(["verify", "format"]):
+        write_message(input_stream, {"jsonrpc": "2.0", "id": request_id, "method": method, "params": {"text": ""}})
+    input_stream.seek(0)
+    output_stream = io.BytesIO()
+
+    server.serve(input_stream, output_stream)
+
+    output_stream.seek(0)
+    first_response, second_response = read_message(output_stream), read_message(output_stream)
+    assert first_response["error"]["code"] == INTERNAL_ERROR
+    assert "result" in second_response
+
+
+def test_parse_error():
+    input_stream = io.BytesIO(b"Content-Length: 5\r\n\r\n{nope")
+    output_stream = io.BytesIO()
+    FitchServer().serve(input_stream, output_stream)
+    output_stream.seek(0)
+    assert read_message(output_stream)["error"]["code"] == PARSE_ERROR
+
+
+def test_only_exit_is_accepted_after_shutdown():
+    server = FitchServer()
+    assert request(server, "shutdown", {}, 1) == {"jsonrpc": "2.0", "id": 1, "result": None}
+    assert request(server, "verify", {"text": ""}, 2)["error"]["code"] == INVALID_REQUEST
+    assert request(server, "shutdown", {}, 3)["error"]["code"] == INVALID_REQUEST
+    assert server.handle_message({"jsonrpc": "2.0", "method": "textDocument/didSave", "params": {}}) is None
+    assert server.handle_message({"jsonrpc": "2.0", "method": "exit"}) is None
+    assert server.exit_requested
+
+
+def edit(path, text: str):
+    stamp = path.stat().st_mtime_ns
+    path.write_text(text)
+    os.utime(path, ns=(stamp - 10**9, stamp - 10**9))  # the stamp changes even on a coarse file system clock
+
+
+def test_imported_files_kept_until_they_change(tmp_path):
+    (tmp_path / "lib.ftc").write_text("proof A |- A v B\n    1. A by Premise\n    2. A v B by vI 1\n")
+    (tmp_path / "mid.ftc").write_text("#import lib.ftc\n")
+    (tmp_path / "other.ftc").write_text("proof A |- A\n    1. A by Premise\n")
+    main = "#import mid.ftc\n#import other.ftc\n\nproof P |- P v Q\n    1. P by Premise\n    2. P v Q by apply 1\n"
+    (tmp_path / "main.ftc").write_text(main)
+    server = FitchServer()
+    path = str(tmp_path / "main.ftc")
+
+    assert request(server, "verify", {"path": path})["result"]["success"]
+    modules = dict(server.module_registry.modules)
+    assert len(modules) == 3
+    assert request(server, "verify", {"path": path})["result"]["success"]
+    assert server.module_registry.modules == modules  # not interpreted again
+
+    edit(tmp_path / "lib.ftc", "proof A |- B v A\n    1. A by Premise\n    2. B v A by vI 1\n")
+    response = request(server, "verify", {"path": path})
+    assert response["result"]["diagnostics"][0]["line"] == 6
+    # The file changed and the file importing it are interpreted again, not the other one
+    for key, module in server.module_registry.modules.items():
+        assert (module is modules[key]) == (key.name == "other.ftc")
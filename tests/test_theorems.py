@@ -0,0 +1,35 @@
+from fitch_api import *
+
+GENERAL = "proof A |- A v B\n    1. A by Premise\n    2. A v B by vI 1\n\n"
+INSTANCE = "proof A |- A v A\n    1. A by Premise\n    2. A v A by vI 1\n\n"
+USE = "proof P |- P v P\n    1. P by Premise\n    2. P v P by apply 1\n"
+
+
+def test_alpha_equivalent_inferences_are_the_same_theorem():
+    theorems = TheoremIndex()
+    theorems.add(inference_from_str("A, A -> B |- B"))
+    assert inference_from_str("P, P -> Q |- Q") in theorems
+    assert inference_from_str("P, Q -> P |- Q") not in theorems
+
+
+def test_matches_in_the_order_proved():
+    theorems = TheoremIndex()
+    for inference in ("A |- A v B", "A & B |- A", "A |- A v A", "A |- B v A"):
+        theorems.add(inference_from_str(inference))
+    matches = theorems.find_matches([Expression("P")], Expression("P v P"))
+    assert [str(theorem) for theorem in matches] == ["A ⊢ A ∨ B", "A ⊢ A ∨ A", "A ⊢ B ∨ A"]
+    assert str(most_specific_theorem(matches)) == "A ⊢ A ∨ A"
+    assert str(most_specific_theorem(matches[::2])) == "A ⊢ A ∨ B"  # neither is an instance of the other
+
+
+def test_ambiguous_application_uses_the_most_specific_theorem():
+    for source in (GENERAL + INSTANCE + USE, INSTANCE + GENERAL + USE):
+        result = verify_source(source)
+        assert result.success, result.error
+        assert str(result.proofs[-1].steps[1].justification) == "A ⊢ A ∨ A with 1"
+
+
+def test_application_without_a_match():
+    result = verify_source(GENERAL + "proof P |- P & P\n    1. P by Premise\n    2. P & P by apply 1\n")
+    assert not result.success
+    assert "no proved inference justifies" in result.error.message
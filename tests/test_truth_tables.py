@@ -0,0 +1,54 @@
+from conftest import brute_force_value, random_formula
+from fitch_truth_tables import *
+import itertools
+import random
+import pytest
+
+
+def brute_force_rows(formula: Formula, propositions: list[str]) -> list[tuple[dict[str, bool], bool]]:
+    rows = []
+    for values in itertools.product((False, True), repeat=len(propositions)):
+        assignment = dict(zip(propositions, values))
+        rows.append((assignment, brute_force_value(formula, assignment)))
+    return rows
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_truth_tables_against_brute_force(seed):
+    generator = random.Random(seed)
+    for _ in range(50):
+        formula = random_formula(generator, "ABCDE", 5)
+        table = TruthTable(formula)
+        assert table.propositions == sorted(formula.propositions())
+        rows = brute_force_rows(formula, table.propositions)
+        assert list(table.rows()) == rows
+        assert table.true_count() == sum(value for _, value in rows)
+        assert is_tautology(formula) == all(value for _, value in rows)
+        assert is_contradiction(formula) == (not any(value for _, value in rows))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_evaluations_agree(seed):
+    generator = random.Random(seed)
+    formulas = [random_formula(generator, "ABCDEF", 5) for _ in range(30)]
+    propositions = list("FEDCBA")  # not all in each formula, nor in alphabetical order
+    values = evaluate_formulas(formulas, propositions)
+    formula_values = FormulaValues(propositions)
+    for formula, bitset in zip(formulas, values):
+        assert bitset == TruthTable(formula, propositions).values == formula_values.value(formula)
+        rows = brute_force_rows(formula, propositions)
+        assert bitset == sum(value << row for row, (_, value) in enumerate(rows))
+    for formula_a, formula_b in itertools.combinations(formulas[:10], 2):
+        rows_a, rows_b = brute_force_rows(formula_a, propositions), brute_force_rows(formula_b, propositions)
+        assert are_equivalent(formula_a, formula_b) == (rows_a == rows_b)
+
+
+def test_expressions():
+    table = TruthTable(Expression("A -> B"))
+    assert [value for _, value in table.rows()] == [True, True, False, True]
+    assert str(table) == "A B │ A → B\n────┼───────\nF F │ T\nF T │ T\nT F │ F\nT T │ T\n"
+    assert is_tautology(Expression("(A -> B) v (B -> A)"))
+    assert are_equivalent(Expression("A -> B"), Expression("~A v B"))
+    assert not are_equivalent(Expression("A -> B"), Expression("B -> A"))
+    with pytest.raises(ValueError):
+        FormulaValues(["A"]).value(Expression("A & B").expr)
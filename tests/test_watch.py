@@ -0,0 +1,84 @@
+from fitch_watch import *
+import os
+
+LIBRARY = "proof A |- A v B\n    1. A by Premise\n    2. A v B by vI 1\n\n"
+LIBRARY += "proof A & B |- A\n    1. A & B by Premise\n    2. A by &E 1\n"
+MAIN = (
+    "#import lib.ftc\n\n"
+    "proof P |- P v Q\n    1. P by Premise\n    2. P v Q by apply A |- A v B 1\n\n"
+    "proof P & Q |- P\n    1. P & Q by Premise\n    2. P by apply A & B |- A 1\n\n"
+    "proof P |- P v P\n    1. P by Premise\n    2. P v P by apply 1\n\n"
+    "proof P & Q |- Q\n    1. P & Q by Premise\n    2. Q by &E 1\n"
+)
+
+
+def edit(path: Path, text: str):
+    stamp = file_stamp(path)
+    path.write_text(text)
+    # The stamp changes even on a coarse file system clock, and the file wasn't changed during a run
+    os.utime(path, ns=(stamp[0] - 10**9, stamp[0] - 10**9))
+
+
+def run(session: WatchSession) -> tuple[int, int, FitchError | None]:
+    """Interprets the file once, returning the number of proofs reused and verified, and the error found"""
+    interpreter = session.interpreter()
+    error = None
+    try:
+        for _ in interpreter.interpret_code(output=False):
+            pass
+    except FitchError as e:
+        error = e
+    session.end_run(error is None)
+    return session.proof_memo.hits, session.proof_memo.misses, error
+
+
+def start_session(tmp_path) -> WatchSession:
+    (tmp_path / "lib.ftc").write_text(LIBRARY)
+    (tmp_path / "main.ftc").write_text(MAIN)
+    session = WatchSession(tmp_path / "main.ftc")
+    assert run(session) == (0, 6, None)  # the 2 proofs of the library and the 4 of the file
+    assert session.watcher.changed_files() == []
+    return session
+
+
+def test_only_the_proof_edited_is_verified_again(tmp_path):
+    session = start_session(tmp_path)
+    edit(tmp_path / "main.ftc", MAIN.replace("2. Q by &E 1", "2. Q by ∧E 1"))
+
+    assert session.watcher.changed_files() == [(tmp_path / "main.ftc").resolve()]
+    assert run(session) == (5, 1, None)
+    assert run(session) == (6, 0, None)
+
+
+def test_proofs_applying_a_changed_goal_are_verified_again(tmp_path):
+    session = start_session(tmp_path)
+    edit(tmp_path / "lib.ftc", LIBRARY.replace("A & B |- A", "A & B |- B").replace("2. A by &E 1", "2. B by &E 1"))
+
+    assert session.watcher.changed_files() == [(tmp_path / "lib.ftc").resolve()]
+    hits, misses, error = run(session)
+    # The library is verified again, then the proof applying the theorem which is no longer proved
+    assert (hits, misses) == (2, 2)
+    assert (error.message, error.line_number) == ("inference 'A ∧ B ⊢ A' was never proved", 9)
+
+
+def test_proofs_with_an_inferred_theorem_are_verified_again_when_the_theorems_change(tmp_path):
+    session = start_session(tmp_path)
+    edit(tmp_path / "lib.ftc", "proof A |- A\n    1. A by Premise\n\n" + LIBRARY)
+
+    # The proofs of the library, and those of the file not applying a theorem or giving its inference, are reused
+    assert run(session) == (5, 2, None)
+
+
+def test_prune_drops_the_unused_entries(tmp_path):
+    session = start_session(tmp_path)
+    assert len(session.proof_memo.entries) == 6
+    edit(tmp_path / "main.ftc", MAIN.replace("2. Q by &E 1", "2. Q by ∧E 1"))
+
+    run(session)
+
+    assert len(session.proof_memo.entries) == 6  # not the previous version of the proof edited
+    assert all("&E" not in proof_str for _, proof_str in session.proof_memo.entries if "Q |- Q" in proof_str)
+    # After an error, the entries of the proofs following it are kept
+    edit(tmp_path / "main.ftc", MAIN.replace("2. P v Q by", "2. P v R by"))
+    assert run(session)[2] is not None
+    assert len(session.proof_memo.entries) == 6
@@ -0,0 +1,70 @@
+from fitch_api import *
+from io import StringIO
+
+LIBRARY = "proof A |- A v B\n    1. A by Premise\n    2. A v B by vI 1\n"
+MAIN = (
+    "#import lib.ftc\n\n"
+    "proof P |- P v Q\n    1. P by Premise\n    2. P v Q by apply 1\n\n"
+    "proof P & Q |- Q\n    1. P & Q by Premise\n    2. Q by &E 1\n"
+)
+EXPECTED_OUTPUT = """Imported file "lib.ftc"
+
+
+
+Proof of P ⊢ P ∨ Q successful
+
+1 │ P                         Premise
+  ├─────────
+2 │ P ∨ Q                     A ⊢ A ∨ B with 1
+
+
+
+
+Proof of P ∧ Q ⊢ Q successful
+
+1 │ P ∧ Q                     Premise
+  ├─────────
+2 │ Q                         ∧E 1
+
+"""
+
+
+def interpreter_with_writers(proof_writers: list) -> FitchInterpreter:
+    import_resolver = MappingImportResolver({"main.ftc": MAIN, "lib.ftc": LIBRARY})
+    return FitchInterpreter(
+        "main.ftc", source=MAIN, import_resolver=import_resolver, proof_writers=proof_writers, keep_proofs=False
+    )
+
+
+def test_text_writer_writes_the_output_of_the_interpreter():
+    sink = StringIO()
+    text_writer = TextWriter(sink)
+    interpreter = interpreter_with_writers([text_writer])
+    for _ in interpreter.interpret_code(output=False):
+        pass
+    text_writer.end()
+
+    assert sink.getvalue() == EXPECTED_OUTPUT
+    assert "".join(interpreter_with_writers([]).interpret_code()) == EXPECTED_OUTPUT
+    assert interpreter.proofs_list == []
+
+
+def test_imports_without_proofs():
+    import_resolver = MappingImportResolver({"lib.ftc": LIBRARY})
+    interpreter = FitchInterpreter("main.ftc", source="#import lib.ftc\n", import_resolver=import_resolver)
+    assert "".join(interpreter.interpret_code()) == 'Imported file "lib.ftc"\n\n\n\n'
+
+
+def test_latex_writer_writes_the_proofs_verified():
+    sink = StringIO()
+    latex_writer = LatexWriter(sink)
+    latex_writer.begin()
+    interpreter = interpreter_with_writers([latex_writer])
+    for _ in interpreter.interpret_code(output=False):
+        pass
+    latex_writer.end()
+
+    document = sink.getvalue()
+    assert document.startswith(LATEX_DOCUMENT_START) and document.endswith(LATEX_DOCUMENT_END)
+    assert document.count(r"\section") == 2  # not the imported proof
+    assert r"\have {2} {Q}" in document